@@ -1,17 +1,69 @@
-from fastapi import FastAPI, Request, Form, HTTPException, Depends
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Form, HTTPException, Depends, WebSocket, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, FileResponse
+from starlette.requests import ClientDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import numpy as np
 import pandas as pd
 import os
+import asyncio
 from datetime import datetime
 import traceback
 from pydantic import BaseModel
+from typing import Any, List, Optional
 
-from src.pipeline.predict_pipeline import CustomData, PredictPipeline
-from src.logger import logging
+from src.pipeline.predict_pipeline import (
+    FEATURE_FIELDS,
+    WARMUP_ROWS,
+    BatchCustomData,
+    CustomData,
+    PredictPipeline
+)
+from src.pipeline.prediction_cache import PredictionCache
+from src.serving.micro_batcher import MicroBatcher, BatcherOverloaded
+from src.serving.inference_executor import (
+    InferenceExecutor,
+    InferenceOverloaded,
+    InferenceTimeout,
+    get_inference_executor
+)
+from src.serving.model_router import ModelRoute, ModelRouter, UnknownModel
+from src.serving.prefork import cluster_status, mark_worker_warm
+from src.serving.shadow import ShadowConfig, ShadowScorer
+from src.serving.admission import (
+    AdmissionConfig,
+    AdmissionController,
+    AdmissionMiddleware,
+    DeadlineExceeded,
+    bulk_admission_config,
+    current_deadline
+)
+from src.serving.telemetry import TelemetrySession, TelemetryStats
+from src.serving.batch_jobs import BatchJobManager, BatchJobsFull, JobNotFound
+from src.serving.arrow_io import (
+    ArrowFormatError,
+    ArrowUploadConfig,
+    ArrowUploadTooLarge,
+    append_predictions,
+    detect_format,
+    feature_arrays,
+    media_type,
+    read_table,
+    write_table
+)
+from src.serving.ndjson import (
+    NDJSONStreamConfig,
+    NDJSONStreamingResponse,
+    dump_lines,
+    iter_line_chunks,
+    parse_lines
+)
+from src.logger import logging, audit_prediction, audit_sampled
 from src.exception import CustomException
+from src.metrics import REGISTRY, PARSE_SECONDS, SERIALIZE_SECONDS
+from src.serving.http_metrics import MetricsMiddleware
+import time
 
 # Create FastAPI app
 app = FastAPI(
@@ -20,24 +72,103 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Concurrency and queue limits with deadline-aware shedding; bulk uploads get their own, smaller budget
+realtime_admission = AdmissionController(AdmissionConfig())
+bulk_admission = AdmissionController(bulk_admission_config())
+app.add_middleware(
+    AdmissionMiddleware,
+    controllers={
+        "/api/predict": realtime_admission,
+        "/predictdata": realtime_admission,
+        "/api/predict/batch": bulk_admission,
+        "/api/predict/stream": bulk_admission,
+        "/api/predict/arrow": bulk_admission,
+        "/api/jobs": bulk_admission,
+    }
+)
+
+# Request counts, latency and in-flight gauge for the prediction routes (outermost, so shed requests are counted)
+app.add_middleware(
+    MetricsMiddleware,
+    paths=[
+        "/api/predict", "/api/predict/batch", "/api/predict/stream", "/api/predict/arrow",
+        "/api/jobs", "/api/jobs/*", "/predictdata", "/health",
+    ]
+)
+
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # --- Dependency Injection for the Prediction Pipeline ---
-def get_pipeline() -> PredictPipeline:
+def get_model_router() -> ModelRouter:
     """
-    Dependency function to create and return a PredictPipeline instance.
-    This avoids global variables and makes the app more robust and testable.
+    The app-wide ModelRouter. Every served model version has its own cached
+    pipeline, micro-batcher and prediction cache, so artifacts are unpickled
+    once per process instead of once per request.
     """
+    router = getattr(app.state, "model_router", None)
+    if router is None:
+        router = ModelRouter(executor=get_inference_executor())
+        app.state.model_router = router
+    return router
+
+def select_model_route(headers) -> ModelRoute:
+    """The model named in the routing header, or one picked by weight; raises UnknownModel"""
+    router = get_model_router()
+    return router.select(headers.get(router.config.header))
+
+def get_model_route(request: Request) -> ModelRoute:
+    """Dependency returning the model route that serves this request."""
     try:
-        pipeline = PredictPipeline()
-        logging.info("Prediction pipeline dependency loaded successfully.")
-        return pipeline
+        route = select_model_route(request.headers)
+        # Load (or reuse) the cached artifacts so a broken model surfaces as a 503
+        route.model_cache.get()
+        return route
+    except UnknownModel as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
     except Exception as e:
         logging.error(f"Failed to load prediction pipeline dependency: {str(e)}")
         raise HTTPException(status_code=503, detail="Prediction system is not available. Please check server logs.")
 
+def get_micro_batcher() -> MicroBatcher:
+    """The default model's MicroBatcher that coalesces single-row predictions."""
+    return get_model_router().default.batcher
+
+def get_prediction_cache() -> PredictionCache:
+    """The default model's quantized prediction cache (inactive unless PREDICTION_CACHE_ENABLED=1)."""
+    return get_model_router().default.cache
+
+def get_telemetry_stats() -> TelemetryStats:
+    """Counters shared by all WebSocket telemetry sessions."""
+    stats = getattr(app.state, "telemetry_stats", None)
+    if stats is None:
+        stats = TelemetryStats()
+        app.state.telemetry_stats = stats
+    return stats
+
+def get_shadow_scorer():
+    """The app-wide ShadowScorer, or None unless SHADOW_MODEL_PATH names a candidate model."""
+    return getattr(app.state, "shadow_scorer", None)
+
+def shadow_copy(features, predictions, confidences):
+    """Hand a scored request to the shadow model, if one is configured. Never blocks."""
+    shadow = get_shadow_scorer()
+    if shadow is not None:
+        shadow.submit(features, predictions, confidences)
+
+def get_batch_jobs() -> BatchJobManager:
+    """Dependency returning the background batch job manager and its worker pool."""
+    jobs = getattr(app.state, "batch_jobs", None)
+    if jobs is None:
+        jobs = BatchJobManager()
+        app.state.batch_jobs = jobs
+    return jobs
+
+def get_executor() -> InferenceExecutor:
+    """Dependency returning the bounded thread pool that runs blocking inference off the event loop."""
+    return get_inference_executor()
+
 # Pydantic models for API
 class PredictionRequest(BaseModel):
     Type: str
@@ -52,19 +183,104 @@ class PredictionResponse(BaseModel):
     failure_risk: str
     confidence: float = None
     timestamp: str
-    model_version: str = "v1.0.0"
+    # Route name and content hash of the model that produced the prediction
+    model_name: str
+    model_version: str
+
+def overloaded(status_code: int, detail: str, admission: AdmissionController = realtime_admission) -> HTTPException:
+    """Error for a request turned away for capacity reasons, telling the client when to retry"""
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(admission.config.retry_after_seconds)}
+    )
+
+# Seconds allowed for loading and warming the model at startup
+STARTUP_TIMEOUT_SECONDS = float(os.environ.get("MODEL_STARTUP_TIMEOUT_SECONDS", 300))
+STARTED_AT = time.time()
+
+# Upper bound on rows per /api/predict/batch call
+MAX_BATCH_ROWS = int(os.environ.get("MAX_BATCH_ROWS", 50000))
+
+class BatchPredictionRequest(BaseModel):
+    # Rows are validated column-wise by BatchCustomData so one bad row cannot reject the batch
+    readings: List[Any]
+
+class BatchPredictionItem(BaseModel):
+    index: int
+    prediction: int
+    failure_risk: str
+    confidence: Optional[float] = None
+
+class BatchPredictionError(BaseModel):
+    index: int
+    error: str
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionItem]
+    errors: List[BatchPredictionError]
+    total: int
+    succeeded: int
+    failed: int
+    timestamp: str
+    model_name: str
+    model_version: str
 
 @app.on_event("startup")
 async def startup_event():
-    """Check for model artifacts on startup to fail fast."""
+    """Load, validate and warm up the model so the app fails fast and the first request is not slow."""
     logging.info("Starting FastAPI application...")
+    app.state.ready = False
 
-    # Check if model artifacts exist. If not, the app cannot function.
-    if not os.path.exists("artifacts/model.pkl"):
-        error_msg = "FATAL: Model artifacts not found. The application cannot start."
+    # Each ModelCache validates its artifact pair and runs its warm-up batch before publishing it
+    executor = get_inference_executor()
+    try:
+        router = get_model_router()
+        loaded = await executor.run(router.load_all, timeout=STARTUP_TIMEOUT_SECONDS)
+        # One call per model through the request path proper, so pool threads and pipeline code are warm too
+        start = time.perf_counter()
+        for route in router.routes.values():
+            await executor.run(route.pipeline.predict_rows, WARMUP_ROWS, timeout=STARTUP_TIMEOUT_SECONDS)
+        request_warmup_ms = (time.perf_counter() - start) * 1000
+    except Exception as e:
+        error_msg = f"FATAL: Model artifacts could not be loaded. The application cannot start. ({e})"
         logging.error(error_msg)
         raise RuntimeError(error_msg)
-    logging.info("Model artifacts found. Application is ready to serve requests.")
+
+    artifacts = loaded[router.default.name]
+    app.state.startup = {
+        "model_version": artifacts.version,
+        "load_seconds": round(artifacts.load_seconds, 4),
+        "warmup": artifacts.warmup,
+        "request_warmup_ms": round(request_warmup_ms, 3),
+        "models": {name: model.version for name, model in loaded.items()},
+    }
+    # The candidate loads on the shadow thread; a broken candidate never blocks startup
+    shadow_config = ShadowConfig()
+    if shadow_config.enabled:
+        app.state.shadow_scorer = ShadowScorer(shadow_config)
+        app.state.shadow_scorer.start()
+
+    app.state.ready = True
+    mark_worker_warm()
+    logging.info(
+        f"Model {artifacts.version} loaded in {artifacts.load_seconds:.3f}s and warmed up in "
+        f"{artifacts.warmup['seconds']:.3f}s. Application is ready to serve requests."
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    router = getattr(app.state, "model_router", None)
+    if router is not None:
+        await router.stop()
+    shadow = get_shadow_scorer()
+    if shadow is not None:
+        shadow.stop()
+    jobs = getattr(app.state, "batch_jobs", None)
+    if jobs is not None:
+        jobs.shutdown()
+    get_inference_executor().shutdown()
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
@@ -79,7 +295,8 @@ async def predict_form(request: Request):
 @app.post("/predictdata", response_class=HTMLResponse)
 async def predict_datapoint(
     request: Request,
-    pipeline: PredictPipeline = Depends(get_pipeline),
+    route: ModelRoute = Depends(get_model_route),
+    executor: InferenceExecutor = Depends(get_executor),
     Type: str = Form(...),
     Air_temperature: float = Form(...),
     Process_temperature: float = Form(...),
@@ -107,14 +324,16 @@ async def predict_datapoint(
         
         # Convert to DataFrame
         pred_df = data.get_data_as_data_frame()
-        logging.info(f"Prediction input: {pred_df.to_dict('records')[0]}")
 
-        # Make prediction
-        logging.info("Starting prediction")
-        results, confidence = pipeline.predict(pred_df)
+        # Make prediction on the inference pool so the event loop stays responsive
+        logging.debug("Starting prediction")
+        start = time.perf_counter()
+        results, confidence = await executor.run(route.pipeline.predict, pred_df, deadline=current_deadline())
+        route.observe(1, start)
+        shadow_copy(pred_df, results, None if confidence is None else [confidence])
         
-        # Log successful prediction
-        logging.info(f"Prediction completed: {results[0]}, Confidence: {confidence}")
+        # Log successful prediction (formatted lazily, only if DEBUG is enabled)
+        logging.debug("Prediction completed: %s, Confidence: %s", results[0], confidence)
         
         # Format result message
         if results[0] == 1:
@@ -130,21 +349,30 @@ async def predict_datapoint(
             else:
                 prediction_result = "✅ LOW RISK: Machine operating normally. Continue regular monitoring."
         
-        # Log prediction for monitoring
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "input_data": pred_df.to_dict('records')[0],
-            "prediction": int(results[0]),
-            "confidence": float(confidence) if confidence else None,
-            "risk_level": risk_level
-        }
-        logging.info(f"Prediction logged: {log_entry}")
+        # Sampled structured audit record; nothing is built for sampled-out predictions
+        if audit_sampled():
+            audit_prediction({
+                "timestamp": datetime.now().isoformat(),
+                "source": "form",
+                "input_data": dict(vars(data)),
+                "prediction": int(results[0]),
+                "confidence": float(confidence) if confidence else None,
+                "risk_level": risk_level
+            })
         
         return templates.TemplateResponse("home.html", {
             "request": request,
             "results": prediction_result
         })
         
+    except (InferenceOverloaded, InferenceTimeout, DeadlineExceeded) as e:
+        error_msg = "❌ The prediction service is busy. Please try again in a moment."
+        logging.warning(f"Form prediction not completed: {str(e)}")
+        return templates.TemplateResponse("home.html", {
+            "request": request,
+            "results": error_msg
+        })
+
     except CustomException as e:
         error_msg = f"❌ Prediction Error: {str(e)}"
         logging.error(error_msg)
@@ -162,83 +390,591 @@ async def predict_datapoint(
             "results": error_msg
         })
 
+def liveness():
+    """The process is up and its event loop is answering"""
+    return {
+        "alive": True,
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - STARTED_AT, 1),
+    }
+
+def readiness():
+    """Whether this process can serve predictions, judged by the model it actually has loaded"""
+    router = get_model_router()
+    model = router.default.model_cache.status()
+    models = router.stats()
+    reasons = []
+    if not getattr(app.state, "ready", False):
+        reasons.append("startup warm-up has not finished")
+    reasons.extend(f"model {name} not loaded" for name, stats in models.items() if not stats["loaded"])
+
+    # Under the prefork server, only report ready once every worker is warm
+    cluster = cluster_status()
+    if cluster is not None and not cluster["ready"]:
+        reasons.append(f"{cluster['warm_workers']}/{cluster['workers']} workers warm")
+
+    return {
+        "ready": not reasons,
+        "reasons": reasons,
+        "model": model,
+        "models": models,
+        "startup": getattr(app.state, "startup", None),
+        "workers": cluster,
+    }
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
     try:
+        live = liveness()
+        ready = readiness()
         health_status = {
-            "status": "unknown",
+            "status": "healthy" if ready["ready"] else "degraded",
             "timestamp": datetime.now().isoformat(),
+            "liveness": live,
+            "readiness": ready,
             "components": {}
         }
-        
-        # Check if artifacts exist
-        # For prediction, only the model and preprocessor are essential.
-        artifacts = {
-            "model": "artifacts/model.pkl",
-            "preprocessor": "artifacts/preprocessor.pkl"
-        }
-        
-        all_healthy = True
-        for name, path in artifacts.items():
-            exists = os.path.exists(path)
-            health_status["components"][name] = {
-                "exists": exists,
-                "path": path,
-                "status": "OK" if exists else "MISSING"
-            }
-            if not exists:
-                all_healthy = False
-        
-        # With dependency injection, the pipeline is loaded on-demand per request.
-        # The health check confirms that the necessary artifacts are present,
-        # making the application ready to attempt loading the pipeline.
-        health_status["components"]["prediction_pipeline"] = {
-            "status": "Ready to load on request" if all_healthy else "Not ready, critical artifacts missing",
-            "ready": all_healthy
+
+        health_status["components"]["micro_batcher"] = get_micro_batcher().stats()
+        health_status["components"]["inference_executor"] = get_inference_executor().stats()
+        health_status["components"]["admission"] = {
+            "realtime": realtime_admission.stats(),
+            "bulk": bulk_admission.stats()
         }
-        
-        health_status["status"] = "healthy" if all_healthy else "degraded"
-        
+        health_status["components"]["prediction_cache"] = get_prediction_cache().stats()
+        shadow = get_shadow_scorer()
+        health_status["components"]["shadow"] = shadow.stats() if shadow is not None else {"enabled": False}
+        health_status["components"]["websocket"] = get_telemetry_stats().stats()
+        health_status["components"]["batch_jobs"] = get_batch_jobs().stats()
+
         return health_status
         
     except Exception as e:
         logging.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe: 200 while the process can answer at all"""
+    return liveness()
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness probe: 503 until the model is loaded and warm, so no traffic is routed here before then"""
+    ready = readiness()
+    return JSONResponse(jsonable_encoder(ready), status_code=200 if ready["ready"] else 503)
+
+async def predict_row(
+    row: tuple,
+    pipeline: PredictPipeline,
+    batcher: MicroBatcher,
+    executor: InferenceExecutor,
+    cache: PredictionCache,
+    deadline: float = None
+):
+    """
+    Score one (Type, air, process, rpm, torque, wear) reading through the
+    prediction cache, the micro-batcher and the inference pool.
+    Work still queued when `deadline` passes is dropped (DeadlineExceeded).
+    Returns (prediction, confidence).
+    """
+    # Repeated (quantized) readings are answered without touching sklearn
+    cached = None
+    if cache.config.enabled:
+        cache_key = cache.key(row)
+        cached = cache.get(cache_key)
+        cache_version = cache.version
+        if cached is not None:
+            # The shadow model sees every served answer, hits included, so its comparison is not biased to misses
+            shadow_copy([row], [cached[0]], None if cached[1] is None else [cached[1]])
+            return cached
+
+    if batcher.config.enabled:
+        # Coalesced with concurrent requests into a single predict_proba call
+        # The timeout covers both the queue wait and the batch inference
+        prediction, confidence = await asyncio.wait_for(
+            batcher.predict(row, deadline=deadline), executor.config.timeout_seconds
+        )
+    else:
+        # Make prediction
+        pred_df = CustomData(*row).get_data_as_data_frame()
+        results, confidence = await executor.run(pipeline.predict, pred_df, deadline=deadline)
+        prediction = int(results[0])
+
+    if cache.config.enabled:
+        cache.put(cache_key, (prediction, confidence), version=cache_version)
+
+    shadow_copy([row], [prediction], None if confidence is None else [confidence])
+    return prediction, confidence
+
 @app.post("/api/predict", response_model=PredictionResponse)
 async def api_predict(
     request: PredictionRequest,
-    pipeline: PredictPipeline = Depends(get_pipeline)
+    route: ModelRoute = Depends(get_model_route),
+    executor: InferenceExecutor = Depends(get_executor)
 ):
     """REST API endpoint for predictions"""
     try:
-        # Create CustomData object
-        data = CustomData(
-            Type=request.Type,
-            Air_temperature=request.Air_temperature,
-            Process_temperature=request.Process_temperature,
-            Rotational_speed=request.Rotational_speed,
-            Torque=request.Torque,
-            Tool_wear=request.Tool_wear
+        row = (
+            request.Type,
+            request.Air_temperature,
+            request.Process_temperature,
+            request.Rotational_speed,
+            request.Torque,
+            request.Tool_wear
         )
-        
-        # Make prediction
-        pred_df = data.get_data_as_data_frame()
-        results, confidence = pipeline.predict(pred_df)
-        
+        start = time.perf_counter()
+        prediction, confidence = await predict_row(
+            row, route.pipeline, route.batcher, executor, route.cache, current_deadline()
+        )
+        route.observe(1, start)
+
+        if audit_sampled():
+            audit_prediction({
+                "timestamp": datetime.now().isoformat(),
+                "source": "api",
+                "model": route.name,
+                "input_data": dict(zip(FEATURE_FIELDS, row)),
+                "prediction": prediction,
+                "confidence": float(confidence) if confidence else None
+            })
+
         # Return response
-        return PredictionResponse(
-            prediction=int(results[0]),
-            failure_risk="High" if results[0] == 1 else "Low",
+        start = time.perf_counter()
+        response = JSONResponse(jsonable_encoder(PredictionResponse(
+            prediction=prediction,
+            failure_risk="High" if prediction == 1 else "Low",
             confidence=float(confidence) if confidence else None,
-            timestamp=datetime.now().isoformat()
-        )
-        
+            timestamp=datetime.now().isoformat(),
+            model_name=route.name,
+            model_version=route.version
+        )))
+        SERIALIZE_SECONDS.observe(time.perf_counter() - start)
+        return response
+
+    except (BatcherOverloaded, InferenceOverloaded) as e:
+        logging.warning(f"API prediction rejected: {str(e)}")
+        raise overloaded(503, str(e))
+
+    except DeadlineExceeded as e:
+        # Shed before scoring; counted in pm_requests_shed_total
+        raise overloaded(503, str(e))
+
+    except (InferenceTimeout, asyncio.TimeoutError) as e:
+        logging.warning(f"API prediction timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail="Prediction timed out")
+
     except Exception as e:
         logging.error(f"API prediction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+def score_readings(pipeline: PredictPipeline, readings: list):
+    """
+    Validate and score a list of readings in one vectorized pass.
+    Blocking; call it through the inference executor. Returns (results, errors).
+    """
+    batch = BatchCustomData(readings, known_types=pipeline.known_types())
+    features_df, valid_index, errors = batch.get_data_as_data_frame()
+
+    results = []
+    if len(features_df):
+        predictions, confidences = pipeline.predict_with_confidence(features_df)
+        shadow_copy(features_df, predictions, confidences)
+        predictions = predictions.astype(int).tolist()
+        confidences = confidences.tolist() if confidences is not None else [None] * len(predictions)
+
+        results = [
+            {
+                "index": index,
+                "prediction": prediction,
+                "failure_risk": "High" if prediction == 1 else "Low",
+                "confidence": confidence
+            }
+            for index, prediction, confidence in zip(valid_index.tolist(), predictions, confidences)
+        ]
+
+    return results, errors
+
+@app.post("/api/predict/batch", response_model=BatchPredictionResponse)
+async def api_predict_batch(
+    request: BatchPredictionRequest,
+    route: ModelRoute = Depends(get_model_route),
+    executor: InferenceExecutor = Depends(get_executor)
+):
+    """Vectorized REST endpoint: one transform and one predict_proba for the whole batch"""
+    if len(request.readings) > MAX_BATCH_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.readings)} rows (max {MAX_BATCH_ROWS})"
+        )
+
+    try:
+        start = time.perf_counter()
+        results, errors = await executor.run(score_readings, route.pipeline, request.readings, deadline=current_deadline())
+        route.observe(len(results), start)
+
+        if errors:
+            logging.info(f"Batch prediction rejected {len(errors)} of {len(request.readings)} rows")
+
+        # Serialize directly; re-validating every row through the response model would dominate large batches
+        start = time.perf_counter()
+        response = JSONResponse({
+            "results": results,
+            "errors": errors,
+            "total": len(request.readings),
+            "succeeded": len(results),
+            "failed": len(errors),
+            "timestamp": datetime.now().isoformat(),
+            "model_name": route.name,
+            "model_version": route.version
+        })
+        SERIALIZE_SECONDS.observe(time.perf_counter() - start)
+        return response
+
+    except InferenceOverloaded as e:
+        logging.warning(f"API batch prediction rejected: {str(e)}")
+        raise overloaded(503, str(e), bulk_admission)
+
+    except DeadlineExceeded as e:
+        raise overloaded(503, str(e), bulk_admission)
+
+    except InferenceTimeout as e:
+        logging.warning(f"API batch prediction timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail="Batch prediction timed out")
+
+    except Exception as e:
+        logging.error(f"API batch prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+def score_ndjson_chunk(pipeline: PredictPipeline, lines: list, offset: int):
+    """Parse, score and serialize one chunk of NDJSON lines. Returns (payload, succeeded, failed)."""
+    start = time.perf_counter()
+    readings = parse_lines(lines)
+    PARSE_SECONDS.observe(time.perf_counter() - start)
+
+    results, errors = score_readings(pipeline, readings)
+
+    start = time.perf_counter()
+    records = sorted(results + errors, key=lambda record: record["index"])
+    for record in records:
+        record["index"] += offset
+    payload = dump_lines(records)
+    SERIALIZE_SECONDS.observe(time.perf_counter() - start)
+    return payload, len(results), len(errors)
+
+@app.post("/api/predict/stream")
+async def api_predict_stream(
+    request: Request,
+    route: ModelRoute = Depends(get_model_route),
+    executor: InferenceExecutor = Depends(get_executor)
+):
+    """
+    Streaming NDJSON endpoint for backfills: the upload is read and scored
+    chunk by chunk and results are streamed back as they are produced, so
+    server memory does not depend on the upload size.
+    """
+    config = NDJSONStreamConfig()
+
+    async def generate():
+        processed = succeeded = failed = 0
+        start = time.perf_counter()
+        try:
+            async for lines in iter_line_chunks(request.stream(), config):
+                payload, chunk_succeeded, chunk_failed = await executor.run(
+                    score_ndjson_chunk, route.pipeline, lines, processed
+                )
+                processed += len(lines)
+                succeeded += chunk_succeeded
+                failed += chunk_failed
+                yield payload
+
+        except ClientDisconnect:
+            logging.warning(f"NDJSON stream client disconnected after {processed} rows")
+            return
+
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logging.error(f"NDJSON stream failed after {processed} rows: {str(e)}")
+            yield dump_lines([{"error": str(e), "fatal": True, "rows_processed": processed}])
+            return
+
+        route.observe(succeeded, start)
+        logging.info(f"NDJSON stream completed: {processed} rows, {failed} rejected")
+        yield dump_lines([{
+            "done": True, "total": processed, "succeeded": succeeded, "failed": failed,
+            "model_name": route.name, "model_version": route.version
+        }])
+
+    return NDJSONStreamingResponse(generate())
+
+def score_arrow(pipeline: PredictPipeline, body: bytearray, fmt: str, out_fmt: str, config: ArrowUploadConfig):
+    """
+    Read, score and re-serialize a columnar upload without converting it to
+    rows. Blocking; call it through the inference executor.
+    Returns (payload, rows, failed).
+    """
+    start = time.perf_counter()
+    table = read_table(body, fmt)
+    if table.num_rows > config.max_rows:
+        raise ArrowUploadTooLarge(f"Upload too large: {table.num_rows} rows (max {config.max_rows})")
+    types, numeric, errors = feature_arrays(table, pipeline.known_types())
+    PARSE_SECONDS.observe(time.perf_counter() - start)
+
+    valid = errors == 0
+    failed = int(len(valid) - valid.sum())
+    predictions, confidences = np.empty(0, dtype=np.int64), None
+    if failed < len(valid):
+        if failed:
+            types, numeric = types[valid], numeric[valid]
+        predictions, confidences = pipeline.predict_columns(types, numeric)
+
+    start = time.perf_counter()
+    payload = write_table(append_predictions(table, predictions, confidences, errors), out_fmt, config).to_pybytes()
+    SERIALIZE_SECONDS.observe(time.perf_counter() - start)
+    return payload, table.num_rows, failed
+
+async def read_body(request: Request, max_bytes: int) -> bytearray:
+    """The request body, refusing uploads larger than max_bytes before they are buffered"""
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise ArrowUploadTooLarge(f"Upload too large (max {max_bytes} bytes)")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise ArrowUploadTooLarge(f"Upload too large (max {max_bytes} bytes)")
+    return body
+
+@app.post("/api/predict/arrow")
+async def api_predict_arrow(
+    request: Request,
+    format: Optional[str] = None,
+    route: ModelRoute = Depends(get_model_route),
+    executor: InferenceExecutor = Depends(get_executor)
+):
+    """
+    Columnar bulk scoring: upload an Arrow IPC stream or a Parquet file with
+    the six feature columns and get the same table back with Prediction,
+    Confidence, Failure_Risk and Error columns appended. The response uses
+    the upload's format unless ?format=arrow|parquet asks for the other one.
+    """
+    config = ArrowUploadConfig()
+    if format not in (None, "arrow", "parquet"):
+        raise HTTPException(status_code=400, detail="format must be 'arrow' or 'parquet'")
+
+    try:
+        body = await read_body(request, config.max_bytes)
+        if not body:
+            raise HTTPException(status_code=400, detail="Empty upload")
+        fmt = detect_format(body, request.headers.get("content-type"))
+        out_fmt = format or fmt
+
+        start = time.perf_counter()
+        payload, rows, failed = await executor.run(
+            score_arrow, route.pipeline, body, fmt, out_fmt, config, deadline=current_deadline()
+        )
+        route.observe(rows - failed, start)
+        if failed:
+            logging.info(f"Arrow prediction rejected {failed} of {rows} rows")
+
+        return Response(content=payload, media_type=media_type(out_fmt), headers={
+            "X-Rows-Total": str(rows),
+            "X-Rows-Failed": str(failed),
+            "X-Model-Name": route.name,
+            "X-Model-Version": route.version,
+        })
+
+    except HTTPException:
+        raise
+
+    except ArrowUploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    except ArrowFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except InferenceOverloaded as e:
+        logging.warning(f"Arrow prediction rejected: {str(e)}")
+        raise overloaded(503, str(e), bulk_admission)
+
+    except DeadlineExceeded as e:
+        raise overloaded(503, str(e), bulk_admission)
+
+    except InferenceTimeout as e:
+        logging.warning(f"Arrow prediction timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail="Arrow prediction timed out")
+
+    except Exception as e:
+        logging.error(f"Arrow prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Arrow prediction failed: {str(e)}")
+
+def save_job_upload(upload, path: str, max_bytes: int):
+    """Copy an uploaded batch file to the job directory and check its header. Blocking."""
+    written = 0
+    with open(path, "wb") as file_obj:
+        for block in iter(lambda: upload.read(1 << 20), b""):
+            written += len(block)
+            if written > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload too large (max {max_bytes} bytes)")
+            file_obj.write(block)
+
+    try:
+        columns = pd.read_csv(path, nrows=0).columns
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Cannot read CSV upload: {e}")
+    missing = [column for column in FEATURE_FIELDS.values() if column not in columns]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing required columns: {missing}")
+
+@app.post("/api/jobs", status_code=202)
+async def submit_batch_job(
+    file: UploadFile = File(...),
+    route: ModelRoute = Depends(get_model_route),
+    jobs: BatchJobManager = Depends(get_batch_jobs)
+):
+    """Submit a CSV file for background scoring; poll /api/jobs/{job_id} and download the result when it succeeds"""
+    try:
+        job_id = await asyncio.to_thread(jobs.create, file.filename, model_name=route.name, model_version=route.version)
+    except BatchJobsFull as e:
+        raise overloaded(429, str(e), bulk_admission)
+
+    try:
+        await asyncio.to_thread(save_job_upload, file.file, jobs.input_path(job_id), jobs.config.max_upload_bytes)
+    except BaseException:
+        # Includes cancellation when the client disconnects mid-upload
+        jobs.discard(job_id)
+        raise
+
+    await asyncio.to_thread(jobs.start, job_id, route.pipeline)
+    logging.info(f"Batch job {job_id} submitted: {file.filename} (model {route.name})")
+    return {
+        **await asyncio.to_thread(jobs.get, job_id),
+        "status_url": f"/api/jobs/{job_id}",
+        "result_url": f"/api/jobs/{job_id}/result",
+    }
+
+@app.get("/api/jobs")
+async def list_batch_jobs(jobs: BatchJobManager = Depends(get_batch_jobs)):
+    """All batch jobs still retained, newest first"""
+    return {"jobs": await asyncio.to_thread(jobs.list)}
+
+@app.get("/api/jobs/{job_id}")
+async def get_batch_job(job_id: str, jobs: BatchJobManager = Depends(get_batch_jobs)):
+    """Job state and progress: rows done, rows/sec and ETA"""
+    try:
+        return await asyncio.to_thread(jobs.get, job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+
+@app.get("/api/jobs/{job_id}/result")
+async def download_batch_job(job_id: str, jobs: BatchJobManager = Depends(get_batch_jobs)):
+    """The scored CSV of a finished job"""
+    try:
+        job = await asyncio.to_thread(jobs.get, job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']}, no result to download")
+
+    stem = os.path.splitext(os.path.basename(job["filename"] or "batch"))[0]
+    return FileResponse(jobs.output_path(job_id), media_type="text/csv", filename=f"{stem}_predictions.csv")
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_batch_job(job_id: str, jobs: BatchJobManager = Depends(get_batch_jobs)):
+    """Cancel a queued or running job; finished jobs are left as they are"""
+    try:
+        return await asyncio.to_thread(jobs.cancel, job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+
+@app.websocket("/ws/predict")
+async def ws_predict(websocket: WebSocket):
+    """Continuous telemetry scoring: readings in, risk updates out, over one long-lived connection"""
+    try:
+        # One model for the whole connection, so a client's risk updates stay consistent
+        route = select_model_route(websocket.headers)
+    except UnknownModel as e:
+        logging.warning(f"WebSocket connection rejected: {e.args[0]}")
+        await websocket.close(code=1008)
+        return
+    executor = get_inference_executor()
+
+    async def score(row):
+        start = time.perf_counter()
+        result = await predict_row(row, route.pipeline, route.batcher, executor, route.cache)
+        route.observe(1, start)
+        return result
+
+    await TelemetrySession(websocket, score, get_telemetry_stats()).run()
+
+def collect_component_metrics():
+    """Scrape-time gauges for the model, caches, batcher, pool and WebSocket sessions"""
+    metrics = []
+
+    for name, route in get_model_router().routes.items():
+        artifacts = route.model_cache._artifacts
+        if artifacts is None:
+            continue
+        labels = {"model": name}
+        metrics.append(("pm_model_info", "gauge", "Currently loaded model version", [(dict(labels, version=artifacts.version, sha256=artifacts.content_hash), 1)]))
+        metrics.append(("pm_model_route_weight", "gauge", "Share of unlabelled traffic routed to the model", [(labels, route.weight)]))
+        metrics.append(("pm_model_load_seconds", "gauge", "Time taken to load the current model", [(labels, artifacts.load_seconds)]))
+        metrics.append(("pm_model_loaded_timestamp_seconds", "gauge", "Unix time the current model was loaded", [(labels, artifacts.loaded_at)]))
+        metrics.append(("pm_model_warmup_seconds", "gauge", "Time taken to warm up the current model", [(labels, artifacts.warmup["seconds"])]))
+
+    # Every routed model has its own prediction cache and micro-batcher
+    routes = [({"model": name}, route) for name, route in get_model_router().routes.items()]
+    caches = [(labels, route.cache.stats()) for labels, route in routes]
+    metrics.append(("pm_prediction_cache_hits_total", "counter", "Prediction cache hits", [(labels, cache["hits"]) for labels, cache in caches]))
+    metrics.append(("pm_prediction_cache_misses_total", "counter", "Prediction cache misses", [(labels, cache["misses"]) for labels, cache in caches]))
+    metrics.append(("pm_prediction_cache_hit_ratio", "gauge", "Prediction cache hit ratio", [(labels, cache["hit_rate"]) for labels, cache in caches]))
+    metrics.append(("pm_prediction_cache_entries", "gauge", "Prediction cache entries", [(labels, cache["entries"]) for labels, cache in caches]))
+
+    batchers = [(labels, route.batcher.stats()) for labels, route in routes]
+    metrics.append(("pm_micro_batch_window_seconds", "gauge", "Configured micro-batch window", [(labels, batcher["window_ms"] / 1000.0) for labels, batcher in batchers]))
+    metrics.append(("pm_micro_batch_max_size", "gauge", "Configured maximum micro-batch size", [(labels, batcher["max_batch_size"]) for labels, batcher in batchers]))
+    metrics.append(("pm_micro_batch_max_queue_depth", "gauge", "Configured micro-batch queue capacity", [(labels, batcher["max_queue_depth"]) for labels, batcher in batchers]))
+    metrics.append(("pm_micro_batch_queue_depth", "gauge", "Rows waiting for a micro-batch", [(labels, batcher["queue_depth"]) for labels, batcher in batchers]))
+    metrics.append(("pm_micro_batch_avg_size", "gauge", "Moving average of micro-batch size", [(labels, batcher["avg_batch_size"]) for labels, batcher in batchers]))
+    metrics.append(("pm_micro_batches_total", "counter", "Micro-batches dispatched", [(labels, batcher["batches"]) for labels, batcher in batchers]))
+    metrics.append(("pm_micro_batch_rejected_total", "counter", "Rows rejected because the batch queue was full", [(labels, batcher["rejected"]) for labels, batcher in batchers]))
+
+    executor = get_inference_executor().stats()
+    metrics.append(("pm_inference_active", "gauge", "Inference calls running", [({}, executor["active"])]))
+    metrics.append(("pm_inference_pending", "gauge", "Inference calls waiting for a worker", [({}, executor["pending"])]))
+    metrics.append(("pm_inference_saturation", "gauge", "Running plus waiting calls per worker", [({}, executor["saturation"])]))
+    metrics.append(("pm_inference_timeouts_total", "counter", "Inference calls that timed out", [({}, executor["timeouts"])]))
+    metrics.append(("pm_inference_rejected_total", "counter", "Inference calls rejected by the pool", [({}, executor["rejected"])]))
+
+    for admission in (realtime_admission, bulk_admission):
+        stats = admission.stats()
+        labels = {"class": admission.config.name}
+        metrics.append(("pm_admission_in_flight", "gauge", "Requests admitted and being handled", [(labels, stats["in_flight"])]))
+        metrics.append(("pm_admission_queued", "gauge", "Requests waiting for admission", [(labels, stats["queued"])]))
+
+    shadow = get_shadow_scorer()
+    if shadow is not None:
+        stats = shadow.stats()
+        metrics.append(("pm_shadow_queue_depth", "gauge", "Request copies waiting for the shadow model", [({}, stats["queued"])]))
+        metrics.append(("pm_shadow_agreement_ratio", "gauge", "Share of rows where the shadow and served models agree", [({}, stats["agreement_rate"])]))
+
+    jobs = get_batch_jobs().stats()
+    metrics.append(("pm_batch_jobs_running", "gauge", "Batch jobs being scored", [({}, jobs["running"])]))
+    metrics.append(("pm_batch_jobs_queued", "gauge", "Batch jobs waiting for a worker", [({}, jobs["queued"])]))
+
+    websocket = get_telemetry_stats().stats()
+    metrics.append(("pm_websocket_connections", "gauge", "Open telemetry WebSocket connections", [({}, websocket["active_connections"])]))
+    metrics.append(("pm_websocket_readings_total", "counter", "Readings received over WebSocket", [({}, websocket["readings"])]))
+
+    return metrics
+
+REGISTRY.register_collector(collect_component_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text-format metrics for this worker process"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/docs")
 async def get_docs():
     """Redirect to API documentation"""
@@ -44,8 +44,8 @@ def run_model_evaluation():
         print(f"❌ Model Evaluation Failed: {e}")
         return False
 
-def run_batch_prediction(input_file=None):
-    """Run batch prediction"""
+def run_batch_prediction(input_file=None, workers=None, output_file=None, incremental=None):
+    """Run batch prediction, sharded across `workers` processes when more than one"""
     print("🔮 Starting Batch Prediction...")
     
     try:
@@ -55,11 +55,15 @@ def run_batch_prediction(input_file=None):
         if input_file is None:
             input_file = "sample_data/sample_batch.csv"
             
-        result = batch_predictor.predict_batch(input_file)
+        result = batch_predictor.predict_batch(input_file, output_file, workers=workers, incremental=incremental)
         
         print(f"✅ Batch Prediction Completed!")
         print(f"📊 Processed {result['total_predictions']} records")
         print(f"⚠️  High Risk: {result['high_risk_count']} ({result['high_risk_percentage']:.1f}%)")
+        if result['resumed_from_row']:
+            print(f"⏯️  Resumed from row {result['resumed_from_row']}")
+        if 'reused_predictions' in result:
+            print(f"♻️  Reused {result['reused_predictions']} indexed predictions, scored {result['new_predictions']}")
         return True
         
     except Exception as e:
@@ -77,14 +81,67 @@ def start_mlflow_server():
         print(f"❌ MLflow Server failed: {e}")
         return False
 
-def start_flask_app():
-    """Start Flask application"""
-    print("🌐 Starting Flask Application...")
+def start_web_app(workers=None, host=None, port=None):
+    """Start the FastAPI application with a preloaded model shared by forked workers"""
+    print("🌐 Starting FastAPI Application...")
     try:
-        os.system("python app.py")
+        from src.serving.prefork import PreforkConfig, PreforkServer
+
+        config = PreforkConfig()
+        if workers:
+            config.workers = workers
+        if host:
+            config.host = host
+        if port:
+            config.port = port
+
+        server = PreforkServer(config)
+        server.preload()
+        print(f"📦 Model preloaded; starting {config.workers} workers on {config.host}:{config.port}")
+        server.serve()
         return True
     except Exception as e:
-        print(f"❌ Flask App failed: {e}")
+        print(f"❌ FastAPI App failed: {e}")
+        return False
+
+def run_spool_watcher(spool_dir=None):
+    """Score files dropped into the spool inbox until interrupted, with the model kept loaded"""
+    print("📥 Starting Spool Watcher...")
+    try:
+        from src.serving.spool_watcher import SpoolConfig, SpoolWatcher
+
+        config = SpoolConfig()
+        if spool_dir:
+            config.spool_dir = spool_dir
+        watcher = SpoolWatcher(config)
+        print(f"👀 Watching {watcher.inbox}; results go to {watcher.output_dir}")
+        watcher.run()
+        print(f"✅ Spool Watcher stopped: {watcher.stats()}")
+        return True
+    except Exception as e:
+        print(f"❌ Spool Watcher failed: {e}")
+        return False
+
+def run_load_test(args):
+    """Load-test the prediction API and write a JSON report"""
+    print("📈 Starting Load Test...")
+    try:
+        from src.serving.load_test import LoadTest, LoadTestConfig, print_report
+
+        mix = {name: float(weight) for name, weight in (item.split("=") for item in args.mix.split(","))}
+        report = LoadTest(LoadTestConfig(
+            base_url=args.url,
+            concurrency=args.concurrency,
+            rps=args.rps,
+            duration_seconds=args.duration,
+            total_requests=args.requests,
+            requests_file=args.requests_file,
+            mix=mix,
+        )).run()
+        print_report(report)
+        return True
+    except Exception as e:
+        print(f"❌ Load Test failed: {e}")
         return False
 
 def check_artifacts():
@@ -110,10 +167,25 @@ def check_artifacts():
 
 def main():
     parser = argparse.ArgumentParser(description="MLOps Pipeline Runner")
-    parser.add_argument("--mode", choices=["train", "evaluate", "predict", "serve", "mlflow", "full"], 
+    parser.add_argument("--mode", choices=["train", "evaluate", "predict", "serve", "mlflow", "loadtest", "spool", "full"], 
                        default="full", help="Pipeline mode to run")
-    parser.add_argument("--input-file", help="Input file for batch prediction")
+    parser.add_argument("--input-file", help="Input file for batch prediction (.csv, .parquet or .feather)")
+    parser.add_argument("--output-file", help="Output file for batch prediction; its extension picks the format. "
+                                              "Rerunning with the same output resumes an interrupted run")
+    parser.add_argument("--spool-dir", help="Spool root with inbox/, output/, done/ and failed/ (spool mode)")
+    parser.add_argument("--incremental", action="store_true", default=None,
+                        help="Score only rows not already in the score index (predict mode)")
     parser.add_argument("--skip-training", action="store_true", help="Skip training if artifacts exist")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (serve and predict modes)")
+    parser.add_argument("--host", help="Bind address (serve mode)")
+    parser.add_argument("--port", type=int, help="Port (serve mode)")
+    parser.add_argument("--url", help="Server to load-test; the app runs in-process when omitted (loadtest mode)")
+    parser.add_argument("--requests-file", help="JSONL request log to replay (loadtest mode)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (loadtest mode)")
+    parser.add_argument("--rps", type=float, default=0.0, help="Target requests per second, 0 = unthrottled (loadtest mode)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (loadtest mode)")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (loadtest mode)")
+    parser.add_argument("--mix", default="predict=1", help="Traffic mix, e.g. predict=0.7,form=0.1,batch=0.2 (loadtest mode)")
     
     args = parser.parse_args()
     
@@ -141,7 +213,7 @@ def main():
     
     if args.mode == "predict":
         if check_artifacts():
-            run_batch_prediction(args.input_file)
+            run_batch_prediction(args.input_file, args.workers, args.output_file, args.incremental)
         else:
             print("⚠️  Cannot run prediction - missing artifacts")
     
@@ -151,14 +223,28 @@ def main():
     if args.mode == "serve":
         if check_artifacts():
             print("🌐 Starting web application...")
-            start_flask_app()
+            start_web_app(args.workers, args.host, args.port)
         else:
             print("⚠️  Cannot start app - missing artifacts")
     
+    if args.mode == "spool":
+        if check_artifacts():
+            if not run_spool_watcher(args.spool_dir):
+                sys.exit(1)
+        else:
+            print("⚠️  Cannot start spool watcher - missing artifacts")
+    
+    if args.mode == "loadtest":
+        if args.url or check_artifacts():
+            if not run_load_test(args):
+                sys.exit(1)
+        else:
+            print("⚠️  Cannot load-test the in-process app - missing artifacts")
+    
     if args.mode == "full":
         print("\n🎉 Full pipeline completed!")
         print("🔗 MLflow UI: http://localhost:5000")
-        print("🌐 Flask App: python app.py")
+        print("🌐 Web App: python run_pipeline.py --mode serve")
         print("📊 Evaluation plots: ./evaluation_plots/")
     
     print("="*80)
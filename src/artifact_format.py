@@ -0,0 +1,164 @@
+# src/artifact_format.py
+import json
+import lzma
+import mmap
+import os
+import pickle
+import struct
+import sys
+import threading
+import zlib
+
+from src.exception import CustomException
+from src.logger import logging
+
+# File layout:
+#   MAGIC | pickle stream | buffer 0 | buffer 1 | ... | header JSON | header offset, header length (<QQ)
+# Every out-of-band buffer starts on a page boundary so it can be mapped in place.
+MAGIC = b"PMARTIF1"
+# Not a pickle, so it gets its own extension: pickle.load on a .pkl artifact keeps working
+EXTENSION = ".mmap"
+TRAILER = struct.Struct("<QQ")
+ALIGNMENT = max(4096, mmap.PAGESIZE)
+# Buffers smaller than this stay inside the pickle stream; padding them to a page would waste more than it saves
+MIN_OUT_OF_BAND_BYTES = int(os.environ.get("ARTIFACT_MIN_MMAP_BYTES", 16384))
+
+COMPRESSORS = {
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+
+
+def is_mmap_artifact(file_path):
+    """True if file_path was written by dump() rather than plain pickle"""
+    with open(file_path, "rb") as file_obj:
+        return file_obj.read(len(MAGIC)) == MAGIC
+
+
+def dump(obj, file_path, compress=None, level=6):
+    """
+    Write obj with pickle protocol 5, storing large NumPy buffers (tree node
+    arrays, scaler vectors, ...) uncompressed and page-aligned after the pickle
+    stream. With compress ("zlib" or "lzma") every part is compressed instead;
+    smaller on disk, but it has to be decompressed into private memory on load.
+    Returns the number of bytes written.
+    """
+    if compress is not None and compress not in COMPRESSORS:
+        raise ValueError(f"Unknown compression {compress!r}, expected one of {sorted(COMPRESSORS)}")
+
+    buffers = []
+
+    def out_of_band(buffer):
+        raw = buffer.raw()
+        if raw.nbytes < MIN_OUT_OF_BAND_BYTES:
+            return True  # serialize in-band
+        buffers.append(raw)
+        return False
+
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=out_of_band)
+    compressor = COMPRESSORS[compress][0] if compress else None
+
+    with open(file_path, "wb") as file_obj:
+        file_obj.write(MAGIC)
+
+        def write_part(data, align):
+            if align:
+                padding = -file_obj.tell() % ALIGNMENT
+                file_obj.write(b"\0" * padding)
+            offset = file_obj.tell()
+            stored = compressor(data, level) if compressor else data
+            file_obj.write(stored)
+            return [offset, len(stored), len(data) if isinstance(data, bytes) else data.nbytes]
+
+        header = {
+            "format": 1,
+            "compress": compress,
+            "alignment": ALIGNMENT,
+            "pickle": write_part(payload, align=False),
+            "buffers": [write_part(buffer, align=compress is None) for buffer in buffers],
+        }
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        header_offset = file_obj.tell()
+        file_obj.write(header_bytes)
+        file_obj.write(TRAILER.pack(header_offset, len(header_bytes)))
+        return file_obj.tell()
+
+
+def load(file_path, use_mmap=True):
+    """
+    Load an object written by dump(). Uncompressed buffers are memory-mapped
+    read-only, so NumPy arrays in the result point straight at the page cache:
+    loading costs the size of the pickle stream, not the size of the arrays, and
+    every process mapping the same file shares one physical copy. The mapping
+    stays open for as long as any of those arrays is alive.
+    """
+    with open(file_path, "rb") as file_obj:
+        if use_mmap:
+            data = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Writable copy; arrays built on it are ordinary private, writeable arrays
+            data = bytearray(file_obj.read())
+
+    view = memoryview(data)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{file_path} is not a memory-mappable artifact")
+
+    header_offset, header_length = TRAILER.unpack(view[-TRAILER.size:])
+    header = json.loads(bytes(view[header_offset:header_offset + header_length]))
+    if header.get("format") != 1:
+        raise ValueError(f"Unsupported artifact format version {header.get('format')} in {file_path}")
+
+    compress = header["compress"]
+    if compress:
+        decompress = COMPRESSORS[compress][1]
+        parts = [decompress(view[offset:offset + length]) for offset, length, _ in [header["pickle"]] + header["buffers"]]
+        # bytearray so the reconstructed arrays are writeable, as they would be after a plain unpickle
+        payload, buffers = parts[0], [bytearray(part) for part in parts[1:]]
+    else:
+        offset, length, _ = header["pickle"]
+        payload = view[offset:offset + length]
+        buffers = [view[offset:offset + length] for offset, length, _ in header["buffers"]]
+
+    return pickle.loads(payload, buffers=buffers), header
+
+
+def mmap_path(file_path):
+    """artifacts/tree_engine.pkl -> artifacts/tree_engine.mmap"""
+    return os.path.splitext(file_path)[0] + EXTENSION
+
+
+def convert(file_path, compress=None):
+    """Write a memory-mappable copy of a pickle artifact next to it; returns (path, bytes written)"""
+    try:
+        if is_mmap_artifact(file_path):
+            obj, _ = load(file_path, use_mmap=False)
+        else:
+            with open(file_path, "rb") as file_obj:
+                obj = pickle.load(file_obj)
+
+        # Write next to the target and swap it in, so readers never see a partial file
+        target = mmap_path(file_path)
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        size = dump(obj, tmp_path, compress=compress)
+        os.replace(tmp_path, target)
+        logging.info(f"Converted {file_path} to the memory-mappable artifact {target} ({size:,} bytes)")
+        return target, size
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    # Convert trained artifacts: python -m src.artifact_format [--compress zlib|lzma] artifacts/tree_engine.pkl ...
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write memory-mappable .mmap copies of pickle artifacts")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--compress", choices=sorted(COMPRESSORS), default=None)
+    args = parser.parse_args()
+
+    for path in args.paths:
+        before = os.path.getsize(path)
+        target, after = convert(path, compress=args.compress)
+        print(f"✅ {path} ({before:,} bytes) -> {target} ({after:,} bytes)")
@@ -13,7 +13,8 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import save_object, evaluate_models, load_object
+from src.utils import save_object, evaluate_models, load_object, file_sha256
+from src.pipeline.tree_engine import export_tree_engine
 from src.mlops.mlflow_manager import MLflowManager
 from mlflow.models.signature import infer_signature
 from imblearn.over_sampling import SMOTE
@@ -21,6 +22,7 @@ from imblearn.over_sampling import SMOTE
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path = os.path.join("artifacts", "model.pkl")
+    tree_engine_file_path = os.path.join("artifacts", "tree_engine.mmap")
 
 class ModelTrainer:
     def __init__(self):
@@ -144,6 +146,16 @@ class ModelTrainer:
                 obj=best_model
             )
 
+            # Flattened NumPy copy of tree ensembles for low-latency serving; the server compiles one itself if this fails
+            try:
+                export_tree_engine(
+                    best_model,
+                    self.model_trainer_config.tree_engine_file_path,
+                    source_hash=file_sha256(self.model_trainer_config.trained_model_file_path)
+                )
+            except Exception as e:
+                logging.warning(f"Could not export tree engine: {e}")
+
             logging.info(f"Best Parameters: {gs.best_params_}")
             logging.info(f"Test Accuracy: {test_accuracy:.4f}")
             logging.info(f"Precision: {precision:.4f}, Recall: {recall:.4f}, F1: {f1:.4f}")
@@ -1,5 +1,10 @@
 import logging
+import logging.handlers
+import atexit
+import json
 import os
+import queue
+import random
 from datetime import datetime
 
 LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
@@ -7,11 +12,160 @@ logs_dir = os.path.join(os.getcwd(), "logs")
 os.makedirs(logs_dir, exist_ok=True)
 
 LOG_FILE_PATH = os.path.join(logs_dir, LOG_FILE)
+AUDIT_LOG_FILE_PATH = os.path.join(logs_dir, "prediction_audit.jsonl")
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
+LOG_FORMAT = "[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s"
 
+# "queue": records are handed to a background writer thread; "sync": written inline
+LOG_MODE = os.environ.get("LOG_MODE", "queue")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_MB", 50)) * 1024 * 1024
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+# Fraction of predictions written to the structured audit log
+AUDIT_SAMPLE_RATE = float(os.environ.get("AUDIT_LOG_SAMPLE_RATE", 0.1))
 
-)
\ No newline at end of file
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the writer thread and drops records
+    instead of blocking (or growing without bound) when the queue is full.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        # The stock handler formats the message here, on the caller's thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DeferredQueueHandler.dropped += 1
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """Formats dict messages as one JSON object per line"""
+
+    def format(self, record):
+        payload = record.msg if isinstance(record.msg, dict) else {"message": record.getMessage()}
+        return json.dumps(payload, default=str)
+
+
+def _rotating_handler(path, formatter):
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def _file_handlers(suffix=""):
+    log_path, audit_path = LOG_FILE_PATH, AUDIT_LOG_FILE_PATH
+    if suffix:
+        # Prefork web workers rotate their own files; rotating a shared file from several processes loses records
+        log_path = log_path.replace(".log", f"_{suffix}.log")
+        audit_path = audit_path.replace(".jsonl", f"_{suffix}.jsonl")
+    return (
+        _rotating_handler(log_path, logging.Formatter(LOG_FORMAT)),
+        _rotating_handler(audit_path, JSONLinesFormatter()),
+    )
+
+
+audit_logger = logging.getLogger("prediction_audit")
+audit_logger.propagate = False
+audit_logger.setLevel(logging.INFO)
+
+_listener = None
+# (logger, handler) pairs installed below; replaced whole when the process switches files
+_installed = []
+
+
+def _install(log_handler, audit_handler):
+    root = logging.getLogger()
+    for logger, handler in _installed:
+        logger.removeHandler(handler)
+        handler.close()
+    _installed[:] = [(root, log_handler), (audit_logger, audit_handler)]
+    root.addHandler(log_handler)
+    audit_logger.addHandler(audit_handler)
+
+
+def _start_queue_logging(suffix=""):
+    """Route the root and audit loggers through one queue drained by a background thread"""
+    global _listener
+    log_handler, audit_handler = _file_handlers(suffix)
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
+    # The listener sends each record to both handlers; filters keep the streams apart
+    log_handler.addFilter(lambda record: record.name != audit_logger.name)
+    audit_handler.addFilter(lambda record: record.name == audit_logger.name)
+    _listener = logging.handlers.QueueListener(log_queue, log_handler, audit_handler, respect_handler_level=True)
+    _listener.start()
+    _install(DeferredQueueHandler(log_queue), DeferredQueueHandler(log_queue))
+
+
+def _watched_handler(path, formatter):
+    handler = logging.handlers.WatchedFileHandler(path)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def _after_fork_in_child():
+    """
+    The writer thread does not survive fork(). Shard workers and other helpers
+    append to the parent's files inline with WatchedFileHandler, which never
+    rotates them and reopens them once the parent has.
+    """
+    global _listener
+    if _listener is not None:
+        # The child's copies of the parent's rotating handlers; the parent keeps its own
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+    _install(
+        _watched_handler(LOG_FILE_PATH, logging.Formatter(LOG_FORMAT)),
+        _watched_handler(AUDIT_LOG_FILE_PATH, JSONLinesFormatter()),
+    )
+
+
+def use_worker_log_files():
+    """Switch this process to its own _<pid> log and audit files; called by prefork web workers"""
+    if LOG_MODE != "queue":
+        return
+    previous = _listener
+    _start_queue_logging(suffix=str(os.getpid()))
+    if previous is not None:
+        previous.stop()
+        for handler in previous.handlers:
+            handler.close()
+
+
+def _stop_queue_logging():
+    if _listener is not None:
+        _listener.stop()
+
+
+if LOG_MODE == "queue":
+    logging.getLogger().setLevel(LOG_LEVEL)
+    _start_queue_logging()
+    atexit.register(_stop_queue_logging)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_after_fork_in_child)
+else:
+    logging.basicConfig(
+        filename=LOG_FILE_PATH,
+        format=LOG_FORMAT,
+        level=LOG_LEVEL,
+    )
+    # Only the audit handler; basicConfig owns the main log file
+    audit_logger.addHandler(_rotating_handler(AUDIT_LOG_FILE_PATH, JSONLinesFormatter()))
+
+
+def audit_sampled():
+    """Decide whether this prediction goes to the audit log; check it before building the record"""
+    return AUDIT_SAMPLE_RATE >= 1.0 or (AUDIT_SAMPLE_RATE > 0.0 and random.random() < AUDIT_SAMPLE_RATE)
+
+
+def audit_prediction(record: dict):
+    """Write one structured audit record; JSON encoding happens on the writer thread"""
+    audit_logger.info(record)
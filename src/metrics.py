@@ -0,0 +1,301 @@
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds, from 50us (NumPy fast path) to 10s (large batches)
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _PerThread:
+    """
+    Per-thread storage for metric values. Each thread only ever writes its own
+    shard, so updates need no lock; readers sum all shards at scrape time. The
+    lock is taken once per thread, when its shard is created.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._factory()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def shards(self):
+        with self._lock:
+            return list(self._shards)
+
+
+class _CounterChild:
+    def __init__(self):
+        self._values = _PerThread(lambda: [0.0])
+
+    def inc(self, amount=1.0):
+        self._values.shard()[0] += amount
+
+    def value(self):
+        return sum(shard[0] for shard in self._values.shards())
+
+
+class _GaugeChild(_CounterChild):
+    def dec(self, amount=1.0):
+        self._values.shard()[0] -= amount
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Per shard: [count per bucket (+Inf last)..., sum]
+        self._values = _PerThread(lambda: [0] * (len(buckets) + 1) + [0.0])
+
+    def observe(self, value):
+        shard = self._values.shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        totals = [0] * (len(self.buckets) + 2)
+        for shard in self._values.shards():
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals[:-1], totals[-1]
+
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """Return the child for a label combination; cache it at module level on hot paths"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self):
+        return [(dict(zip(self.labelnames, key)), child) for key, child in list(self._children.items())]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def samples(self):
+        return [(self.name + "_total", labels, child.value()) for labels, child in self._items()]
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1.0):
+        self.labels().dec(amount)
+
+    def samples(self):
+        return [(self.name, labels, child.value()) for labels, child in self._items()]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        samples = []
+        for labels, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((self.name + "_sum", labels, total))
+            samples.append((self.name + "_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Holds metrics and scrape-time collectors and renders the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        collector() is called at scrape time and returns an iterable of
+        (name, type, documentation, [(labels, value), ...]) tuples.
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "pm_stage_duration_seconds",
+    "Time spent in each stage of the prediction path",
+    labelnames=("stage",),
+)
+REQUESTS = REGISTRY.counter(
+    "pm_http_requests",
+    "HTTP requests by route and status code",
+    labelnames=("path", "status"),
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "pm_http_request_duration_seconds",
+    "End-to-end HTTP request latency by route",
+    labelnames=("path",),
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "pm_http_requests_in_flight",
+    "HTTP requests currently being handled",
+)
+REQUESTS_SHED = REGISTRY.counter(
+    "pm_requests_shed",
+    "Requests turned away or dropped before scoring, by stage and reason",
+    labelnames=("stage", "reason"),
+)
+ROWS_SCORED = REGISTRY.counter(
+    "pm_rows_scored",
+    "Rows passed through the model",
+)
+MODEL_REQUESTS = REGISTRY.counter(
+    "pm_model_requests",
+    "Prediction requests served, by model route",
+    labelnames=("model",),
+)
+MODEL_ROWS = REGISTRY.counter(
+    "pm_model_rows",
+    "Rows scored, by model route",
+    labelnames=("model",),
+)
+MODEL_REQUEST_SECONDS = REGISTRY.histogram(
+    "pm_model_request_duration_seconds",
+    "Time from scoring start to result per request, by model route",
+    labelnames=("model",),
+)
+BATCH_JOBS = REGISTRY.counter(
+    "pm_batch_jobs",
+    "Batch jobs by state reached (queued, succeeded, failed, cancelled)",
+    labelnames=("status",),
+)
+BATCH_JOB_ROWS = REGISTRY.counter(
+    "pm_batch_job_rows",
+    "Rows scored by batch jobs",
+)
+SHADOW_REQUESTS = REGISTRY.counter(
+    "pm_shadow_requests",
+    "Request copies handled by the shadow model, by outcome (scored, dropped, error)",
+    labelnames=("outcome",),
+)
+SHADOW_ROWS = REGISTRY.counter(
+    "pm_shadow_rows",
+    "Rows scored by both models, by whether their predictions agree",
+    labelnames=("agreement",),
+)
+SHADOW_PROBABILITY_DELTA = REGISTRY.histogram(
+    "pm_shadow_probability_delta",
+    "Absolute difference in failure probability between the shadow and served models",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0),
+)
+SHADOW_SECONDS = REGISTRY.histogram(
+    "pm_shadow_predict_duration_seconds",
+    "Time the shadow model spends in predict per scoring call",
+)
+
+# Pre-bound children for the hot path
+PARSE_SECONDS = STAGE_SECONDS.labels("parse")
+FEATURES_SECONDS = STAGE_SECONDS.labels("features")
+TRANSFORM_SECONDS = STAGE_SECONDS.labels("transform")
+PREDICT_SECONDS = STAGE_SECONDS.labels("predict")
+SERIALIZE_SECONDS = STAGE_SECONDS.labels("serialize")
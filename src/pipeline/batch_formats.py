@@ -0,0 +1,207 @@
+# src/pipeline/batch_formats.py
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# Batch file formats by extension; anything else is read and written as CSV
+FORMAT_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".ipc": "feather",
+}
+DEFAULT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+COLUMNAR_FORMATS = ("parquet", "feather")
+# Record batches read from a columnar file at a time; chunks are cut from them
+SCAN_BATCH_ROWS = 65536
+
+
+def detect_format(path):
+    """'csv', 'parquet' or 'feather', from the file extension"""
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+def read_columns(path, fmt):
+    """Column names of a batch file, read from its header or schema only"""
+    if fmt == "csv":
+        return list(pd.read_csv(path, nrows=0).columns)
+    return list(ds.dataset(path, format=_dataset_format(fmt)).schema.names)
+
+
+def _dataset_format(fmt):
+    return "parquet" if fmt == "parquet" else "ipc"
+
+
+class ColumnarReader:
+    """
+    Reads the given columns of a Parquet or Feather (Arrow IPC) file as
+    DataFrame chunks, with the get_chunk(rows) interface of pandas' chunked
+    CSV reader. Other columns are never decoded, and `categorical` columns
+    come back as pandas categoricals. The first skip_rows rows are skipped,
+    to resume an interrupted run.
+    """
+
+    def __init__(self, path, fmt, columns, categorical=("Type",), skip_rows=0):
+        self.categorical = [column for column in categorical if column in columns]
+        file_format = _dataset_format(fmt)
+        if fmt == "parquet":
+            # Decode straight into dictionary arrays instead of one string per row
+            file_format = ds.ParquetFileFormat(read_options={"dictionary_columns": self.categorical})
+        dataset = ds.dataset(path, format=file_format)
+        self.total_rows = dataset.count_rows()
+        self._batches = dataset.to_batches(columns=columns, batch_size=SCAN_BATCH_ROWS)
+        self._pending = []
+        self._pending_rows = 0
+        self._skip_rows = skip_rows
+
+    def get_chunk(self, rows):
+        while self._pending_rows < rows:
+            batch = next(self._batches, None)
+            if batch is None:
+                break
+            if self._skip_rows:
+                skipped = min(self._skip_rows, batch.num_rows)
+                batch = batch.slice(skipped)
+                self._skip_rows -= skipped
+            if batch.num_rows:
+                self._pending.append(batch)
+                self._pending_rows += batch.num_rows
+        if not self._pending_rows:
+            raise StopIteration
+
+        table = pa.Table.from_batches(self._pending)
+        chunk, rest = table.slice(0, rows), table.slice(rows)
+        self._pending = rest.to_batches()
+        self._pending_rows = rest.num_rows
+
+        for column in self.categorical:
+            # One dictionary for the whole chunk, whatever the file's row groups used
+            values = chunk.column(column)
+            if pa.types.is_dictionary(values.type):
+                values = pc.cast(values, values.type.value_type)
+            index = chunk.schema.get_field_index(column)
+            chunk = chunk.set_column(index, column, pc.dictionary_encode(values.combine_chunks()))
+        return chunk.to_pandas()
+
+
+class CsvChunkWriter:
+    """Appends DataFrame chunks to an open text file, with a header before the first unless header=False"""
+
+    def __init__(self, sink, header=True):
+        self._sink = sink
+        self._header = header
+
+    def write(self, df):
+        df.to_csv(self._sink, index=False, header=self._header)
+        self._header = False
+
+    def checkpoint(self):
+        """Flush everything written so far to disk; returns the size to truncate back to on resume"""
+        self._sink.flush()
+        os.fsync(self._sink.fileno())
+        return os.fstat(self._sink.fileno()).st_size
+
+    def close(self):
+        pass
+
+
+class ArrowChunkWriter:
+    """
+    Appends DataFrame chunks to a Parquet file or Feather (Arrow IPC file),
+    compressed with `compression` ("none" for uncompressed). The first chunk
+    fixes the schema and later chunks are cast to it. Categorical columns are
+    written as plain strings, since an IPC file cannot change a column's
+    dictionary between batches; Parquet dictionary-encodes them again anyway.
+    """
+
+    def __init__(self, path, fmt, compression="zstd"):
+        self.path = path
+        self.fmt = fmt
+        self.compression = None if compression in ("", "none") else compression
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        self.write_table(pa.Table.from_pandas(df, preserve_index=False))
+
+    def write_table(self, table):
+        if self._writer is None:
+            self._schema = pa.schema([
+                pa.field(field.name, field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                for field in table.schema
+            ])
+            if self.fmt == "parquet":
+                self._writer = pq.ParquetWriter(self.path, self._schema, compression=self.compression or "none")
+            else:
+                options = ipc.IpcWriteOptions(compression=self.compression)
+                self._writer = ipc.new_file(self.path, self._schema, options=options)
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class SegmentedArrowWriter:
+    """
+    An ArrowChunkWriter that starts a new segment file at every checkpoint,
+    so the segments written before a crash are complete files and can be
+    kept. finish() joins the segments into `path` in order.
+    """
+
+    def __init__(self, path, fmt, compression="zstd", segments=0):
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        # Completed segments, from a checkpoint when resuming
+        self.segments = segments
+        self._writer = None
+
+    def segment_path(self, index):
+        return f"{self.path}.seg{index}"
+
+    def write(self, df):
+        if self._writer is None:
+            self._writer = ArrowChunkWriter(self.segment_path(self.segments), self.fmt, self.compression)
+        self._writer.write(df)
+
+    def checkpoint(self):
+        """Complete the current segment; returns the number of completed segments"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self.segments += 1
+        return self.segments
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def finish(self):
+        self.checkpoint()
+        writer = ArrowChunkWriter(self.path, self.fmt, self.compression)
+        try:
+            for index in range(self.segments):
+                segment_path = self.segment_path(index)
+                if self.fmt == "parquet":
+                    parquet_file = pq.ParquetFile(segment_path)
+                    for group in range(parquet_file.num_row_groups):
+                        writer.write_table(parquet_file.read_row_group(group))
+                else:
+                    with pa.memory_map(segment_path) as source:
+                        reader = ipc.open_file(source)
+                        for batch in range(reader.num_record_batches):
+                            writer.write_table(pa.Table.from_batches([reader.get_batch(batch)]))
+        finally:
+            writer.close()
+        for index in range(self.segments):
+            os.remove(self.segment_path(index))
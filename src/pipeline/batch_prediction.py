@@ -1,69 +1,256 @@
 # src/pipeline/batch_prediction.py
+import contextlib
+import glob
+import io
+import json
+import mmap
+import multiprocessing
 import os
+import shutil
 import sys
+import time
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, replace
 from src.exception import CustomException
 from src.logger import logging
-from src.pipeline.predict_pipeline import PredictPipeline
+from src.pipeline.batch_formats import (
+    COLUMNAR_FORMATS, DEFAULT_EXTENSIONS, ArrowChunkWriter, ColumnarReader, CsvChunkWriter, SegmentedArrowWriter,
+    detect_format, read_columns,
+)
+from src.pipeline.predict_pipeline import ModelCache, PredictPipeline
+from src.pipeline.score_index import ScoreIndex, row_hashes, row_keys
 from datetime import datetime
 
+
+@dataclass
+class BatchPredictionConfig:
+    # Size of the first chunk; later chunks are sized from the memory it actually used
+    chunk_rows: int = int(os.environ.get("BATCH_PREDICTION_CHUNK_ROWS", 20000))
+    # Working memory allowed for one chunk (parsed frame, features, predictions, CSV formatting), per process
+    memory_budget_mb: float = float(os.environ.get("BATCH_PREDICTION_MEMORY_MB", 256))
+    min_chunk_rows: int = 1000
+    max_chunk_rows: int = 1_000_000
+    # Processes scoring shards of the input in parallel; 1 scores in this process
+    workers: int = int(os.environ.get("BATCH_PREDICTION_WORKERS", 1))
+    # Shards per worker; more, smaller shards even out the load when some finish early
+    shards_per_worker: int = int(os.environ.get("BATCH_PREDICTION_SHARDS_PER_WORKER", 4))
+    # "spawn" is safe from threaded callers such as the API's job pool; "fork" starts faster
+    start_method: str = os.environ.get("BATCH_PREDICTION_START_METHOD", "spawn")
+    # Format of the default output file: csv, parquet or feather. An explicit output path's extension wins.
+    output_format: str = os.environ.get("BATCH_PREDICTION_OUTPUT_FORMAT", "csv")
+    # Parquet/Feather output codec: zstd, lz4, snappy (Parquet only) or none
+    compression: str = os.environ.get("BATCH_PREDICTION_COMPRESSION", "zstd")
+    # Columns carried from a Parquet/Feather input to the output besides the features; nothing else is read
+    key_columns: str = os.environ.get("BATCH_PREDICTION_KEY_COLUMNS", "UDI,Product ID")
+    # Seconds between checkpoints of a running batch; 0 disables checkpointing and resuming
+    checkpoint_seconds: float = float(os.environ.get("BATCH_PREDICTION_CHECKPOINT_SECONDS", 30))
+    # Incremental mode: score only rows whose key, features or model version are not in the index
+    incremental: bool = os.environ.get("BATCH_PREDICTION_INCREMENTAL", "0") == "1"
+    index_path: str = os.environ.get("BATCH_PREDICTION_INDEX_PATH", os.path.join("predictions", "score_index.parquet"))
+
+
+# Bytes per row on top of the parsed frame: scaled features, probabilities and prediction columns
+SCORING_BYTES_PER_ROW = 256
+OUTPUT_COLUMNS = ['Prediction', 'Failure_Risk', 'Confidence', 'Prediction_Timestamp']
+
+
+class BatchCheckpoint:
+    """
+    Progress of one predict_batch run, saved next to its output so a killed
+    or failed run can pick up where it stopped. A saved checkpoint is only
+    resumed by a run with the same identity (input file name, size and mtime,
+    columns, output format, model version and mode); anything else starts
+    afresh.
+    """
+
+    def __init__(self, path, identity, interval):
+        self.path = path
+        # Normalized through JSON so it compares equal to the saved copy
+        self.identity = json.loads(json.dumps(identity))
+        self.interval = interval
+        self.saved = False
+        self._last_save = time.monotonic()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file_obj:
+                state = json.load(file_obj)
+        except (OSError, ValueError):
+            return None
+        if state.get("identity") != self.identity:
+            logging.info(f"Checkpoint {self.path} is for a different input, model or mode; starting afresh")
+            return None
+        return state
+
+    def due(self):
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, state):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file_obj:
+            json.dump(dict(state, identity=self.identity), file_obj)
+        os.replace(tmp_path, self.path)
+        self.saved = True
+        self._last_save = time.monotonic()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class BatchPrediction:
-    def __init__(self):
-        self.predict_pipeline = PredictPipeline()
+    required_columns = [
+        "Type", "Air temperature [K]", "Process temperature [K]",
+        "Rotational speed [rpm]", "Torque [Nm]", "Tool wear [min]"
+    ]
+
+    def __init__(self, predict_pipeline: PredictPipeline = None, config: BatchPredictionConfig = None):
+        self.predict_pipeline = predict_pipeline or PredictPipeline()
+        self.config = config or BatchPredictionConfig()
         
-    def predict_batch(self, input_file_path, output_file_path=None):
+    def predict_batch(self, input_file_path, output_file_path=None, progress=None, workers=None,
+                      checkpoint=None, incremental=None):
         """
-        Perform batch predictions on a CSV file
+        Perform batch predictions on a CSV, Parquet or Feather file, streaming
+        it in chunks. Formats are detected from the file extensions.
+
+        Each chunk is read, scored and appended to the output before the next
+        one is read, and chunk sizes follow config.memory_budget_mb, so peak
+        memory does not grow with the input. With workers > 1 the file is split
+        into line-aligned byte ranges scored by a process pool, and the shard
+        outputs are concatenated in input order (CSV to CSV only). Parquet and
+        Feather inputs are read column-projected: only the features and
+        config.key_columns are decoded, with Type as a categorical. The output
+        is written to a temporary file and renamed into place once complete.
+
+        With checkpointing (config.checkpoint_seconds > 0), progress is saved
+        to <output>.ckpt every few seconds (after every shard when sharded),
+        and the temporary output is kept if the run fails, so running again
+        with the same output path resumes from the last checkpoint. A CSV
+        resumes by seeking to the byte offset saved with it. In
+        incremental mode, rows whose key, features and model version are
+        already in the score index (config.index_path) reuse its result and
+        only new or changed rows are scored.
+
+        progress(rows_done, total_rows), if given, is called after every chunk
+        (or shard); total_rows is estimated from the bytes read until the end.
         """
         try:
-            logging.info(f"Starting batch prediction for: {input_file_path}")
-            
-            # Read input data
-            df = pd.read_csv(input_file_path)
-            logging.info(f"Loaded {len(df)} records for batch prediction")
+            workers = self.config.workers if workers is None else workers
+            checkpoint = self.config.checkpoint_seconds > 0 if checkpoint is None else checkpoint
+            incremental = self.config.incremental if incremental is None else incremental
+            logging.info(f"Starting batch prediction for: {input_file_path} ({workers} worker(s))")
             
-            # Validate required columns
-            required_columns = [
-                "Type", "Air temperature [K]", "Process temperature [K]", 
-                "Rotational speed [rpm]", "Torque [Nm]", "Tool wear [min]"
-            ]
-            
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            # Validate required columns from the header alone
+            input_format = detect_format(input_file_path)
+            columns = read_columns(input_file_path, input_format)
+            missing_columns = [col for col in self.required_columns if col not in columns]
             if missing_columns:
                 raise CustomException(f"Missing required columns: {missing_columns}", sys)
             
-            # Make predictions
-            predictions, confidence_scores = self.predict_pipeline.predict(df[required_columns])
-            
-            # Add predictions to dataframe
-            df['Prediction'] = predictions
-            df['Failure_Risk'] = ['High' if pred == 1 else 'Low' for pred in predictions]
-            if confidence_scores is not None:
-                df['Confidence'] = confidence_scores
-            df['Prediction_Timestamp'] = datetime.now().isoformat()
-            
-            # Save results
+            keys = [column.strip() for column in self.config.key_columns.split(",")]
+            if input_format in COLUMNAR_FORMATS:
+                columns = [column for column in columns if column in self.required_columns or column in keys]
+            keys = [column for column in keys if column in columns]
+            if incremental and not keys:
+                raise CustomException(f"Incremental scoring needs a key column ({self.config.key_columns})", sys)
+
             if output_file_path is None:
+                # A timestamped name is never asked for again, so there would be nothing to resume
+                checkpoint = False
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file_path = f"predictions/batch_predictions_{timestamp}.csv"
-            
-            os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
-            df.to_csv(output_file_path, index=False)
+                extension = DEFAULT_EXTENSIONS[self.config.output_format]
+                output_file_path = f"predictions/batch_predictions_{timestamp}{extension}"
+            output_format = detect_format(output_file_path)
+            if workers > 1 and (input_format, output_format) != ("csv", "csv"):
+                logging.info("Sharded scoring needs CSV input and output; scoring in this process")
+                workers = 1
+            if workers > 1 and has_quoted_fields(input_file_path):
+                logging.info("Quoted fields may span lines, so the CSV cannot be split by bytes; scoring in this process")
+                workers = 1
+            if workers > 1 and incremental:
+                logging.info("Incremental scoring runs in this process")
+                workers = 1
+            os.makedirs(os.path.dirname(output_file_path) or ".", exist_ok=True)
+            tmp_path = f"{output_file_path}.tmp"
+
+            run = None
+            state = None
+            if checkpoint:
+                input_stat = os.stat(input_file_path)
+                run = BatchCheckpoint(f"{output_file_path}.ckpt", {
+                    # By name, so a file moved to another directory (a requeued spool file) still resumes
+                    "input": os.path.basename(input_file_path),
+                    "size": input_stat.st_size,
+                    "mtime_ns": input_stat.st_mtime_ns,
+                    "columns": columns,
+                    "output_format": output_format,
+                    "model_version": self.predict_pipeline.model_cache.get().version,
+                    "sharded": workers > 1,
+                    "incremental": bool(incremental),
+                }, self.config.checkpoint_seconds)
+                state = run.load()
+            resuming = state is not None
+            if not resuming:
+                _remove_run_files(tmp_path)
+                state = {"prediction_timestamp": datetime.now().isoformat()}
+            else:
+                logging.info(f"Resuming batch prediction of {input_file_path} from {run.path}")
+
+            index = ScoreIndex(self.config.index_path) if incremental else None
+            try:
+                if workers > 1:
+                    totals = self._predict_sharded(input_file_path, tmp_path, columns, workers, progress, run, state)
+                else:
+                    totals = self._predict_sequential(
+                        input_file_path, input_format, tmp_path, output_format, columns, progress, run, state,
+                        index, keys,
+                    )
+                if index is not None:
+                    index.merge(f"{tmp_path}.journal")
+                if progress is not None:
+                    progress(totals["rows"], totals["rows"])
+            except BaseException:
+                if run is not None and (run.saved or resuming):
+                    logging.warning(
+                        f"Batch prediction of {input_file_path} stopped; "
+                        f"run it again with output {output_file_path} to resume from the last checkpoint"
+                    )
+                else:
+                    # Never leave a partial output behind (failure, or a cancelled job)
+                    _remove_run_files(tmp_path)
+                    if run is not None:
+                        run.remove()
+                raise
+
+            os.replace(tmp_path, output_file_path)
+            _remove_run_files(tmp_path)
+            if run is not None:
+                run.remove()
             
             logging.info(f"Batch predictions saved to: {output_file_path}")
             
-            # Summary statistics
-            total_predictions = len(predictions)
-            high_risk_count = sum(predictions)
+            total_predictions = totals["rows"]
+            high_risk_count = totals["high_risk"]
             low_risk_count = total_predictions - high_risk_count
             
             summary = {
                 "total_predictions": total_predictions,
                 "high_risk_count": high_risk_count,
                 "low_risk_count": low_risk_count,
-                "high_risk_percentage": (high_risk_count / total_predictions) * 100,
+                "high_risk_percentage": (high_risk_count / total_predictions) * 100 if total_predictions else 0.0,
+                "chunks": totals["chunks"],
+                "workers": workers,
+                "input_format": input_format,
+                "output_format": output_format,
+                "resumed_from_row": totals["resumed_from_row"],
                 "output_file": output_file_path
             }
+            if incremental:
+                summary["reused_predictions"] = totals["reused"]
+                summary["new_predictions"] = total_predictions - totals["reused"]
             
             logging.info(f"Batch prediction summary: {summary}")
             return summary
@@ -71,6 +258,363 @@ class BatchPrediction:
         except Exception as e:
             raise CustomException(e, sys)
 
+    def _predict_sequential(self, input_file_path, input_format, tmp_path, output_format, columns, progress,
+                            run, state, index, keys):
+        # Counters carried over from the checkpoint when resuming
+        totals = {"rows": 0, "high_risk": 0, "chunks": 0, "reused": 0, "has_confidence": True}
+        totals.update({name: state[name] for name in totals if name in state})
+        totals["resumed_from_row"] = resumed = totals["rows"]
+
+        with contextlib.ExitStack() as stack:
+            if input_format in COLUMNAR_FORMATS:
+                reader = ColumnarReader(input_file_path, input_format, columns, skip_rows=resumed)
+                estimate = lambda rows_done: reader.total_rows
+            elif run is not None and not has_quoted_fields(input_file_path):
+                # Exact chunk boundaries, so a checkpoint can record where to resume reading
+                input_size = os.path.getsize(input_file_path)
+                source = stack.enter_context(open(input_file_path, "rb"))
+                offset = state.get("input_offset")
+                if offset is None:
+                    source.readline()
+                    offset = source.tell()
+                reader = CsvRangeReader(source, columns, offset, input_size)
+                estimate = lambda rows_done: int(rows_done * input_size / max(reader.offset, 1))
+            else:
+                input_size = os.path.getsize(input_file_path)
+                source = stack.enter_context(open(input_file_path, "rb"))
+                # Quoted fields can hold newlines, so pandas parses (and skips) the rows already scored
+                reader = pd.read_csv(source, iterator=True, skiprows=range(1, resumed + 1) if resumed else None)
+                estimate = lambda rows_done: int(rows_done * input_size / max(source.tell(), 1))
+
+            if output_format in COLUMNAR_FORMATS:
+                if run is not None:
+                    writer = SegmentedArrowWriter(tmp_path, output_format, self.config.compression, state.get("output", 0))
+                else:
+                    writer = ArrowChunkWriter(tmp_path, output_format, self.config.compression)
+            else:
+                sink = stack.enter_context(_open_for_append(tmp_path, state.get("output")))
+                writer = CsvChunkWriter(sink, header=not resumed)
+            stack.callback(writer.close)
+
+            journal = None
+            if index is not None:
+                journal_sink = stack.enter_context(_open_for_append(f"{tmp_path}.journal", state.get("journal")))
+                journal = CsvChunkWriter(journal_sink, header=False)
+
+            def on_chunk():
+                # Checkpoint before reporting, so a run stopped from progress() keeps this chunk
+                if run is not None and run.due():
+                    saved = dict(totals, prediction_timestamp=state["prediction_timestamp"], output=writer.checkpoint())
+                    if journal is not None:
+                        saved["journal"] = journal.checkpoint()
+                    if isinstance(reader, CsvRangeReader):
+                        saved["input_offset"] = reader.offset
+                    run.save(saved)
+                if progress is not None:
+                    progress(totals["rows"], max(estimate(totals["rows"]), totals["rows"]))
+
+            self._score_chunks(reader, writer, state["prediction_timestamp"], totals, on_chunk, index, journal, keys)
+            if totals["rows"] == 0:
+                # Header-only input: still produce a header-only output
+                writer.write(pd.DataFrame(columns=columns + OUTPUT_COLUMNS))
+            if isinstance(writer, SegmentedArrowWriter):
+                writer.finish()
+        return totals
+
+    def _predict_sharded(self, input_file_path, tmp_path, columns, workers, progress, run, state):
+        if "shards" not in state:
+            state["shards"] = shard_ranges(input_file_path, workers * max(1, self.config.shards_per_worker))
+            state["done"] = {}
+        shards = [tuple(shard) for shard in state["shards"]]
+        done = state["done"]
+        part_paths = [f"{tmp_path}.part{index}" for index in range(len(shards))]
+        total_bytes = sum(end - start for start, end in shards)
+        resumed = sum(result["rows"] for result in done.values())
+        if resumed:
+            logging.info(f"{len(done)} of {len(shards)} shards already scored")
+
+        def totals():
+            results = list(done.values())
+            return {
+                "rows": sum(result["rows"] for result in results),
+                "high_risk": sum(result["high_risk"] for result in results),
+                "chunks": sum(result["chunks"] for result in results),
+                "bytes": sum(result["bytes"] for result in results),
+                "has_confidence": all(result["has_confidence"] for result in results),
+                "resumed_from_row": resumed,
+            }
+
+        pending = [index for index in range(len(shards)) if str(index) not in done]
+        if pending:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(pending)),
+                mp_context=multiprocessing.get_context(self.config.start_method),
+                initializer=_init_shard_worker,
+                initargs=(self.predict_pipeline.model_cache.config, self.config),
+            ) as pool:
+                futures = {
+                    pool.submit(
+                        _score_shard, input_file_path, *shards[index], columns, part_paths[index],
+                        state["prediction_timestamp"],
+                    ): index
+                    for index in pending
+                }
+                try:
+                    for future in as_completed(futures):
+                        done[str(futures[future])] = future.result()
+                        if run is not None:
+                            run.save(state)
+                        if progress is not None:
+                            current = totals()
+                            rows = current["rows"]
+                            progress(rows, max(rows, int(rows * total_bytes / max(current["bytes"], 1))))
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+        # Ordered merge: one header, then each shard's rows in input order
+        result = totals()
+        with open(tmp_path, "w", newline="") as sink:
+            output_columns = [column for column in OUTPUT_COLUMNS if result["has_confidence"] or column != 'Confidence']
+            pd.DataFrame(columns=columns + output_columns).to_csv(sink, index=False)
+        with open(tmp_path, "ab") as sink:
+            for part_path in part_paths:
+                with open(part_path, "rb") as part:
+                    shutil.copyfileobj(part, sink, 1 << 20)
+        result["reused"] = 0
+        return result
+
+    def _score_chunks(self, reader, writer, prediction_timestamp, totals, on_chunk=None, index=None, journal=None,
+                      keys=None):
+        """
+        Score every chunk of a chunked reader (pandas' CSV reader or a
+        ColumnarReader) and append it to a chunk writer, adding to the
+        counters in `totals`. With a score index, indexed rows reuse their
+        result and newly scored ones are appended to `journal`.
+        """
+        chunk_rows = self.config.chunk_rows
+        while True:
+            try:
+                df = reader.get_chunk(chunk_rows)
+            except StopIteration:
+                break
+            
+            # Make predictions, with one confidence per row
+            features = df[self.required_columns]
+            if index is None:
+                predictions, confidence_scores = self.predict_pipeline.predict_with_confidence(features)
+                timestamps = prediction_timestamp
+            else:
+                predictions, confidence_scores, timestamps = self._score_incremental(
+                    df, features, index, journal, keys, prediction_timestamp, totals
+                )
+            chunk_rows = self._next_chunk_rows(df)
+            
+            # Add predictions to the chunk and append it to the output
+            df['Prediction'] = predictions
+            df['Failure_Risk'] = np.where(predictions == 1, 'High', 'Low')
+            if confidence_scores is not None:
+                df['Confidence'] = confidence_scores
+            else:
+                totals["has_confidence"] = False
+            df['Prediction_Timestamp'] = timestamps
+            writer.write(df)
+
+            # Summary statistics, built as we go
+            totals["chunks"] += 1
+            totals["rows"] += len(df)
+            totals["high_risk"] += int((predictions == 1).sum())
+            if on_chunk is not None:
+                on_chunk()
+        return totals
+
+    def _score_incremental(self, df, features, index, journal, keys, prediction_timestamp, totals):
+        """Predictions, confidences and timestamps for a chunk, scoring only rows the index cannot answer"""
+        model_version = self.predict_pipeline.model_cache.get().version
+        row_key = row_keys(df, keys)
+        row_hash = row_hashes(features, self.required_columns)
+        hit, indexed_predictions, indexed_confidences, indexed_timestamps = index.lookup(
+            row_key, row_hash, model_version
+        )
+        miss = ~hit
+
+        predictions = np.zeros(len(df), dtype=np.int64)
+        confidences = np.full(len(df), np.nan)
+        timestamps = np.full(len(df), prediction_timestamp, dtype=object)
+        predictions[hit] = indexed_predictions
+        confidences[hit] = indexed_confidences
+        timestamps[hit] = indexed_timestamps
+
+        if miss.any():
+            new_predictions, new_confidences = self.predict_pipeline.predict_with_confidence(features[miss])
+            predictions[miss] = new_predictions
+            if new_confidences is not None:
+                confidences[miss] = new_confidences
+            journal.write(pd.DataFrame({
+                "key": row_key[miss],
+                "row_hash": row_hash[miss],
+                "model_version": model_version,
+                "Prediction": predictions[miss],
+                "Confidence": confidences[miss],
+                "Prediction_Timestamp": prediction_timestamp,
+            }))
+        totals["reused"] += int(hit.sum())
+        return predictions, confidences, timestamps
+
+    def _next_chunk_rows(self, df):
+        """Rows per chunk that keep the working set within the memory budget, measured on the last chunk"""
+        if len(df) == 0:
+            return self.config.chunk_rows
+        # The parsed frame plus a second copy's worth for CSV formatting, and the scoring arrays
+        bytes_per_row = 2 * df.memory_usage(index=False, deep=True).sum() / len(df) + SCORING_BYTES_PER_ROW
+        rows = int(self.config.memory_budget_mb * 1024 * 1024 / bytes_per_row)
+        return max(self.config.min_chunk_rows, min(self.config.max_chunk_rows, rows))
+
+
+def _open_for_append(path, size=None):
+    """Open a text file for appending, first truncating it to `size` bytes (a checkpoint) or to empty"""
+    if size is None or not os.path.exists(path):
+        return open(path, "w", newline="")
+    os.truncate(path, size)
+    return open(path, "a", newline="")
+
+
+def _remove_run_files(tmp_path):
+    """Remove a run's temporary output and its part, segment and journal files"""
+    for path in [tmp_path] + glob.glob(f"{glob.escape(tmp_path)}.*"):
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+def has_quoted_fields(file_path):
+    """
+    True if a CSV's data rows contain a quote character, so a field could
+    hold a newline and line boundaries found by byte offset (shard_ranges,
+    CsvRangeReader) may fall inside a row. Sensor exports have none.
+    """
+    with open(file_path, "rb") as file_obj:
+        file_obj.readline()
+        data_start = file_obj.tell()
+        if data_start >= os.fstat(file_obj.fileno()).st_size:
+            return False
+        with mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return data.find(b'"', data_start) >= 0
+
+
+def shard_ranges(file_path, n_shards):
+    """
+    Split a CSV's data rows (after the header) into up to n_shards byte ranges
+    that start and end on line boundaries. Assumes no quoted field contains a
+    newline, which holds for the sensor exports this pipeline scores.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file_obj:
+        file_obj.readline()
+        data_start = file_obj.tell()
+        bounds = [data_start]
+        for index in range(1, n_shards):
+            offset = data_start + (size - data_start) * index // n_shards
+            if offset <= bounds[-1]:
+                continue
+            # Move to the start of the next line
+            file_obj.seek(offset - 1)
+            file_obj.readline()
+            bounds.append(min(file_obj.tell(), size))
+        bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of the next `length` bytes of an open binary file"""
+
+    def __init__(self, file_obj, length):
+        self._file_obj = file_obj
+        self._remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file_obj.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+class CsvRangeReader:
+    """
+    Chunked reader over a CSV's data rows from byte `offset` on, with the
+    get_chunk(rows) interface of pandas' chunked reader. Chunks end on line
+    boundaries and `offset` is always the input position just after the last
+    chunk returned, so a checkpoint can resume reading by seeking there
+    instead of re-parsing everything before it. Like shard_ranges, assumes
+    no quoted field contains a newline; only used when has_quoted_fields is False.
+    """
+
+    def __init__(self, file_obj, columns, offset, size):
+        self._file_obj = file_obj
+        self.columns = columns
+        self.offset = offset
+        self.size = size
+        self._bytes_per_row = None
+
+    def get_chunk(self, rows):
+        while self.offset < self.size:
+            if self._bytes_per_row is None:
+                self._file_obj.seek(self.offset)
+                sample = self._file_obj.read(1 << 16)
+                self._bytes_per_row = len(sample) / max(sample.count(b"\n"), 1)
+
+            end = self.offset + max(1, int(rows * self._bytes_per_row))
+            if end >= self.size:
+                end = self.size
+            else:
+                # Extend to the end of the line
+                self._file_obj.seek(end - 1)
+                self._file_obj.readline()
+                end = self._file_obj.tell()
+
+            self._file_obj.seek(self.offset)
+            block = io.BufferedReader(_ByteRange(self._file_obj, end - self.offset), 1 << 20)
+            try:
+                df = pd.read_csv(block, header=None, names=self.columns)
+            except pd.errors.EmptyDataError:
+                # Only blank lines in this block
+                df = pd.DataFrame(columns=self.columns)
+            if len(df):
+                self._bytes_per_row = (end - self.offset) / len(df)
+            self.offset = end
+            if len(df):
+                return df
+        raise StopIteration
+
+
+# Per-process scorer, set up once by the pool initializer
+_shard_scorer = None
+
+
+def _init_shard_worker(pipeline_config, batch_config):
+    global _shard_scorer
+    # Load the model once per worker and reuse it for every shard; no hot-reload thread
+    model_cache = ModelCache(replace(pipeline_config, reload_interval=0))
+    model_cache.get()
+    _shard_scorer = BatchPrediction(PredictPipeline(model_cache), batch_config)
+
+
+def _score_shard(input_file_path, start, end, columns, part_path, prediction_timestamp):
+    """Score bytes [start, end) of the input into part_path (no header). Runs in a pool worker."""
+    with open(input_file_path, "rb") as source, open(part_path, "w", newline="") as sink:
+        source.seek(start)
+        shard = io.BufferedReader(_ByteRange(source, end - start), 1 << 20)
+        reader = pd.read_csv(shard, header=None, names=columns, iterator=True)
+        totals = {"rows": 0, "high_risk": 0, "chunks": 0, "has_confidence": True}
+        _shard_scorer._score_chunks(reader, CsvChunkWriter(sink, header=False), prediction_timestamp, totals)
+    return dict(totals, bytes=end - start)
+
 if __name__ == "__main__":
     # Example usage
     batch_predictor = BatchPrediction()
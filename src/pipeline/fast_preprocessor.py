@@ -0,0 +1,179 @@
+# src/pipeline/fast_preprocessor.py
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from src.exception import CustomException
+from src.logger import logging
+
+NUMERICAL_COLUMNS = [
+    "Air temperature [K]",
+    "Process temperature [K]",
+    "Rotational speed [rpm]",
+    "Torque [Nm]",
+    "Tool wear [min]",
+]
+CATEGORICAL_COLUMN = "Type"
+
+
+class FastPreprocessor:
+    """
+    Flat NumPy version of the fitted ColumnTransformer built by
+    DataTransformation.get_data_transformer_object.
+
+    The numeric branch becomes a mean and a scale vector; the categorical
+    branch (OneHotEncoder -> StandardScaler(with_mean=False)) becomes a lookup
+    table with one pre-scaled output row per category. Transforming a batch is
+    then a subtraction, a division and a row gather, with no DataFrame or
+    ColumnTransformer dispatch. The arithmetic matches StandardScaler's, so the
+    output is bit-for-bit identical to preprocessor.transform.
+    """
+
+    def __init__(self, n_features, num_slice, num_mean, num_scale, cat_slice, categories, cat_table):
+        self.n_features = n_features
+        self.num_slice = num_slice
+        self.num_mean = num_mean
+        self.num_scale = num_scale
+        self.cat_slice = cat_slice
+        self.categories = categories
+        self.cat_table = cat_table
+
+    @classmethod
+    def compile(cls, preprocessor):
+        """Build a FastPreprocessor from a fitted ColumnTransformer. Raises ValueError if the layout is not supported."""
+        if not isinstance(preprocessor, ColumnTransformer) or not hasattr(preprocessor, "transformers_"):
+            raise ValueError("Expected a fitted ColumnTransformer")
+
+        transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_}
+        if set(transformers) - {"num_pipeline", "cat_pipeline", "remainder"}:
+            raise ValueError(f"Unsupported transformers: {sorted(transformers)}")
+        if "remainder" in transformers and transformers["remainder"][0] != "drop":
+            raise ValueError("Unsupported remainder columns")
+
+        num_pipeline, num_columns = transformers["num_pipeline"]
+        cat_pipeline, cat_columns = transformers["cat_pipeline"]
+        if list(num_columns) != NUMERICAL_COLUMNS or list(cat_columns) != [CATEGORICAL_COLUMN]:
+            raise ValueError("Unexpected column layout")
+
+        # Numeric branch: a single StandardScaler
+        if not isinstance(num_pipeline, Pipeline) or len(num_pipeline.steps) != 1:
+            raise ValueError("Unsupported numerical pipeline")
+        num_scaler = num_pipeline.steps[0][1]
+        if not isinstance(num_scaler, StandardScaler):
+            raise ValueError("Unsupported numerical scaler")
+        n_num = len(NUMERICAL_COLUMNS)
+        num_mean = num_scaler.mean_ if num_scaler.with_mean else np.zeros(n_num)
+        num_scale = num_scaler.scale_ if num_scaler.scale_ is not None else np.ones(n_num)
+
+        # Categorical branch: OneHotEncoder followed by an optional scaler
+        if not isinstance(cat_pipeline, Pipeline) or not isinstance(cat_pipeline.steps[0][1], OneHotEncoder):
+            raise ValueError("Unsupported categorical pipeline")
+        encoder = cat_pipeline.steps[0][1]
+        if encoder.drop is not None or encoder.drop_idx_ is not None or getattr(encoder, "_infrequent_enabled", False):
+            raise ValueError("Unsupported OneHotEncoder options")
+        # Unknown types must raise, as they do in _category_codes; "ignore" would encode them as all zeros
+        if encoder.handle_unknown != "error":
+            raise ValueError(f"Unsupported OneHotEncoder handle_unknown={encoder.handle_unknown!r}")
+        categories = np.asarray(encoder.categories_[0], dtype=object)
+        # _category_codes looks types up with searchsorted, which needs the categories in sorted order
+        if not all(isinstance(category, str) for category in categories) or list(categories) != sorted(categories):
+            raise ValueError("OneHotEncoder categories must be sorted strings")
+        cat_table = np.eye(len(categories))
+        for _, step in cat_pipeline.steps[1:]:
+            if not isinstance(step, StandardScaler) or step.with_mean:
+                raise ValueError("Unsupported categorical scaler")
+            if step.scale_ is not None:
+                cat_table = cat_table / step.scale_
+
+        return cls(
+            n_features=preprocessor.output_indices_["cat_pipeline"].stop,
+            num_slice=preprocessor.output_indices_["num_pipeline"],
+            num_mean=np.ascontiguousarray(num_mean, dtype=np.float64),
+            num_scale=np.ascontiguousarray(num_scale, dtype=np.float64),
+            cat_slice=preprocessor.output_indices_["cat_pipeline"],
+            categories=categories,
+            cat_table=np.ascontiguousarray(cat_table, dtype=np.float64),
+        )
+
+    def _category_codes(self, types):
+        types = np.asarray(types, dtype=object)
+        try:
+            codes = np.searchsorted(self.categories, types)
+        except TypeError:
+            # Missing values (None/NaN) cannot be ordered against the category strings
+            missing = sorted({repr(value) for value in types.tolist() if not isinstance(value, str)})
+            raise ValueError(f"Found unknown categories {missing} in column {CATEGORICAL_COLUMN}")
+        codes = np.minimum(codes, len(self.categories) - 1)
+        unknown = self.categories[codes] != types
+        if unknown.any():
+            raise ValueError(f"Found unknown categories {sorted(set(types[unknown].tolist()))} in column {CATEGORICAL_COLUMN}")
+        return codes
+
+    def transform_arrays(self, types, numeric):
+        """types: (n,) machine types; numeric: (n, 5) values in NUMERICAL_COLUMNS order"""
+        numeric = np.asarray(numeric, dtype=np.float64)
+        out = np.empty((numeric.shape[0], self.n_features), dtype=np.float64)
+        out[:, self.num_slice] = (numeric - self.num_mean) / self.num_scale
+        out[:, self.cat_slice] = self.cat_table[self._category_codes(types)]
+        return out
+
+    def transform_rows(self, rows):
+        """rows: sequence of (Type, air, process, rpm, torque, wear) tuples"""
+        rows = list(rows)
+        types = [row[0] for row in rows]
+        numeric = np.array([row[1:] for row in rows], dtype=np.float64)
+        return self.transform_arrays(types, numeric)
+
+    def transform(self, features: pd.DataFrame):
+        """Drop-in replacement for preprocessor.transform on a DataFrame"""
+        return self.transform_arrays(
+            features[CATEGORICAL_COLUMN].to_numpy(dtype=object),
+            features[NUMERICAL_COLUMNS].to_numpy(dtype=np.float64),
+        )
+
+    def check_parity(self, preprocessor, features: pd.DataFrame, atol=0.0):
+        """Compare against preprocessor.transform; raises ValueError on mismatch"""
+        expected = preprocessor.transform(features)
+        if hasattr(expected, "toarray"):
+            expected = expected.toarray()
+        actual = self.transform(features)
+        if expected.shape != actual.shape or not np.allclose(actual, expected, rtol=0.0, atol=atol):
+            max_diff = np.abs(actual - expected).max() if expected.shape == actual.shape else "shape mismatch"
+            raise ValueError(f"Fast preprocessor does not match preprocessor.transform (max diff {max_diff})")
+        return True
+
+    def probe_frame(self):
+        """A few rows covering every category, used for a parity self-check at load time"""
+        n = len(self.categories)
+        base = np.tile(self.num_mean, (n, 1)) + np.arange(n)[:, None] * self.num_scale
+        frame = pd.DataFrame(base, columns=NUMERICAL_COLUMNS)
+        frame.insert(0, CATEGORICAL_COLUMN, self.categories)
+        return frame
+
+
+def compile_preprocessor(preprocessor):
+    """Compile and self-check a FastPreprocessor; returns None when the preprocessor layout is unsupported."""
+    try:
+        fast = FastPreprocessor.compile(preprocessor)
+        fast.check_parity(preprocessor, fast.probe_frame())
+        return fast
+    except Exception as e:
+        logging.warning(f"NumPy preprocessing fast path disabled: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    # Parity check against the trained preprocessor on the held-out test set
+    from src.utils import load_object
+
+    try:
+        preprocessor = load_object("artifacts/preprocessor.pkl")
+        test_df = pd.read_csv("artifacts/test.csv")
+        fast = FastPreprocessor.compile(preprocessor)
+        fast.check_parity(preprocessor, test_df)
+        print(f"✅ Fast preprocessor matches preprocessor.transform on {len(test_df)} rows")
+    except Exception as e:
+        print(f"❌ Parity check failed: {CustomException(e, sys)}")
+        sys.exit(1)
@@ -1,42 +1,475 @@
 import sys
+import numpy as np
 import pandas as pd
 import os
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime
+from sklearn.svm import SVC, NuSVC
 from src.exception import CustomException
 from src.utils import load_object
 from src.logger import logging
+from src.metrics import FEATURES_SECONDS, PREDICT_SECONDS, ROWS_SCORED, TRANSFORM_SECONDS
+from src.pipeline.fast_preprocessor import compile_preprocessor
+from src.pipeline.tree_engine import compile_tree_engine
+
+
+# API field name -> training column name, in the order the preprocessor expects
+FEATURE_FIELDS = {
+    "Type": "Type",
+    "Air_temperature": "Air temperature [K]",
+    "Process_temperature": "Process temperature [K]",
+    "Rotational_speed": "Rotational speed [rpm]",
+    "Torque": "Torque [Nm]",
+    "Tool_wear": "Tool wear [min]",
+}
+FEATURE_COLUMNS = list(FEATURE_FIELDS.values())
+
+# Representative readings, one per machine type, scored before a snapshot is published
+WARMUP_ROWS = [
+    ("L", 298.1, 308.6, 1551, 42.8, 0),
+    ("M", 300.4, 310.2, 1420, 51.3, 108),
+    ("H", 302.6, 311.9, 1782, 31.7, 203),
+]
+
+
+@dataclass
+class PredictPipelineConfig:
+    model_path: str = os.path.join("artifacts", "model.pkl")
+    preprocessor_path: str = os.path.join("artifacts", "preprocessor.pkl")
+    # Seconds between artifact change checks; 0 disables hot reload
+    reload_interval: float = float(os.environ.get("MODEL_RELOAD_INTERVAL", 5))
+    # Transform features with the compiled NumPy preprocessor instead of the ColumnTransformer
+    fast_preprocessing: bool = os.environ.get("FAST_PREPROCESSING", "1") == "1"
+    # Score small batches of tree-ensemble models with the flattened NumPy engine instead of sklearn
+    tree_engine: bool = os.environ.get("TREE_ENGINE", "1") == "1"
+    # Engine exported by training (python -m src.pipeline.tree_engine); compiled at load when absent or stale
+    tree_engine_path: str = os.path.join("artifacts", "tree_engine.mmap")
+    # Warm-up passes over WARMUP_ROWS (single row and batch) run on every load; at least one always runs
+    warmup_rounds: int = int(os.environ.get("MODEL_WARMUP_ROUNDS", 3))
+    warmup_batch_rows: int = int(os.environ.get("MODEL_WARMUP_BATCH_ROWS", 256))
+
+
+@dataclass(frozen=True)
+class LoadedArtifacts:
+    """Immutable snapshot of a model/preprocessor pair loaded together"""
+    model: object
+    preprocessor: object
+    signature: tuple
+    version: str
+    loaded_at: float
+    load_seconds: float
+    # Compiled NumPy equivalent of `preprocessor`, None when unsupported or disabled
+    fast_preprocessor: object = None
+    # Flattened NumPy evaluator for `model`, None when unsupported or disabled
+    tree_engine: object = None
+    # Full sha256 of both artifact files; `version` is its first 12 characters
+    content_hash: str = ""
+    # Timings from the warm-up run done before the snapshot was published
+    warmup: dict = None
+
+    def transform(self, features):
+        """Transform a feature DataFrame with the fastest available preprocessor"""
+        if self.fast_preprocessor is not None:
+            return self.fast_preprocessor.transform(features)
+        return self.preprocessor.transform(features)
+
+    def transform_rows(self, rows):
+        """Transform (Type, air, process, rpm, torque, wear) tuples without building a DataFrame when possible"""
+        if self.fast_preprocessor is not None:
+            return self.fast_preprocessor.transform_rows(rows)
+        return self.preprocessor.transform(pd.DataFrame.from_records(list(rows), columns=FEATURE_COLUMNS))
+
+    def transform_arrays(self, types, numeric):
+        """Transform an (n,) array of machine types and an (n, 5) numeric array in FEATURE_COLUMNS order"""
+        if self.fast_preprocessor is not None:
+            return self.fast_preprocessor.transform_arrays(types, numeric)
+        frame = pd.DataFrame(numeric, columns=FEATURE_COLUMNS[1:])
+        frame.insert(0, FEATURE_COLUMNS[0], types)
+        return self.preprocessor.transform(frame)
+
+    def estimator(self, n_rows):
+        """The tree engine for batches it scores faster than sklearn, the model otherwise"""
+        if self.tree_engine is not None and n_rows <= self.tree_engine.max_rows:
+            return self.tree_engine
+        return self.model
+
+
+class ModelCache:
+    """
+    Process-wide cache for the model and preprocessor artifacts.
+
+    Both objects are unpickled once and published together as a single
+    LoadedArtifacts snapshot. A daemon thread polls the files' mtime/size and
+    reloads them in the background when they change; the new snapshot replaces
+    the old one with a single reference assignment, so callers holding a
+    snapshot never see a half loaded model.
+    """
+
+    def __init__(self, config: PredictPipelineConfig = None):
+        self.config = config or PredictPipelineConfig()
+        self._artifacts = None
+        self._load_lock = threading.Lock()
+        self._watcher = None
+        self._stop_event = threading.Event()
+        self.last_error = None
+
+    def _file_signature(self):
+        signature = []
+        for path in (self.config.model_path, self.config.preprocessor_path):
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _content_hashes(self):
+        """(sha256 of the model and preprocessor files together, sha256 of the model file alone), in one read"""
+        digest = hashlib.sha256()
+        model_digest = hashlib.sha256()
+        for path in (self.config.model_path, self.config.preprocessor_path):
+            with open(path, "rb") as file_obj:
+                for block in iter(lambda: file_obj.read(1 << 20), b""):
+                    digest.update(block)
+                    if path == self.config.model_path:
+                        model_digest.update(block)
+        return digest.hexdigest(), model_digest.hexdigest()
+
+    def _load(self):
+        """Load, validate and warm up both artifacts and return a new snapshot without publishing it"""
+        start = time.perf_counter()
+        signature = self._file_signature()
+
+        model = load_object(file_path=self.config.model_path)
+        preprocessor = load_object(file_path=self.config.preprocessor_path)
+        content_hash, model_hash = self._content_hashes()
+        fast_preprocessor = compile_preprocessor(preprocessor) if self.config.fast_preprocessing else None
+        tree_engine = self._load_tree_engine(model, model_hash) if self.config.tree_engine else None
+
+        # A writer replaced the files while we were reading them; the pair may be inconsistent
+        if self._file_signature() != signature:
+            raise ValueError("Model artifacts changed while loading")
+
+        artifacts = LoadedArtifacts(
+            model=model,
+            preprocessor=preprocessor,
+            signature=signature,
+            version=content_hash[:12],
+            loaded_at=time.time(),
+            load_seconds=time.perf_counter() - start,
+            fast_preprocessor=fast_preprocessor,
+            tree_engine=tree_engine,
+            content_hash=content_hash,
+        )
+        return replace(artifacts, warmup=self._warm_up(artifacts))
+
+    def _load_tree_engine(self, model, model_hash):
+        """The exported engine when it was built from this model file (sha256 model_hash), otherwise one compiled now"""
+        engine = None
+        if os.path.exists(self.config.tree_engine_path):
+            try:
+                exported = load_object(file_path=self.config.tree_engine_path)
+                if getattr(exported, "source_hash", None) == model_hash:
+                    engine = exported
+                else:
+                    logging.info("Exported tree engine belongs to a different model file; compiling a new one")
+            except Exception as e:
+                logging.warning(f"Cannot load exported tree engine, compiling a new one: {e}")
+
+        if engine is None:
+            engine = compile_tree_engine(model, source_hash=model_hash)
+        if engine is not None:
+            engine.calibrate(model)
+            logging.info(f"Tree engine serves batches of up to {engine.max_rows} rows ({engine.n_trees} trees)")
+        return engine
+
+    def _warm_up(self, artifacts):
+        """
+        Score WARMUP_ROWS through the same transform and predict code the
+        request paths use, so a snapshot is only published once it has produced
+        sane predictions and its first real request does not pay for first-call
+        allocations. Raises ValueError when the pair is unusable.
+        """
+        model = artifacts.model
+        if not hasattr(model, "predict"):
+            raise ValueError(f"{type(model).__name__} is not a fitted estimator (no predict method)")
+
+        types = encoder_categories(artifacts.preprocessor)
+        rows = [row for row in WARMUP_ROWS if types is None or row[0] in types] or WARMUP_ROWS
+        batch_size = max(len(rows), self.config.warmup_batch_rows)
+        batch = (rows * (batch_size // len(rows) + 1))[:batch_size]
+        frame = pd.DataFrame.from_records(rows, columns=FEATURE_COLUMNS)
+
+        start = time.perf_counter()
+        for _ in range(max(1, self.config.warmup_rounds)):
+            single_start = time.perf_counter()
+            data_scaled = artifacts.transform_rows(rows[:1])
+            _score(artifacts.estimator(1), data_scaled)
+            single_seconds = time.perf_counter() - single_start
+
+            batch_start = time.perf_counter()
+            preds, confidences = _score(artifacts.estimator(len(batch)), artifacts.transform_rows(batch))
+            batch_seconds = time.perf_counter() - batch_start
+
+            # DataFrame path used by the form and batch endpoints
+            _score(artifacts.estimator(len(frame)), artifacts.transform(frame))
+
+        n_features = getattr(model, "n_features_in_", None)
+        if n_features is not None and data_scaled.shape[1] != n_features:
+            raise ValueError(f"Preprocessor produces {data_scaled.shape[1]} features but the model expects {n_features}")
+        if len(preds) != len(batch):
+            raise ValueError(f"Model returned {len(preds)} predictions for {len(batch)} rows")
+        classes = getattr(model, "classes_", None)
+        if classes is not None and not np.isin(preds, classes).all():
+            raise ValueError("Model predicted labels outside its classes_")
+        if confidences is not None and not (np.isfinite(confidences).all() and (confidences >= 0).all() and (confidences <= 1).all()):
+            raise ValueError("Model returned probabilities outside [0, 1]")
+
+        return {
+            "rounds": max(1, self.config.warmup_rounds),
+            "batch_rows": len(batch),
+            "seconds": round(time.perf_counter() - start, 4),
+            "single_row_ms": round(single_seconds * 1000, 3),
+            "batch_ms": round(batch_seconds * 1000, 3),
+        }
+
+    def get(self, watch: bool = True) -> LoadedArtifacts:
+        """
+        Return the current snapshot, loading it on first use. watch=False loads
+        without starting the reload watcher thread, so a process can fork
+        without live threads and start a watcher in each child (start_watcher).
+        """
+        artifacts = self._artifacts
+        if artifacts is not None:
+            return artifacts
+
+        with self._load_lock:
+            if self._artifacts is None:
+                try:
+                    self._artifacts = self._load()
+                except Exception as e:
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    raise
+                self.last_error = None
+                logging.info(
+                    f"Model artifacts loaded (version {self._artifacts.version}) in {self._artifacts.load_seconds:.3f}s, "
+                    f"warm-up {self._artifacts.warmup['seconds']:.3f}s "
+                    f"(single row {self._artifacts.warmup['single_row_ms']:.2f}ms)"
+                )
+            if watch:
+                self._start_watcher()
+            return self._artifacts
+
+    def reload_if_changed(self):
+        """Reload the artifacts if their files changed. Returns True when a new snapshot was published."""
+        current = self._artifacts
+        try:
+            signature = self._file_signature()
+        except OSError as e:
+            logging.warning(f"Cannot stat model artifacts, keeping current model: {e}")
+            return False
+
+        if current is not None and signature == current.signature:
+            return False
+
+        with self._load_lock:
+            # Another trigger may have loaded these files while this one waited for the lock
+            current = self._artifacts
+            try:
+                if current is not None and self._file_signature() == current.signature:
+                    return False
+                artifacts = self._load()
+            except Exception as e:
+                # Keep serving the previous model; the next poll will retry
+                self.last_error = f"{type(e).__name__}: {e}"
+                logging.warning(f"Model reload failed, keeping current model: {e}")
+                return False
+            self._artifacts = artifacts
+            self.last_error = None
+
+        logging.info(f"Model artifacts reloaded (version {artifacts.version}) in {artifacts.load_seconds:.3f}s")
+        return True
+
+    def status(self):
+        """Describe the snapshot being served, without triggering a load"""
+        artifacts = self._artifacts
+        if artifacts is None:
+            return {"loaded": False, "last_error": self.last_error}
+
+        try:
+            files_changed = self._file_signature() != artifacts.signature
+        except OSError:
+            files_changed = True
+
+        return {
+            "loaded": True,
+            "version": artifacts.version,
+            "sha256": artifacts.content_hash,
+            "model_type": type(artifacts.model).__name__,
+            "fast_preprocessing": artifacts.fast_preprocessor is not None,
+            "tree_engine_max_rows": artifacts.tree_engine.max_rows if artifacts.tree_engine is not None else None,
+            "loaded_at": datetime.fromtimestamp(artifacts.loaded_at).isoformat(),
+            "load_seconds": round(artifacts.load_seconds, 4),
+            "warmup": artifacts.warmup,
+            "artifacts": [path for path, _, _ in artifacts.signature],
+            # True while files on disk differ from the served snapshot (reload pending or failing)
+            "files_changed_since_load": files_changed,
+            "last_error": self.last_error,
+        }
+
+    def start_watcher(self):
+        """Start hot reload for an already loaded cache, e.g. in a worker forked after get(watch=False)"""
+        with self._load_lock:
+            self._start_watcher()
+
+    def _start_watcher(self):
+        if self.config.reload_interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="model-cache-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while not self._stop_event.wait(self.config.reload_interval):
+            self.reload_if_changed()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _after_fork_in_child(self):
+        # Threads do not survive fork(): recreate the lock. Only processes that serve requests
+        # (prefork web workers) start a watcher again, through start_watcher()
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+
+
+_model_cache = None
+_model_cache_lock = threading.Lock()
+
+
+def get_model_cache() -> ModelCache:
+    """Return the process-wide ModelCache"""
+    global _model_cache
+    if _model_cache is None:
+        with _model_cache_lock:
+            if _model_cache is None:
+                _model_cache = ModelCache()
+                if hasattr(os, "register_at_fork"):
+                    os.register_at_fork(after_in_child=_model_cache._after_fork_in_child)
+    return _model_cache
+
 
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, model_cache: ModelCache = None):
+        self.model_cache = model_cache or get_model_cache()
 
     def predict(self, features):
         try:
-            model_path = os.path.join("artifacts", "model.pkl")
-            preprocessor_path = os.path.join("artifacts", "preprocessor.pkl")
-            
-            logging.info("Loading model and preprocessor")
-            model = load_object(file_path=model_path)
-            preprocessor = load_object(file_path=preprocessor_path)
-            
-            logging.info("Scaling input features")
-            data_scaled = preprocessor.transform(features)
-            
-            logging.info("Making prediction")
+            # Take one snapshot so the model and preprocessor always come from the same load
+            artifacts = self.model_cache.get()
+
+            logging.debug("Scaling input features")
+            start = time.perf_counter()
+            data_scaled = artifacts.transform(features)
+            TRANSFORM_SECONDS.observe(time.perf_counter() - start)
+            model = artifacts.estimator(len(data_scaled))
+
+            logging.debug("Making prediction")
+            start = time.perf_counter()
             preds = model.predict(data_scaled)
-            
+
             # Get prediction probabilities if available
             try:
                 pred_proba = model.predict_proba(data_scaled)
                 confidence = pred_proba.max(axis=1)[0]
-                logging.info(f"Prediction confidence: {confidence:.4f}")
+                logging.debug("Prediction confidence: %.4f", confidence)
             except:
                 confidence = None
-            
+            PREDICT_SECONDS.observe(time.perf_counter() - start)
+            ROWS_SCORED.inc(len(preds))
+
             return preds, confidence
-        
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict_with_confidence(self, features):
+        """
+        Vectorized scoring: one preprocessor.transform and one predict_proba
+        call for the whole frame. Returns per-row predictions and confidences
+        (None when the model has no predict_proba).
+        """
+        try:
+            artifacts = self.model_cache.get()
+            start = time.perf_counter()
+            data_scaled = artifacts.transform(features)
+            TRANSFORM_SECONDS.observe(time.perf_counter() - start)
+            return score_scaled(artifacts.estimator(len(data_scaled)), data_scaled)
+
         except Exception as e:
             raise CustomException(e, sys)
 
+    def predict_rows(self, rows):
+        """Like predict_with_confidence, for raw (Type, air, process, rpm, torque, wear) tuples"""
+        try:
+            artifacts = self.model_cache.get()
+            start = time.perf_counter()
+            data_scaled = artifacts.transform_rows(rows)
+            TRANSFORM_SECONDS.observe(time.perf_counter() - start)
+            return score_scaled(artifacts.estimator(len(data_scaled)), data_scaled)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict_columns(self, types, numeric):
+        """Like predict_with_confidence, for column arrays (see LoadedArtifacts.transform_arrays)"""
+        try:
+            artifacts = self.model_cache.get()
+            start = time.perf_counter()
+            data_scaled = artifacts.transform_arrays(types, numeric)
+            TRANSFORM_SECONDS.observe(time.perf_counter() - start)
+            return score_scaled(artifacts.estimator(len(data_scaled)), data_scaled)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def known_types(self):
+        """Machine types the fitted OneHotEncoder accepts, or None if they cannot be determined"""
+        return encoder_categories(self.model_cache.get().preprocessor)
+
+
+def encoder_categories(preprocessor):
+    """Machine types a fitted preprocessor's OneHotEncoder accepts, or None if they cannot be determined"""
+    try:
+        encoder = preprocessor.named_transformers_["cat_pipeline"]["one_hot_encoder"]
+        return set(encoder.categories_[0].tolist())
+    except (KeyError, AttributeError, IndexError, TypeError):
+        return None
+
+
+def score_scaled(model, data_scaled):
+    """Return (predictions, confidences) for already transformed features"""
+    start = time.perf_counter()
+    preds, confidences = _score(model, data_scaled)
+    PREDICT_SECONDS.observe(time.perf_counter() - start)
+    ROWS_SCORED.inc(len(preds))
+    return preds, confidences
+
+
+def _score(model, data_scaled):
+    if not hasattr(model, "predict_proba"):
+        preds, confidences = model.predict(data_scaled), None
+    else:
+        pred_proba = model.predict_proba(data_scaled)
+        confidences = pred_proba.max(axis=1)
+
+        # SVC's Platt-scaled probabilities can disagree with its decision function
+        if isinstance(model, (SVC, NuSVC)):
+            preds = model.predict(data_scaled)
+        else:
+            preds = model.classes_.take(pred_proba.argmax(axis=1))
+    return preds, confidences
+
 class CustomData:
     def __init__(self,
                 Type: str,
@@ -55,6 +488,7 @@ class CustomData:
 
     def get_data_as_data_frame(self):
         try:
+            start = time.perf_counter()
             custom_data_input_dict = {
                 "Type": [self.Type],
                 "Air temperature [K]": [self.Air_temperature],
@@ -64,7 +498,99 @@ class CustomData:
                 "Tool wear [min]": [self.Tool_wear],
             }
 
-            return pd.DataFrame(custom_data_input_dict)
+            features_df = pd.DataFrame(custom_data_input_dict)
+            FEATURES_SECONDS.observe(time.perf_counter() - start)
+            return features_df
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def reading_to_row(reading):
+    """
+    Convert one raw reading dict (API field names) into a
+    (Type, air, process, rpm, torque, wear) tuple. Raises ValueError when invalid.
+    """
+    if not isinstance(reading, dict):
+        raise ValueError("reading must be a JSON object")
+
+    row = []
+    for field in FEATURE_FIELDS:
+        if field not in reading:
+            raise ValueError(f"{field}: missing")
+        value = reading[field]
+        if field == "Type":
+            if not isinstance(value, str):
+                raise ValueError(f"{field}: must be a string")
+            row.append(value)
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+            raise ValueError(f"{field}: must be a finite number")
+        row.append(value)
+    return tuple(row)
+
+
+class BatchCustomData:
+    """
+    Column-wise validation for many readings at once.
+
+    Each reading is a dict keyed by the API field names (see FEATURE_FIELDS).
+    Invalid rows are reported individually instead of failing the batch.
+    """
+
+    def __init__(self, readings: list, known_types: set = None):
+        self.readings = readings
+        self.known_types = known_types
+
+    def get_data_as_data_frame(self):
+        """
+        Returns (features_df, valid_index, errors) where features_df holds only
+        the valid rows, valid_index maps them back to positions in `readings`
+        and errors is a list of {"index", "error"} dicts for rejected rows.
+        """
+        try:
+            start = time.perf_counter()
+            n_rows = len(self.readings)
+            is_object = np.fromiter((isinstance(reading, dict) for reading in self.readings), dtype=bool, count=n_rows)
+            rows = [reading if isinstance(reading, dict) else {} for reading in self.readings]
+            problems = {int(index): ["reading must be a JSON object"] for index in np.flatnonzero(~is_object)}
+
+            columns = {}
+            for field, column in FEATURE_FIELDS.items():
+                values = [row.get(field) for row in rows]
+                if field == "Type":
+                    series = pd.Series([value if isinstance(value, str) else None for value in values], dtype=object)
+                    if self.known_types is not None:
+                        bad = ~series.isin(self.known_types).to_numpy()
+                    else:
+                        bad = series.isna().to_numpy()
+                    message = f"{field}: missing or unknown machine type"
+                else:
+                    # Same rule as reading_to_row: JSON numbers only, never numeric strings or booleans
+                    numbers = [
+                        value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+                        for value in values
+                    ]
+                    series = pd.Series(numbers, dtype=float)
+                    bad = ~np.isfinite(series.to_numpy())
+                    message = f"{field}: missing or not a finite number"
+
+                for index in np.flatnonzero(bad & is_object):
+                    problems.setdefault(int(index), []).append(message)
+                columns[column] = series
+
+            valid_mask = np.ones(n_rows, dtype=bool)
+            if problems:
+                valid_mask[list(problems)] = False
+            valid_index = np.flatnonzero(valid_mask)
+
+            features_df = pd.DataFrame(columns)[FEATURE_COLUMNS].iloc[valid_index].reset_index(drop=True)
+            errors = [
+                {"index": index, "error": "; ".join(messages)}
+                for index, messages in sorted(problems.items())
+            ]
+            FEATURES_SECONDS.observe(time.perf_counter() - start)
+            return features_df, valid_index, errors
 
         except Exception as e:
             raise CustomException(e, sys)
\ No newline at end of file
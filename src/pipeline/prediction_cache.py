@@ -0,0 +1,139 @@
+# src/pipeline/prediction_cache.py
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from src.logger import logging
+from src.pipeline.predict_pipeline import ModelCache, get_model_cache
+
+
+def _default_resolutions():
+    # Quantization step per numeric field; 0 means the value must match exactly
+    return {
+        "Air_temperature": float(os.environ.get("PREDICTION_CACHE_TEMP_RESOLUTION", 0.1)),
+        "Process_temperature": float(os.environ.get("PREDICTION_CACHE_TEMP_RESOLUTION", 0.1)),
+        "Rotational_speed": float(os.environ.get("PREDICTION_CACHE_RPM_RESOLUTION", 1)),
+        "Torque": float(os.environ.get("PREDICTION_CACHE_TORQUE_RESOLUTION", 0.1)),
+        "Tool_wear": float(os.environ.get("PREDICTION_CACHE_WEAR_RESOLUTION", 1)),
+    }
+
+
+@dataclass
+class PredictionCacheConfig:
+    enabled: bool = os.environ.get("PREDICTION_CACHE_ENABLED", "0") == "1"
+    max_entries: int = int(os.environ.get("PREDICTION_CACHE_MAX_ENTRIES", 100000))
+    max_bytes: int = int(os.environ.get("PREDICTION_CACHE_MAX_MB", 64)) * 1024 * 1024
+    resolutions: dict = field(default_factory=_default_resolutions)
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of prediction results keyed on quantized readings.
+
+    A reading (Type, air, process, rpm, torque, wear) is mapped to a bucket by
+    rounding each numeric value to its configured resolution; every reading in
+    the same bucket gets the result computed for the first one. Entries are
+    tagged with the model version and the whole cache is dropped as soon as the
+    ModelCache publishes a new version.
+    """
+
+    # Approximate bytes per entry: key tuple, its ints, the result tuple and the OrderedDict link
+    _ENTRY_OVERHEAD = 64
+
+    def __init__(self, config: PredictionCacheConfig = None, model_cache: ModelCache = None):
+        self.config = config or PredictionCacheConfig()
+        self.model_cache = model_cache or get_model_cache()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._bytes = 0
+
+        fields = ["Air_temperature", "Process_temperature", "Rotational_speed", "Torque", "Tool_wear"]
+        self._steps = [self.config.resolutions.get(name, 0) for name in fields]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, row):
+        """Quantized cache key for a (Type, air, process, rpm, torque, wear) tuple"""
+        quantized = [row[0]]
+        for value, step in zip(row[1:], self._steps):
+            quantized.append(round(value / step) if step else value)
+        return tuple(quantized)
+
+    def _entry_size(self, key, value):
+        return sys.getsizeof(key) + sum(sys.getsizeof(item) for item in key) + sys.getsizeof(value) + self._ENTRY_OVERHEAD
+
+    def _check_version(self):
+        # Caller holds the lock
+        version = self.model_cache.get().version
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                logging.info(f"Prediction cache cleared for model version {version} ({len(self._entries)} entries dropped)")
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    @property
+    def version(self):
+        """Model version the cached entries belong to"""
+        return self._version
+
+    def get(self, key):
+        """Return the cached (prediction, confidence) for key, or None"""
+        with self._lock:
+            self._check_version()
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        """Store a result; skipped when it was computed by a model version that is no longer current"""
+        with self._lock:
+            self._check_version()
+            if version is not None and version != self._version:
+                return
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+
+            self._entries[key] = value
+            self._bytes += self._entry_size(key, value)
+
+            while self._entries and (
+                len(self._entries) > self.config.max_entries or self._bytes > self.config.max_bytes
+            ):
+                old_key, old_value = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(old_key, old_value)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.config.enabled,
+                "entries": len(self._entries),
+                "approx_bytes": self._bytes,
+                "max_entries": self.config.max_entries,
+                "max_bytes": self.config.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "model_version": self._version,
+            }
@@ -0,0 +1,105 @@
+# src/pipeline/score_index.py
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.logger import logging
+
+INDEX_COLUMNS = ["key", "row_hash", "model_version", "Prediction", "Confidence", "Prediction_Timestamp"]
+
+
+def row_keys(df, key_columns):
+    """One string key per row from the key columns present, e.g. "42|M14860" for UDI and Product ID"""
+    keys = None
+    for column in key_columns:
+        values = df[column].astype(str)
+        keys = values if keys is None else keys + "|" + values
+    return keys.to_numpy(dtype=object)
+
+
+def row_hashes(df, feature_columns):
+    """
+    uint64 hash of each row's feature values. Numbers are hashed as float64
+    and the machine type as a string, so a row hashes the same whether it was
+    read from CSV, Parquet or Feather.
+    """
+    features = df[feature_columns].copy()
+    for column in feature_columns:
+        if pd.api.types.is_numeric_dtype(features[column]):
+            features[column] = features[column].astype(np.float64)
+        else:
+            features[column] = features[column].astype(str)
+    return pd.util.hash_pandas_object(features, index=False).to_numpy()
+
+
+class ScoreIndex:
+    """
+    Predictions already made, one per row key, together with the feature hash
+    and model version they were made for. A row can reuse its indexed
+    prediction only while both still match. The index is a Parquet file,
+    loaded whole and rewritten atomically by merge().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            frame = pd.read_parquet(path, columns=INDEX_COLUMNS)
+        else:
+            frame = pd.DataFrame({
+                "key": pd.Series(dtype=object),
+                "row_hash": pd.Series(dtype=np.uint64),
+                "model_version": pd.Series(dtype=object),
+                "Prediction": pd.Series(dtype=np.int64),
+                "Confidence": pd.Series(dtype=np.float64),
+                "Prediction_Timestamp": pd.Series(dtype=object),
+            })
+        self.frame = frame
+        self._positions = pd.Index(frame["key"])
+        logging.info(f"Score index {path}: {len(frame)} rows")
+
+    def __len__(self):
+        return len(self.frame)
+
+    def lookup(self, keys, hashes, model_version):
+        """
+        Indexed results for rows whose features and model are unchanged.
+        Returns (hit, predictions, confidences, timestamps): hit is a boolean
+        mask over the rows and the other arrays hold the results for the hits.
+        """
+        positions = self._positions.get_indexer(keys)
+        hit = positions >= 0
+        found = positions[hit]
+        hit[hit] = (
+            (self.frame["row_hash"].to_numpy()[found] == hashes[hit])
+            & (self.frame["model_version"].to_numpy()[found] == model_version)
+        )
+        found = positions[hit]
+        return (
+            hit,
+            self.frame["Prediction"].to_numpy()[found],
+            self.frame["Confidence"].to_numpy()[found],
+            self.frame["Prediction_Timestamp"].to_numpy()[found],
+        )
+
+    def merge(self, journal_path):
+        """Fold rows scored by a run (a CSV journal with INDEX_COLUMNS) into the index and save it"""
+        if not os.path.exists(journal_path) or os.path.getsize(journal_path) == 0:
+            return
+        journal = pd.read_csv(
+            journal_path, names=INDEX_COLUMNS, header=None,
+            dtype={"key": object, "row_hash": np.uint64, "model_version": object, "Prediction_Timestamp": object},
+        )
+        if len(journal) == 0:
+            return
+        frame = pd.concat([self.frame, journal], ignore_index=True)
+        # The latest result for a key replaces the earlier one
+        frame = frame.drop_duplicates("key", keep="last").reset_index(drop=True)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        self.frame = frame
+        self._positions = pd.Index(frame["key"])
+        logging.info(f"Score index {self.path}: {len(journal)} rows added or updated, {len(frame)} total")
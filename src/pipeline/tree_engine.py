@@ -0,0 +1,302 @@
+# src/pipeline/tree_engine.py
+import os
+import sys
+import time
+
+import numpy as np
+import sklearn
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils.fixes import parse_version
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Before 1.4, tree_.value held weighted class counts and predict_proba normalized them per call
+_LEGACY_TREE_VALUES = parse_version(sklearn.__version__) < parse_version("1.4")
+# Upper bound on rows x trees evaluated at once, which caps the engine's scratch memory
+MAX_CELLS_PER_CHUNK = int(os.environ.get("TREE_ENGINE_MAX_CELLS", 1 << 20))
+# Largest batch routed to the engine; unset means measure the crossover against sklearn at load time
+MAX_ROWS_OVERRIDE = os.environ.get("TREE_ENGINE_MAX_ROWS")
+CALIBRATION_SIZES = (1, 8, 32, 64, 128, 256, 512, 1024)
+# Measured crossover per model file sha256; hot reloads of an unchanged model and prefork workers reuse it
+_calibrated_max_rows = {}
+
+
+class TreeEnsembleEngine:
+    """
+    NumPy evaluator for fitted RandomForest, ExtraTrees, DecisionTree and
+    GradientBoosting classifiers.
+
+    Every tree is flattened into one set of contiguous node arrays (feature,
+    threshold, children, leaf value) and a batch walks all trees at once, one
+    level per step, instead of going through sklearn's per-estimator loop and
+    input validation. Inputs are compared as float32, as sklearn does, and
+    per-tree results are accumulated in sklearn's order, so predict_proba
+    matches the source model bit for bit.
+
+    The walk costs a few NumPy calls per tree level, independent of batch
+    size, which makes it much faster than sklearn for small batches. For large
+    batches sklearn's compiled traversal wins, so callers should only route
+    batches of up to `max_rows` rows here (see calibrate()).
+    """
+
+    def __init__(self, kind, classes, n_features, roots, feature, threshold, children, leaf_value, max_depth,
+                 n_trees, init_raw=None, loss=None, source_hash=None):
+        self.kind = kind  # "forest" or "boosting"
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        # children[2 * node] is the left child, children[2 * node + 1] the right; leaves point at themselves
+        self.children = children
+        self.leaf_value = leaf_value
+        self.max_depth = max_depth
+        self.n_trees = n_trees
+        self.init_raw = init_raw
+        self.loss = loss
+        # sha256 of the model file this engine was exported from, when known
+        self.source_hash = source_hash
+        self.max_rows = 0
+
+    @classmethod
+    def compile(cls, model, source_hash=None):
+        """Flatten a fitted model; raises ValueError for unsupported models"""
+        if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            trees, kind = list(model.estimators_), "forest"
+        elif isinstance(model, DecisionTreeClassifier):
+            trees, kind = [model], "forest"
+        elif isinstance(model, GradientBoostingClassifier):
+            trees, kind = [tree for stage in model.estimators_ for tree in stage], "boosting"
+        else:
+            raise ValueError(f"{type(model).__name__} is not a supported tree ensemble")
+
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Multi-output tree models are not supported")
+
+        n_classes = len(model.classes_)
+        offsets, feature, threshold, children, values, depth = [], [], [], [], [], 0
+        offset = 0
+        for tree in trees:
+            tree_ = tree.tree_
+            n_nodes = tree_.node_count
+            left = tree_.children_left.astype(np.intp)
+            right = tree_.children_right.astype(np.intp)
+            is_leaf = left == -1
+            own = np.arange(n_nodes, dtype=np.intp)
+
+            node_children = np.empty(2 * n_nodes, dtype=np.intp)
+            node_children[0::2] = np.where(is_leaf, own, left) + offset
+            node_children[1::2] = np.where(is_leaf, own, right) + offset
+
+            offsets.append(offset)
+            feature.append(np.where(is_leaf, 0, tree_.feature).astype(np.intp))
+            threshold.append(np.where(is_leaf, np.inf, tree_.threshold))
+            children.append(node_children)
+
+            if kind == "forest":
+                value = tree_.value[:, 0, :n_classes]
+                if _LEGACY_TREE_VALUES:
+                    normalizer = value.sum(axis=1)[:, np.newaxis]
+                    normalizer[normalizer == 0.0] = 1.0
+                    value = value / normalizer
+                values.append(value)
+            else:
+                # Same product GradientBoosting's predict_stages adds per stage
+                values.append(model.learning_rate * tree_.value[:, 0, 0])
+
+            depth = max(depth, tree_.max_depth)
+            offset += n_nodes
+
+        init_raw, loss = None, None
+        if kind == "boosting":
+            if not (model.init_ == "zero" or isinstance(model.init_, DummyClassifier)):
+                raise ValueError(f"GradientBoosting with a {type(model.init_).__name__} init estimator is not supported")
+            if not hasattr(model, "_loss"):
+                raise ValueError("This scikit-learn version does not expose the GradientBoosting loss")
+            # The prior-based init is the same for every row; compute it once
+            init_raw = model._raw_predict_init(np.zeros((1, model.n_features_in_), dtype=np.float32))[0]
+            loss = model._loss
+
+        return cls(
+            kind=kind,
+            classes=model.classes_,
+            n_features=model.n_features_in_,
+            roots=np.asarray(offsets, dtype=np.intp),
+            feature=np.concatenate(feature),
+            threshold=np.concatenate(threshold),
+            children=np.concatenate(children),
+            leaf_value=np.concatenate(values),
+            max_depth=depth,
+            n_trees=len(trees),
+            init_raw=init_raw,
+            loss=loss,
+            source_hash=source_hash,
+        )
+
+    def apply(self, X):
+        """Global leaf index reached in every tree, shape (n_rows, n_trees)"""
+        n_rows = X.shape[0]
+        node = np.tile(self.roots, (n_rows, 1))
+        row_offset = (np.arange(n_rows, dtype=np.intp) * X.shape[1])[:, np.newaxis]
+        flat_X = X.ravel()
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offset + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+        return node
+
+    def _predict_proba_chunk(self, X):
+        leaves = self.apply(X)
+        if self.kind == "forest":
+            # Running sum in tree order, as ForestClassifier accumulates it
+            proba = np.cumsum(self.leaf_value[leaves], axis=1)[:, -1]
+            proba /= self.n_trees
+            return proba
+
+        n_rows, n_per_stage = X.shape[0], len(self.init_raw)
+        stage_values = self.leaf_value[leaves].reshape(n_rows, -1, n_per_stage)
+        init = np.broadcast_to(self.init_raw, (n_rows, 1, n_per_stage))
+        raw = np.cumsum(np.concatenate([init, stage_values], axis=1), axis=1)[:, -1]
+        return self.loss.predict_proba(raw)
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+
+        chunk_rows = max(1, MAX_CELLS_PER_CHUNK // self.n_trees)
+        if X.shape[0] <= chunk_rows:
+            return self._predict_proba_chunk(X)
+        return np.concatenate([
+            self._predict_proba_chunk(X[start:start + chunk_rows])
+            for start in range(0, X.shape[0], chunk_rows)
+        ])
+
+    def predict(self, X):
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+    def calibrate(self, model, repeats=3):
+        """
+        Set max_rows to the largest batch size the engine scores faster than
+        model.predict_proba on this machine, or to TREE_ENGINE_MAX_ROWS when set.
+        The timing loops run once per source_hash in a process.
+        """
+        if MAX_ROWS_OVERRIDE is not None:
+            self.max_rows = int(MAX_ROWS_OVERRIDE)
+            return self.max_rows
+        if self.source_hash is not None and self.source_hash in _calibrated_max_rows:
+            self.max_rows = _calibrated_max_rows[self.source_hash]
+            return self.max_rows
+
+        def best_time(scorer, X):
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                scorer.predict_proba(X)
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        probe = self.probe_inputs(n_rows=CALIBRATION_SIZES[-1], seed=1)
+        self.max_rows = 0
+        for n_rows in CALIBRATION_SIZES:
+            if best_time(self, probe[:n_rows]) >= best_time(model, probe[:n_rows]):
+                break
+            self.max_rows = n_rows
+        if self.source_hash is not None:
+            _calibrated_max_rows[self.source_hash] = self.max_rows
+        return self.max_rows
+
+    def probe_inputs(self, n_rows=256, seed=0):
+        """Random rows spanning every split threshold, for parity checks"""
+        rng = np.random.RandomState(seed)
+        is_split = np.isfinite(self.threshold)
+        low = np.zeros(self.n_features_in_)
+        high = np.ones(self.n_features_in_)
+        for index in range(self.n_features_in_):
+            thresholds = self.threshold[is_split & (self.feature == index)]
+            if len(thresholds):
+                low[index], high[index] = thresholds.min() - 1.0, thresholds.max() + 1.0
+        return low + rng.random_sample((n_rows, self.n_features_in_)) * (high - low)
+
+    def check_parity(self, model, X, atol=0.0):
+        """Compare against model.predict_proba; raises ValueError on mismatch"""
+        expected = model.predict_proba(X)
+        actual = self.predict_proba(X)
+        if expected.shape != actual.shape or not np.allclose(actual, expected, rtol=0.0, atol=atol):
+            max_diff = np.abs(actual - expected).max() if expected.shape == actual.shape else "shape mismatch"
+            raise ValueError(f"Tree engine does not match predict_proba (max diff {max_diff})")
+        return True
+
+
+def compile_tree_engine(model, source_hash=None):
+    """Compile and self-check a TreeEnsembleEngine; returns None when the model is not supported."""
+    try:
+        engine = TreeEnsembleEngine.compile(model, source_hash=source_hash)
+    except ValueError as e:
+        # Not a tree ensemble (e.g. LogisticRegression); sklearn serves it as before
+        logging.info(f"NumPy tree engine not used: {e}")
+        return None
+    except Exception as e:
+        logging.warning(f"NumPy tree engine disabled: {e}")
+        return None
+
+    try:
+        engine.check_parity(model, engine.probe_inputs())
+        return engine
+    except Exception as e:
+        logging.warning(f"NumPy tree engine disabled: {e}")
+        return None
+
+
+def export_tree_engine(model, file_path, source_hash=None):
+    """Flatten model and save the engine next to it; returns the engine, or None when unsupported"""
+    from src.utils import save_object
+
+    try:
+        engine = compile_tree_engine(model, source_hash=source_hash)
+        if engine is not None:
+            save_object(file_path=file_path, obj=engine)
+            logging.info(f"Exported tree engine ({engine.n_trees} trees, {len(engine.threshold):,} nodes) to {file_path}")
+        return engine
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    # Export the trained model's engine and compare it with sklearn on the held-out test set
+    import pandas as pd
+    from src.utils import file_sha256, load_object
+    # Through the package, so the saved engine unpickles as src.pipeline.tree_engine.TreeEnsembleEngine
+    from src.pipeline.tree_engine import export_tree_engine
+
+    try:
+        model_path = os.path.join("artifacts", "model.pkl")
+        model = load_object(model_path)
+        preprocessor = load_object(os.path.join("artifacts", "preprocessor.pkl"))
+        engine = export_tree_engine(model, os.path.join("artifacts", "tree_engine.mmap"), file_sha256(model_path))
+        if engine is None:
+            print(f"❌ {type(model).__name__} is not supported by the tree engine")
+            sys.exit(1)
+
+        test_df = pd.read_csv(os.path.join("artifacts", "test.csv"))
+        X = preprocessor.transform(test_df)
+        engine.check_parity(model, X)
+        print(f"✅ Tree engine matches predict_proba on {len(X):,} test rows")
+
+        print(f"   Engine used for batches of up to {engine.calibrate(model)} rows")
+        for label, rows in (("single row", X[:1]), ("64 rows", X[:64]), (f"{len(X):,} rows", X)):
+            timings = {}
+            for name, scorer in (("sklearn", model), ("engine", engine)):
+                scorer.predict_proba(rows)
+                start = time.perf_counter()
+                for _ in range(20):
+                    scorer.predict_proba(rows)
+                timings[name] = (time.perf_counter() - start) / 20
+            print(f"   {label}: sklearn {timings['sklearn'] * 1000:.3f}ms, engine {timings['engine'] * 1000:.3f}ms "
+                  f"({timings['sklearn'] / timings['engine']:.1f}x)")
+
+    except Exception as e:
+        print(f"❌ Tree engine export failed: {CustomException(e, sys)}")
+        sys.exit(1)
@@ -0,0 +1,222 @@
+# src/serving/admission.py
+import asyncio
+import contextvars
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.metrics import REQUESTS_SHED
+
+# Header carrying a per-request time budget in milliseconds, counted from arrival
+DEADLINE_HEADER = b"x-request-deadline-ms"
+
+# Deadline (time.monotonic() value) of the request being handled, None when it has none
+_request_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+def current_deadline():
+    """Deadline of the request being handled, as a time.monotonic() value, or None"""
+    return _request_deadline.get()
+
+
+def deadline_expired(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request arrives while the admission queue is full"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before its work starts"""
+
+
+@dataclass
+class AdmissionConfig:
+    name: str = "realtime"
+    # Requests handled at once; later ones wait in a FIFO queue
+    max_concurrency: int = int(os.environ.get("ADMISSION_MAX_CONCURRENCY", 64))
+    # Waiting requests allowed before new ones are turned away
+    max_queue: int = int(os.environ.get("ADMISSION_MAX_QUEUE", 256))
+    # Budget for requests without a deadline header; 0 means wait as long as it takes
+    default_deadline_ms: float = float(os.environ.get("ADMISSION_DEFAULT_DEADLINE_MS", 2000))
+    # Seconds sent in Retry-After when a request is rejected or shed
+    retry_after_seconds: int = int(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS", 1))
+
+
+def bulk_admission_config():
+    """Separate, smaller limits for batch and streaming uploads so backfills cannot crowd out single predictions"""
+    return AdmissionConfig(
+        name="bulk",
+        max_concurrency=int(os.environ.get("ADMISSION_BULK_MAX_CONCURRENCY", 4)),
+        max_queue=int(os.environ.get("ADMISSION_BULK_MAX_QUEUE", 16)),
+        default_deadline_ms=float(os.environ.get("ADMISSION_BULK_DEFAULT_DEADLINE_MS", 0)),
+        retry_after_seconds=int(os.environ.get("ADMISSION_BULK_RETRY_AFTER_SECONDS", 5)),
+    )
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one class of requests.
+
+    A request over the concurrency limit waits for a slot. It is turned away at
+    once when the queue is already full, and shed when its deadline passes
+    while it is still waiting. A finishing request hands its slot directly to
+    the oldest waiter whose deadline has not yet passed. Everything runs on the
+    event loop thread, so no lock is needed.
+    """
+
+    def __init__(self, config: AdmissionConfig = None):
+        self.config = config or AdmissionConfig()
+        self.in_flight = 0
+        self._waiters = deque()
+        self._shed_queue_full = REQUESTS_SHED.labels(f"admission_{self.config.name}", "queue_full")
+        self._shed_deadline = REQUESTS_SHED.labels(f"admission_{self.config.name}", "deadline")
+
+        self.admitted = 0
+        self.rejected = 0
+        self.shed = 0
+        self.max_observed_queue = 0
+
+    def deadline_for(self, budget_ms=None):
+        """Absolute deadline for a request arriving now; budget_ms overrides the configured default"""
+        budget_ms = self.config.default_deadline_ms if budget_ms is None else budget_ms
+        return time.monotonic() + budget_ms / 1000.0 if budget_ms > 0 else None
+
+    async def acquire(self, deadline=None):
+        if self.in_flight < self.config.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.config.max_queue:
+            self.rejected += 1
+            self._shed_queue_full.inc()
+            raise AdmissionRejected(f"{self.config.name} queue is full ({len(self._waiters)} requests waiting)")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, deadline)
+        self._waiters.append(entry)
+        self.max_observed_queue = max(self.max_observed_queue, len(self._waiters))
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            self._record_shed()
+            raise DeadlineExceeded("Request deadline passed while waiting for admission")
+        except DeadlineExceeded:
+            # release() found our deadline already passed and skipped us
+            self._record_shed()
+            raise
+        except asyncio.CancelledError:
+            # Client went away; give back a slot that was handed to us in the meantime
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            else:
+                self._remove(entry)
+            raise
+        self.admitted += 1
+
+    def release(self):
+        """Finish one request: pass its slot to the next live waiter, or free it"""
+        while self._waiters:
+            future, deadline = self._waiters.popleft()
+            if future.done():
+                continue
+            if deadline_expired(deadline):
+                future.set_exception(DeadlineExceeded("Request deadline passed while waiting for admission"))
+                continue
+            future.set_result(None)
+            return
+        self.in_flight -= 1
+
+    def _remove(self, entry):
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+
+    def _record_shed(self):
+        self.shed += 1
+        self._shed_deadline.inc()
+
+    def stats(self):
+        return {
+            "max_concurrency": self.config.max_concurrency,
+            "max_queue": self.config.max_queue,
+            "default_deadline_ms": self.config.default_deadline_ms,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_observed_queue": self.max_observed_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "shed": self.shed,
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware applying an AdmissionController to POSTs on the given
+    paths. Requests over the limit are answered 429 (queue full) or 503
+    (deadline passed while queued) with Retry-After, before the body is read.
+    The request's deadline is exposed to the handler through current_deadline().
+    """
+
+    def __init__(self, app, controllers: dict):
+        self.app = app
+        # path -> AdmissionController
+        self.controllers = controllers
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controllers.get(scope.get("path")) if scope["type"] == "http" else None
+        if controller is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = controller.deadline_for(self._budget_ms(scope))
+        try:
+            await controller.acquire(deadline)
+        except AdmissionRejected as e:
+            await self._reject(send, 429, str(e), controller.config.retry_after_seconds)
+            return
+        except DeadlineExceeded as e:
+            await self._reject(send, 503, str(e), controller.config.retry_after_seconds)
+            return
+
+        token = _request_deadline.set(deadline)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_deadline.reset(token)
+            controller.release()
+
+    @staticmethod
+    def _budget_ms(scope):
+        for name, value in scope.get("headers", ()):
+            if name == DEADLINE_HEADER:
+                try:
+                    return float(value)
+                except ValueError:
+                    return None
+        return None
+
+    @staticmethod
+    async def _reject(send, status, detail, retry_after):
+        # Counted in pm_requests_shed_total; per-request lines would flood the log during a spike
+        logging.debug("Request shed with %s: %s", status, detail)
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
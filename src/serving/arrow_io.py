@@ -0,0 +1,161 @@
+# src/serving/arrow_io.py
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+PARQUET_MAGIC = b"PAR1"
+
+# Columns appended to the uploaded table, named as in BatchPrediction's CSV output
+PREDICTION_COLUMN = "Prediction"
+CONFIDENCE_COLUMN = "Confidence"
+RISK_COLUMN = "Failure_Risk"
+ERROR_COLUMN = "Error"
+RISK_LABELS = pa.array(["Low", "High"])
+ERROR_MESSAGES = pa.array(["Missing or non-finite feature value", "Unknown or missing machine Type"])
+
+
+@dataclass
+class ArrowUploadConfig:
+    # Largest upload accepted, in bytes and in rows
+    max_bytes: int = int(os.environ.get("ARROW_MAX_BYTES", 512 * 1024 * 1024))
+    max_rows: int = int(os.environ.get("ARROW_MAX_ROWS", 2_000_000))
+    # Parquet response compression; none keeps encoding cheap for LAN clients
+    parquet_compression: str = os.environ.get("ARROW_PARQUET_COMPRESSION", "snappy")
+
+
+class ArrowFormatError(ValueError):
+    """Raised when an upload is not a readable Arrow stream or Parquet file with the feature columns"""
+
+
+class ArrowUploadTooLarge(Exception):
+    """Raised when an upload exceeds ArrowUploadConfig's byte or row limit"""
+
+
+def detect_format(body, content_type=None):
+    """'parquet' or 'arrow', from the Content-Type or, failing that, the payload itself"""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in (PARQUET_MEDIA_TYPE, "application/x-parquet"):
+        return "parquet"
+    if content_type in (ARROW_STREAM_MEDIA_TYPE, "application/vnd.apache.arrow"):
+        return "arrow"
+    return "parquet" if body[:4] == PARQUET_MAGIC else "arrow"
+
+
+def read_table(body, fmt):
+    """
+    Read an uploaded Arrow IPC stream or Parquet file. The request body is
+    wrapped, not copied: Arrow stream columns point straight into it, and
+    Parquet pages are decoded from it in place. Extra columns (IDs and the
+    like) are kept and echoed in the response.
+    """
+    buffer = pa.py_buffer(body)
+    try:
+        if fmt == "parquet":
+            table = pq.read_table(pa.BufferReader(buffer))
+        else:
+            table = ipc.open_stream(buffer).read_all()
+    except pa.ArrowException as e:
+        raise ArrowFormatError(f"Cannot read {fmt} upload: {e}")
+    _check_columns(table.column_names)
+    return table
+
+
+def _check_columns(names):
+    missing = [column for column in FEATURE_COLUMNS if column not in names]
+    if missing:
+        raise ArrowFormatError(f"Missing required columns: {missing}")
+
+
+def feature_arrays(table, known_types=None):
+    """
+    Column arrays for the preprocessor, without a per-row Python loop.
+    Returns (types, numeric, errors): types is an (n,) object array, numeric
+    an (n, 5) float64 array in FEATURE_COLUMNS order, and errors an (n,)
+    int8 array that is 0 for a valid row and 1 + the ERROR_MESSAGES index
+    otherwise.
+    """
+    numeric = np.empty((table.num_rows, len(FEATURE_COLUMNS) - 1), dtype=np.float64)
+    for position, name in enumerate(FEATURE_COLUMNS[1:]):
+        column = table.column(name)
+        if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+            raise ArrowFormatError(f"Column {name!r} must be numeric, got {column.type}")
+        # Nulls become NaN and are caught by the finiteness check below
+        numeric[:, position] = pc.cast(column, pa.float64()).to_numpy()
+
+    # Dictionary-encode the machine type: validation runs on the few distinct
+    # values and the row array is a gather of references to them
+    types = table.column(FEATURE_COLUMNS[0])
+    if pa.types.is_dictionary(types.type):
+        types = pc.cast(types, types.type.value_type)
+    if not (pa.types.is_string(types.type) or pa.types.is_large_string(types.type)):
+        raise ArrowFormatError(f"Column {FEATURE_COLUMNS[0]!r} must be a string column, got {types.type}")
+    encoded = pc.dictionary_encode(types.combine_chunks())
+    values = encoded.dictionary.to_numpy(zero_copy_only=False).astype(object)
+    codes = encoded.indices.fill_null(0).to_numpy()
+    missing_type = encoded.indices.is_null().to_numpy(zero_copy_only=False)
+    if len(values):
+        known = np.array([known_types is None or value in known_types for value in values])
+        missing_type |= ~known[codes]
+        type_array = values[codes]
+    else:
+        type_array = np.full(table.num_rows, None, dtype=object)
+
+    errors = np.zeros(table.num_rows, dtype=np.int8)
+    errors[missing_type] = 2
+    errors[~np.isfinite(numeric).all(axis=1)] = 1
+    return type_array, numeric, errors
+
+
+def append_predictions(table, predictions, confidences, errors):
+    """
+    The uploaded table with Prediction, Confidence, Failure_Risk and Error
+    columns appended. predictions and confidences cover the valid rows only
+    (errors == 0); invalid rows get nulls and an error message. The uploaded
+    columns are reused as they are; only the new ones are allocated.
+    """
+    valid = errors == 0
+    n = table.num_rows
+
+    prediction = np.zeros(n, dtype=np.int64)
+    prediction[valid] = predictions
+    columns = {
+        PREDICTION_COLUMN: pa.array(prediction, mask=~valid),
+        CONFIDENCE_COLUMN: pa.nulls(n, pa.float64()),
+        RISK_COLUMN: pa.DictionaryArray.from_arrays(pa.array(prediction.clip(0, 1), mask=~valid), RISK_LABELS),
+        ERROR_COLUMN: pa.DictionaryArray.from_arrays(pa.array((errors - 1).clip(0), mask=valid), ERROR_MESSAGES),
+    }
+    if confidences is not None:
+        confidence = np.zeros(n, dtype=np.float64)
+        confidence[valid] = confidences
+        columns[CONFIDENCE_COLUMN] = pa.array(confidence, mask=~valid)
+
+    for name, column in columns.items():
+        index = table.schema.get_field_index(name)
+        table = table.set_column(index, name, column) if index >= 0 else table.append_column(name, column)
+    return table
+
+
+def write_table(table, fmt, config: ArrowUploadConfig = None):
+    """Serialize a table as an Arrow IPC stream or Parquet file; returns a pyarrow Buffer"""
+    config = config or ArrowUploadConfig()
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        compression = config.parquet_compression if config.parquet_compression != "none" else None
+        pq.write_table(table, sink, compression=compression)
+    else:
+        with ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+
+def media_type(fmt):
+    return PARQUET_MEDIA_TYPE if fmt == "parquet" else ARROW_STREAM_MEDIA_TYPE
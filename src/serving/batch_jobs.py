@@ -0,0 +1,283 @@
+# src/serving/batch_jobs.py
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+from src.logger import logging
+from src.metrics import BATCH_JOBS, BATCH_JOB_ROWS
+from src.pipeline.batch_prediction import BatchPrediction
+from src.pipeline.predict_pipeline import PredictPipeline
+
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+@dataclass
+class BatchJobConfig:
+    # One sub-directory per job holding its input, output and job.json
+    job_dir: str = os.environ.get("BATCH_JOB_DIR", "batch_jobs")
+    # Jobs scored at once, on threads of their own; the real-time inference pool is never used
+    max_workers: int = int(os.environ.get("BATCH_JOB_WORKERS", 1))
+    # Jobs waiting for a worker before new submissions are refused
+    max_queued: int = int(os.environ.get("BATCH_JOB_MAX_QUEUED", 16))
+    max_upload_bytes: int = int(os.environ.get("BATCH_JOB_MAX_UPLOAD_BYTES", 2 * 1024 ** 3))
+    # Finished jobs and their files are deleted after this many seconds
+    retention_seconds: float = float(os.environ.get("BATCH_JOB_RETENTION_SECONDS", 24 * 3600))
+    # Jobs whose upload never completed (e.g. the client disconnected) are deleted after this many seconds
+    upload_timeout_seconds: float = float(os.environ.get("BATCH_JOB_UPLOAD_TIMEOUT_SECONDS", 3600))
+    # Scheduling niceness of job threads (Linux), so interactive requests get the CPU first
+    nice: int = int(os.environ.get("BATCH_JOB_NICE", 10))
+
+
+class BatchJobsFull(Exception):
+    """Raised when too many jobs are already queued or running"""
+
+
+class JobNotFound(KeyError):
+    """Raised for an unknown or expired job id"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled"""
+
+
+class BatchJobManager:
+    """
+    Runs uploaded batch files through BatchPrediction as background jobs.
+
+    Jobs run on a small thread pool of their own, separate from the real-time
+    inference executor, and are admitted only while fewer than
+    max_workers + max_queued are pending, so a backfill cannot take workers or
+    queue slots from interactive predictions. Each job's state lives in
+    job.json next to its files and is rewritten after every chunk, so any
+    worker process of a prefork server can report progress, serve results or
+    cancel a job started by another.
+    """
+
+    def __init__(self, config: BatchJobConfig = None):
+        self.config = config or BatchJobConfig()
+        self._pool = ThreadPoolExecutor(max_workers=self.config.max_workers, thread_name_prefix="batch-job")
+        self._lock = threading.Lock()
+        self._futures = {}
+        # Jobs created but not started yet (job_id -> created at); they hold a slot while their file uploads
+        self._reserved = {}
+        os.makedirs(self.config.job_dir, exist_ok=True)
+
+    def _path(self, job_id, name=""):
+        if not JOB_ID_PATTERN.match(job_id):
+            raise JobNotFound(job_id)
+        return os.path.join(self.config.job_dir, job_id, name)
+
+    def input_path(self, job_id):
+        return self._path(job_id, "input.csv")
+
+    def output_path(self, job_id):
+        return self._path(job_id, "output.csv")
+
+    def create(self, filename, model_name=None, model_version=None):
+        """Reserve a job id and directory; the caller writes input_path(job_id) and then calls start()"""
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        created_at = time.time()
+        with self._lock:
+            pending = len(self._reserved) + sum(1 for future in self._futures.values() if not future.done())
+            if pending >= self.config.max_workers + self.config.max_queued:
+                raise BatchJobsFull(f"{pending} batch jobs already queued or running")
+            # Held from here on, so concurrent uploads cannot all pass the check above
+            self._reserved[job_id] = created_at
+
+        try:
+            os.makedirs(self._path(job_id))
+        except OSError:
+            self.discard(job_id)
+            raise
+        self._write(job_id, {
+            "job_id": job_id,
+            "status": "created",
+            "filename": filename,
+            "model_name": model_name,
+            "model_version": model_version,
+            "created_at": created_at,
+            "started_at": None,
+            "finished_at": None,
+            "rows_done": 0,
+            "total_rows": None,
+            "summary": None,
+            "error": None,
+        })
+        return job_id
+
+    def start(self, job_id, pipeline: PredictPipeline):
+        self._update(job_id, status="queued")
+        BATCH_JOBS.labels("queued").inc()
+        with self._lock:
+            self._reserved.pop(job_id, None)
+            self._futures[job_id] = self._pool.submit(self._run, job_id, pipeline)
+
+    def discard(self, job_id):
+        """Remove a job that was created but never started (e.g. its upload was rejected) and free its slot"""
+        shutil.rmtree(self._path(job_id), ignore_errors=True)
+        with self._lock:
+            self._reserved.pop(job_id, None)
+
+    def _run(self, job_id, pipeline):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.config.nice)
+        except (AttributeError, OSError):
+            pass
+
+        if self._cancel_requested(job_id):
+            self._finish(job_id, "cancelled")
+            return
+
+        self._update(job_id, status="running", started_at=time.time())
+        logging.info(f"Batch job {job_id} started")
+        rows_done = [0]
+
+        def progress(done, total):
+            BATCH_JOB_ROWS.inc(done - rows_done[0])
+            rows_done[0] = done
+            self._update(job_id, rows_done=done, total_rows=total)
+            if self._cancel_requested(job_id):
+                raise JobCancelled(job_id)
+
+        try:
+            summary = BatchPrediction(pipeline).predict_batch(
+                # A job is never resumed, so a failed or cancelled one leaves nothing behind
+                self.input_path(job_id), self.output_path(job_id), progress=progress, checkpoint=False
+            )
+        except Exception as e:
+            if self._cancel_requested(job_id):
+                self._finish(job_id, "cancelled")
+                logging.info(f"Batch job {job_id} cancelled after {rows_done[0]} rows")
+            else:
+                self._finish(job_id, "failed", error=str(e))
+                logging.error(f"Batch job {job_id} failed: {e}")
+            return
+
+        summary.pop("output_file", None)
+        self._finish(job_id, "succeeded", summary=summary)
+        logging.info(f"Batch job {job_id} finished: {summary['total_predictions']} rows")
+
+    def _finish(self, job_id, status, **fields):
+        BATCH_JOBS.labels(status).inc()
+        self._update(job_id, status=status, finished_at=time.time(), **fields)
+        # Input is no longer needed; keep the result for download
+        try:
+            os.remove(self.input_path(job_id))
+        except OSError:
+            pass
+
+    def get(self, job_id):
+        """Job state with progress (rows/sec and ETA) derived from it"""
+        try:
+            with open(self._path(job_id, "job.json"), encoding="utf-8") as file_obj:
+                job = json.load(file_obj)
+        except FileNotFoundError:
+            raise JobNotFound(job_id)
+
+        rows_per_second = eta_seconds = None
+        if job["started_at"]:
+            elapsed = (job["finished_at"] or time.time()) - job["started_at"]
+            if elapsed > 0 and job["rows_done"]:
+                rows_per_second = job["rows_done"] / elapsed
+                if job["status"] == "running" and job["total_rows"]:
+                    eta_seconds = (job["total_rows"] - job["rows_done"]) / rows_per_second
+
+        job["progress"] = {
+            "rows_done": job["rows_done"],
+            "total_rows": job["total_rows"],
+            "percent": round(100.0 * job["rows_done"] / job["total_rows"], 1) if job["total_rows"] else None,
+            "rows_per_second": round(rows_per_second, 1) if rows_per_second else None,
+            "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None,
+        }
+        for key in ("created_at", "started_at", "finished_at"):
+            if job[key]:
+                job[key] = datetime.fromtimestamp(job[key]).isoformat()
+        return job
+
+    def list(self):
+        jobs = []
+        for job_id in os.listdir(self.config.job_dir):
+            try:
+                jobs.append(self.get(job_id))
+            except (JobNotFound, ValueError):
+                continue
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def cancel(self, job_id):
+        """Ask a job to stop. A queued job never starts; a running one stops after its current chunk."""
+        job = self.get(job_id)
+        if job["status"] in FINISHED_STATES:
+            return job
+        open(self._path(job_id, "cancel"), "w").close()
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self._finish(job_id, "cancelled")
+        return self.get(job_id)
+
+    def _cancel_requested(self, job_id):
+        return os.path.exists(self._path(job_id, "cancel"))
+
+    def _write(self, job_id, job):
+        # Readers in other processes must never see a partial file
+        tmp_path = self._path(job_id, f"job.json.{os.getpid()}.{threading.get_ident()}")
+        with open(tmp_path, "w", encoding="utf-8") as file_obj:
+            json.dump(job, file_obj)
+        os.replace(tmp_path, self._path(job_id, "job.json"))
+
+    def _update(self, job_id, **fields):
+        with open(self._path(job_id, "job.json"), encoding="utf-8") as file_obj:
+            job = json.load(file_obj)
+        job.update(fields)
+        self._write(job_id, job)
+
+    def cleanup(self):
+        """Delete finished jobs older than the retention period, and jobs whose upload never completed"""
+        now = time.time()
+        cutoff = now - self.config.retention_seconds
+        upload_cutoff = now - self.config.upload_timeout_seconds
+        with self._lock:
+            # Also covers reservations whose job directory another worker process has already removed
+            for job_id in [job_id for job_id, created_at in self._reserved.items() if created_at < upload_cutoff]:
+                del self._reserved[job_id]
+
+        for job_id in os.listdir(self.config.job_dir):
+            try:
+                with open(self._path(job_id, "job.json"), encoding="utf-8") as file_obj:
+                    job = json.load(file_obj)
+            except (JobNotFound, OSError, ValueError):
+                continue
+            expired = job["status"] in FINISHED_STATES and job["finished_at"] < cutoff
+            abandoned = job["status"] == "created" and job["created_at"] < upload_cutoff
+            if expired or abandoned:
+                if abandoned:
+                    logging.warning(f"Batch job {job_id} was never started; its upload did not complete")
+                shutil.rmtree(self._path(job_id), ignore_errors=True)
+                with self._lock:
+                    self._futures.pop(job_id, None)
+                    self._reserved.pop(job_id, None)
+
+    def stats(self):
+        with self._lock:
+            futures = list(self._futures.values())
+            uploading = len(self._reserved)
+        running = sum(1 for future in futures if future.running())
+        return {
+            "max_workers": self.config.max_workers,
+            "max_queued": self.config.max_queued,
+            "uploading": uploading,
+            "running": running,
+            "queued": sum(1 for future in futures if not future.done()) - running,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
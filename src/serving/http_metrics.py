@@ -0,0 +1,49 @@
+# src/serving/http_metrics.py
+import time
+
+from src.metrics import IN_FLIGHT, REQUESTS, REQUEST_SECONDS
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request counts, latency and in-flight
+    requests. Routes outside `paths` are grouped under "other" to keep label
+    cardinality bounded. An entry ending in "*", such as "/api/jobs/*",
+    labels every path under that prefix with the entry itself, so routes
+    carrying ids do not get a label each.
+    """
+
+    def __init__(self, app, paths):
+        self.app = app
+        self.paths = frozenset(path for path in paths if not path.endswith("*"))
+        self.prefixes = tuple(path for path in paths if path.endswith("*"))
+
+    def label(self, path):
+        if path in self.paths:
+            return path
+        for prefix in self.prefixes:
+            if path.startswith(prefix[:-1]):
+                return prefix
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = self.label(scope["path"])
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            REQUEST_SECONDS.labels(path).observe(time.perf_counter() - start)
+            REQUESTS.labels(path, status[0]).inc()
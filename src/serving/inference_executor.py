@@ -0,0 +1,169 @@
+# src/serving/inference_executor.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.metrics import REQUESTS_SHED
+from src.serving.admission import DeadlineExceeded, deadline_expired
+
+
+@dataclass
+class InferenceExecutorConfig:
+    max_workers: int = int(os.environ.get("INFERENCE_WORKERS", min(4, os.cpu_count() or 1)))
+    # Calls allowed to wait for a free worker before new ones are rejected
+    max_pending: int = int(os.environ.get("INFERENCE_MAX_PENDING", 256))
+    timeout_seconds: float = float(os.environ.get("INFERENCE_TIMEOUT_SECONDS", 10))
+
+
+class InferenceOverloaded(Exception):
+    """Raised when too many inference calls are already waiting for a worker"""
+
+
+class InferenceTimeout(Exception):
+    """Raised when an inference call does not finish within its timeout"""
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for blocking inference work, so pickle loads, pandas and
+    sklearn never run on the asyncio event loop.
+
+    Threads rather than processes: every worker shares the process-wide
+    ModelCache, and numpy/sklearn release the GIL for the heavy parts.
+    """
+
+    def __init__(self, config: InferenceExecutorConfig = None):
+        self.config = config or InferenceExecutorConfig()
+        self._pool = ThreadPoolExecutor(max_workers=self.config.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.shed = 0
+        self._shed_saturated = REQUESTS_SHED.labels("inference_pool", "saturated")
+        self._shed_deadline = REQUESTS_SHED.labels("inference_pool", "deadline")
+
+    async def run(self, fn, *args, timeout=None, deadline=None):
+        """
+        Run fn(*args) on the pool and await its result. With a deadline
+        (time.monotonic() value), a call still queued when it passes is dropped
+        without running and DeadlineExceeded is raised.
+        """
+        if deadline_expired(deadline):
+            self._record_shed()
+            raise DeadlineExceeded("Request deadline passed before inference was queued")
+
+        with self._lock:
+            if self.pending >= self.config.max_pending:
+                self.rejected += 1
+                self._shed_saturated.inc()
+                raise InferenceOverloaded(f"Inference pool saturated ({self.pending} calls waiting)")
+            self.pending += 1
+
+        future = self._pool.submit(self._call, fn, args, deadline)
+        future.add_done_callback(self._on_done)
+
+        timeout = self.config.timeout_seconds if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # A call that already started keeps its worker until it returns; only the caller is released
+            with self._lock:
+                self.timeouts += 1
+            raise InferenceTimeout(f"Inference did not finish within {timeout:.2f}s")
+
+    def _record_shed(self):
+        with self._lock:
+            self.shed += 1
+        self._shed_deadline.inc()
+
+    def _call(self, fn, args, deadline=None):
+        with self._lock:
+            self.pending -= 1
+        # Nobody is waiting for a result that would arrive after the deadline
+        if deadline is not None and time.monotonic() >= deadline:
+            self._record_shed()
+            raise DeadlineExceeded("Request deadline passed while waiting for an inference worker")
+
+        with self._lock:
+            self.active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def _on_done(self, future):
+        with self._lock:
+            if future.cancelled():
+                # Cancelled before a worker picked it up
+                self.pending -= 1
+            elif isinstance(future.exception(), DeadlineExceeded):
+                pass  # counted as shed
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.config.max_workers,
+                "max_pending": self.config.max_pending,
+                "timeout_seconds": self.config.timeout_seconds,
+                "active": self.active,
+                "pending": self.pending,
+                "saturation": round((self.active + self.pending) / self.config.max_workers, 3),
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "shed": self.shed,
+            }
+
+
+_inference_executor = None
+_inference_executor_lock = threading.Lock()
+# Upper bound on the default pool size, set by prefork workers that share the CPUs
+_max_workers_limit = None
+
+
+def limit_inference_workers(max_workers: int):
+    """Cap the default pool this process builds on first use; an explicit INFERENCE_WORKERS is kept as set"""
+    global _max_workers_limit
+    _max_workers_limit = max(1, max_workers)
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """Return the process-wide InferenceExecutor"""
+    global _inference_executor
+    if _inference_executor is None:
+        with _inference_executor_lock:
+            if _inference_executor is None:
+                config = InferenceExecutorConfig()
+                if _max_workers_limit is not None and "INFERENCE_WORKERS" not in os.environ:
+                    config.max_workers = min(config.max_workers, _max_workers_limit)
+                _inference_executor = InferenceExecutor(config)
+                logging.info(f"Inference pool started with {_inference_executor.config.max_workers} workers")
+    return _inference_executor
+
+
+def _reset_after_fork():
+    # Pool threads do not survive fork(); a forked worker builds its own pool on first use
+    global _inference_executor, _inference_executor_lock
+    _inference_executor = None
+    _inference_executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
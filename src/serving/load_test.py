@@ -0,0 +1,417 @@
+# src/serving/load_test.py
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.predict_pipeline import FEATURE_FIELDS
+
+ENDPOINTS = {
+    "predict": "/api/predict",
+    "form": "/predictdata",
+    "batch": "/api/predict/batch",
+    "stream": "/api/predict/stream",
+}
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _default_mix():
+    return {"predict": 1.0}
+
+
+@dataclass
+class LoadTestConfig:
+    # None runs the app in-process over ASGI; otherwise e.g. "http://localhost:8080"
+    base_url: str = None
+    concurrency: int = 16
+    # Target request rate; 0 sends as fast as `concurrency` allows (closed loop)
+    rps: float = 0.0
+    duration_seconds: float = 30.0
+    # Stop after this many requests instead of after duration_seconds; 0 disables
+    total_requests: int = 0
+    # JSONL request log to replay; readings are synthesized from data_path when unset
+    requests_file: str = None
+    data_path: str = os.path.join("Data", "predictive_maintenance.csv")
+    # Relative weights of synthesized traffic per endpoint name in ENDPOINTS
+    mix: dict = field(default_factory=_default_mix)
+    batch_size: int = 100
+    warmup_requests: int = 20
+    timeout_seconds: float = 30.0
+    output_dir: str = "load_tests"
+    seed: int = 42
+
+
+@dataclass
+class PlannedRequest:
+    endpoint: str
+    method: str
+    path: str
+    json: object = None
+    form: dict = None
+    content: bytes = None
+    headers: dict = None
+    rows: int = 1
+
+
+def _reading_from_row(row):
+    reading = {}
+    for field_name, column in FEATURE_FIELDS.items():
+        value = row[column]
+        reading[field_name] = value.item() if hasattr(value, "item") else value
+    return reading
+
+
+def _endpoint_name(path):
+    for name, endpoint_path in ENDPOINTS.items():
+        if path == endpoint_path:
+            return name
+    return path
+
+
+def _planned_from_entry(entry):
+    body = entry.get("body")
+    payload = entry.get("json")
+    if isinstance(payload, dict) and isinstance(payload.get("readings"), list):
+        rows = len(payload["readings"])
+    elif isinstance(body, str):
+        rows = max(1, len(body.strip().splitlines()))
+    else:
+        rows = 1
+
+    return PlannedRequest(
+        endpoint=_endpoint_name(entry["path"]),
+        method=entry.get("method", "POST").upper(),
+        path=entry["path"],
+        json=payload,
+        form=entry.get("form"),
+        content=body.encode("utf-8") if isinstance(body, str) else None,
+        headers=entry.get("headers"),
+        rows=rows,
+    )
+
+
+def plan_from_log(path):
+    """
+    Read a JSONL request log. Each line is either a request
+    {"method", "path", "json" | "form" | "body", "headers"} or a bare reading
+    (API field names), which is replayed against /api/predict. Lines that are
+    neither are skipped.
+    """
+    planned, skipped = [], 0
+    with open(path) as file_obj:
+        for line in file_obj:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+            if not isinstance(entry, dict):
+                skipped += 1
+            elif "path" in entry:
+                planned.append(_planned_from_entry(entry))
+            elif set(FEATURE_FIELDS).issubset(entry):
+                planned.append(PlannedRequest("predict", "POST", ENDPOINTS["predict"], json=entry))
+            else:
+                skipped += 1
+
+    if not planned:
+        raise ValueError(f"No replayable requests in {path} ({skipped} lines skipped)")
+    if skipped:
+        logging.warning(f"Skipped {skipped} lines of {path} that are not requests or readings")
+    return planned
+
+
+def plan_from_data(config: LoadTestConfig, count=2000):
+    """Synthesize requests from dataset rows, spread over endpoints by config.mix"""
+    rng = random.Random(config.seed)
+    df = pd.read_csv(config.data_path, usecols=list(FEATURE_FIELDS.values()))
+    readings = [_reading_from_row(row) for _, row in df.sample(n=min(len(df), 5000), random_state=config.seed).iterrows()]
+
+    names = [name for name, weight in config.mix.items() if weight > 0]
+    unknown = set(names) - set(ENDPOINTS)
+    if not names or unknown:
+        raise ValueError(f"Traffic mix must use endpoints from {sorted(ENDPOINTS)}, got {sorted(config.mix)}")
+    weights = [config.mix[name] for name in names]
+
+    planned = []
+    for _ in range(count):
+        endpoint = rng.choices(names, weights)[0]
+        if endpoint == "predict":
+            planned.append(PlannedRequest(endpoint, "POST", ENDPOINTS[endpoint], json=rng.choice(readings)))
+        elif endpoint == "form":
+            planned.append(PlannedRequest(endpoint, "POST", ENDPOINTS[endpoint], form=rng.choice(readings)))
+        else:
+            batch = rng.sample(readings, min(config.batch_size, len(readings)))
+            if endpoint == "batch":
+                planned.append(PlannedRequest(endpoint, "POST", ENDPOINTS[endpoint], json={"readings": batch}, rows=len(batch)))
+            else:
+                body = "".join(json.dumps(reading) + "\n" for reading in batch).encode("utf-8")
+                planned.append(PlannedRequest(
+                    endpoint, "POST", ENDPOINTS[endpoint], content=body,
+                    headers={"Content-Type": "application/x-ndjson"}, rows=len(batch),
+                ))
+    return planned
+
+
+def summarize(latencies, statuses, rows, elapsed):
+    """Throughput and latency percentiles (milliseconds) for one endpoint"""
+    ok = sum(1 for status in statuses if 200 <= status < 300)
+    by_status = defaultdict(int)
+    for status in statuses:
+        by_status[str(status)] += 1
+
+    summary = {
+        "requests": len(statuses),
+        "ok": ok,
+        "errors": len(statuses) - ok,
+        "status_codes": dict(sorted(by_status.items())),
+        "throughput_rps": round(len(statuses) / elapsed, 2) if elapsed else 0.0,
+        "rows_per_second": round(rows / elapsed, 2) if elapsed else 0.0,
+    }
+    if latencies:
+        values = np.asarray(latencies) * 1000
+        summary["latency_ms"] = {
+            "mean": round(float(values.mean()), 3),
+            **{f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES},
+            "max": round(float(values.max()), 3),
+        }
+    return summary
+
+
+class LoadTest:
+    """
+    Replays or synthesizes prediction traffic against the app and reports
+    throughput and latency percentiles per endpoint.
+
+    With a target rate, requests are scheduled on a fixed timetable and
+    latency is measured from the scheduled send time, so a server that falls
+    behind is charged for the queueing it causes (no coordinated omission).
+    Without one, `concurrency` clients send back to back.
+    """
+
+    def __init__(self, config: LoadTestConfig = None):
+        self.config = config or LoadTestConfig()
+
+    def _client(self):
+        import httpx
+
+        limits = httpx.Limits(max_connections=self.config.concurrency, max_keepalive_connections=self.config.concurrency)
+        if self.config.base_url:
+            return httpx.AsyncClient(base_url=self.config.base_url, limits=limits, timeout=self.config.timeout_seconds)
+
+        from app import app
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://load-test",
+            limits=limits, timeout=self.config.timeout_seconds,
+        )
+
+    async def _send(self, client, request: PlannedRequest):
+        """Returns (status, seconds); status 0 means the request never got a response"""
+        start = time.perf_counter()
+        try:
+            response = await client.request(
+                request.method, request.path, json=request.json, data=request.form,
+                content=request.content, headers=request.headers,
+            )
+            status = response.status_code
+            # The form endpoint reports failures inside a 200 HTML page
+            if request.endpoint == "form" and "❌" in response.text:
+                status = 422
+        except Exception as e:
+            logging.debug("Load test request failed: %s", e)
+            status = 0
+        return status, time.perf_counter() - start
+
+    async def _run(self, planned):
+        config = self.config
+        results = defaultdict(lambda: {"latencies": [], "statuses": [], "rows": 0})
+        model_version = None
+
+        async with self._client() as client:
+            if not config.base_url:
+                from app import app
+                await app.router.startup()
+
+            try:
+                for request in planned[:config.warmup_requests]:
+                    await self._send(client, request)
+                try:
+                    health = (await client.get("/health")).json()
+                    model_version = health.get("readiness", {}).get("model", {}).get("version")
+                except Exception:
+                    pass
+
+                semaphore = asyncio.Semaphore(config.concurrency)
+                deadline = time.perf_counter() + config.duration_seconds
+                limit = config.total_requests or None
+                tasks = []
+
+                async def fire(request, scheduled):
+                    async with semaphore:
+                        status, service_seconds = await self._send(client, request)
+                    # Open loop: include time spent waiting behind earlier requests
+                    latency = time.perf_counter() - scheduled if scheduled is not None else service_seconds
+                    result = results[request.endpoint]
+                    result["latencies"].append(latency)
+                    result["statuses"].append(status)
+                    if 200 <= status < 300:
+                        result["rows"] += request.rows
+
+                async def closed_loop_client(offset):
+                    index = offset
+                    while time.perf_counter() < deadline and (limit is None or index < limit):
+                        await fire(planned[index % len(planned)], None)
+                        index += config.concurrency
+
+                start = time.perf_counter()
+                if config.rps > 0:
+                    index = 0
+                    while time.perf_counter() < deadline and (limit is None or index < limit):
+                        scheduled = start + index / config.rps
+                        delay = scheduled - time.perf_counter()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        tasks.append(asyncio.create_task(fire(planned[index % len(planned)], scheduled)))
+                        index += 1
+                    await asyncio.gather(*tasks)
+                else:
+                    await asyncio.gather(*(closed_loop_client(offset) for offset in range(config.concurrency)))
+                elapsed = time.perf_counter() - start
+            finally:
+                if not config.base_url:
+                    await app.router.shutdown()
+
+        return results, elapsed, model_version
+
+    def run(self):
+        """Run the load test, write the JSON report and return it"""
+        try:
+            config = self.config
+            source = config.requests_file or config.data_path
+            planned = plan_from_log(config.requests_file) if config.requests_file else plan_from_data(config)
+            logging.info(
+                f"Load test: {len(planned)} planned requests from {source}, concurrency {config.concurrency}, "
+                f"target {config.rps or 'max'} rps, target {config.base_url or 'in-process app'}"
+            )
+
+            results, elapsed, model_version = asyncio.run(self._run(planned))
+
+            all_latencies, all_statuses, all_rows = [], [], 0
+            endpoints = {}
+            for endpoint, result in sorted(results.items()):
+                endpoints[endpoint] = summarize(result["latencies"], result["statuses"], result["rows"], elapsed)
+                all_latencies += result["latencies"]
+                all_statuses += result["statuses"]
+                all_rows += result["rows"]
+
+            report = {
+                "timestamp": datetime.now().isoformat(),
+                "git_commit": _git_commit(),
+                "model_version": model_version,
+                "target": config.base_url or "in-process",
+                "source": source,
+                "config": asdict(config),
+                "duration_seconds": round(elapsed, 3),
+                "overall": summarize(all_latencies, all_statuses, all_rows, elapsed),
+                "endpoints": endpoints,
+            }
+
+            os.makedirs(config.output_dir, exist_ok=True)
+            report_path = os.path.join(config.output_dir, f"load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            with open(report_path, "w") as file_obj:
+                json.dump(report, file_obj, indent=2)
+            report["report_path"] = report_path
+            logging.info(f"Load test finished: {report['overall']['throughput_rps']} rps, report at {report_path}")
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def compare_reports(baseline, current):
+    """Per-endpoint throughput and p99 change of `current` against `baseline` (both report dicts)"""
+    comparison = {}
+    for endpoint, summary in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before or "latency_ms" not in before or "latency_ms" not in summary:
+            continue
+        comparison[endpoint] = {
+            "throughput_rps": (before["throughput_rps"], summary["throughput_rps"]),
+            "p99_ms": (before["latency_ms"]["p99"], summary["latency_ms"]["p99"]),
+            "p99_change_pct": round((summary["latency_ms"]["p99"] / before["latency_ms"]["p99"] - 1) * 100, 1)
+            if before["latency_ms"]["p99"] else None,
+        }
+    return comparison
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f"📈 {report['overall']['requests']} requests in {report['duration_seconds']}s "
+          f"against {report['target']} (model {report['model_version']})")
+    for endpoint, summary in report["endpoints"].items():
+        latency = summary.get("latency_ms", {})
+        print(f"   {endpoint:<8} {summary['throughput_rps']:>9.1f} rps  {summary['rows_per_second']:>10.1f} rows/s  "
+              f"p50 {latency.get('p50', 0):.2f}ms  p95 {latency.get('p95', 0):.2f}ms  "
+              f"p99 {latency.get('p99', 0):.2f}ms  max {latency.get('max', 0):.2f}ms  errors {summary['errors']}")
+    if baseline is not None:
+        for endpoint, change in compare_reports(baseline, report).items():
+            print(f"   vs baseline {endpoint:<8} p99 {change['p99_ms'][0]:.2f} -> {change['p99_ms'][1]:.2f}ms "
+                  f"({change['p99_change_pct']:+.1f}%), {change['throughput_rps'][0]:.1f} -> {change['throughput_rps'][1]:.1f} rps")
+    print(f"📄 Report: {report['report_path']}")
+
+
+if __name__ == "__main__":
+    # python -m src.serving.load_test --mix predict=0.8,batch=0.2 --rps 200 --duration 30
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test the prediction API")
+    parser.add_argument("--url", help="Server base URL; the app runs in-process when omitted")
+    parser.add_argument("--requests-file", help="JSONL request log to replay")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rps", type=float, default=0.0, help="Target request rate (0 = as fast as possible)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests")
+    parser.add_argument("--mix", default="predict=1", help="Synthesized traffic mix, e.g. predict=0.7,form=0.1,batch=0.2")
+    parser.add_argument("--batch-size", type=int, default=100, help="Readings per batch/stream request")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    mix = {name: float(weight) for name, weight in (item.split("=") for item in args.mix.split(","))}
+    report = LoadTest(LoadTestConfig(
+        base_url=args.url,
+        concurrency=args.concurrency,
+        rps=args.rps,
+        duration_seconds=args.duration,
+        total_requests=args.requests,
+        requests_file=args.requests_file,
+        mix=mix,
+        batch_size=args.batch_size,
+    )).run()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            baseline = json.load(file_obj)
+    print_report(report, baseline)
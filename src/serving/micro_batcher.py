@@ -0,0 +1,196 @@
+# src/serving/micro_batcher.py
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.metrics import REQUESTS_SHED
+from src.pipeline.predict_pipeline import PredictPipeline
+from src.serving.admission import DeadlineExceeded, deadline_expired
+from src.serving.inference_executor import (
+    InferenceExecutor,
+    InferenceOverloaded,
+    InferenceTimeout,
+    get_inference_executor,
+)
+
+
+@dataclass
+class MicroBatcherConfig:
+    enabled: bool = os.environ.get("MICRO_BATCH_ENABLED", "1") == "1"
+    # Longest time a request waits for others to join its batch
+    window_ms: float = float(os.environ.get("MICRO_BATCH_WINDOW_MS", 2))
+    max_batch_size: int = int(os.environ.get("MICRO_BATCH_MAX_SIZE", 64))
+    max_queue_depth: int = int(os.environ.get("MICRO_BATCH_QUEUE_DEPTH", 1024))
+
+
+class BatcherOverloaded(Exception):
+    """Raised when the micro-batch queue is full"""
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one predict_proba call.
+
+    Requests are queued with a future each. A dispatcher task takes whatever is
+    queued, waits up to `window_ms` for more rows (only while recent batches
+    show there is concurrency to exploit, so an idle server adds no latency),
+    scores the batch once and fans the results back out to the futures.
+    """
+
+    def __init__(self, pipeline: PredictPipeline = None, config: MicroBatcherConfig = None,
+                 executor: InferenceExecutor = None):
+        self.pipeline = pipeline or PredictPipeline()
+        self.config = config or MicroBatcherConfig()
+        self.executor = executor or get_inference_executor()
+        self._queue = None
+        self._task = None
+
+        # Metrics; only touched from the event loop thread
+        self.batches = 0
+        self.rows = 0
+        self.rejected = 0
+        self.shed = 0
+        self.max_observed_batch = 0
+        self.avg_batch_size = 1.0
+        self.last_batch_seconds = 0.0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.config.max_queue_depth)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def predict(self, row, deadline=None):
+        """
+        Score one row (values in FEATURE_COLUMNS order). Returns (prediction, confidence).
+        A row whose deadline (time.monotonic() value) passes while it is queued is
+        dropped from its batch and DeadlineExceeded is raised.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((row, future, deadline))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            REQUESTS_SHED.labels("micro_batch", "queue_full").inc()
+            raise BatcherOverloaded(f"Prediction queue is full ({self.config.max_queue_depth} pending)")
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        window = self.config.window_ms / 1000.0
+
+        while True:
+            batch = [await self._queue.get()]
+            self._drain(batch)
+
+            # Only hold the batch open when recent traffic shows concurrent callers
+            if self.avg_batch_size > 1.1 and len(batch) < self.config.max_batch_size:
+                deadline = loop.time() + window
+                while len(batch) < self.config.max_batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                    self._drain(batch)
+
+            await self._dispatch(batch)
+
+    def _drain(self, batch):
+        while len(batch) < self.config.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    async def _dispatch(self, batch):
+        # Skip callers that already gave up (timed out or disconnected)
+        batch = [item for item in batch if not item[1].done()]
+
+        # Drop rows whose deadline passed in the queue instead of scoring them
+        live = []
+        for item in batch:
+            if deadline_expired(item[2]):
+                self.shed += 1
+                REQUESTS_SHED.labels("micro_batch", "deadline").inc()
+                item[1].set_exception(DeadlineExceeded("Request deadline passed while waiting for a micro-batch"))
+            else:
+                live.append(item)
+        batch = live
+        if not batch:
+            return
+
+        rows = [row for row, _, _ in batch]
+        # The batch is worth computing until its most patient row stops waiting
+        deadlines = [deadline for _, _, deadline in batch]
+        batch_deadline = None if None in deadlines else max(deadlines)
+        start = time.perf_counter()
+
+        try:
+            predictions, confidences = await self.executor.run(self._score, rows, deadline=batch_deadline)
+            outcomes = [
+                (int(predictions[i]), float(confidences[i]) if confidences is not None else None)
+                for i in range(len(rows))
+            ]
+        except (InferenceOverloaded, InferenceTimeout, DeadlineExceeded) as e:
+            # Capacity problems apply to every row; retrying one by one would only add load
+            outcomes = [e] * len(rows)
+        except Exception as e:
+            # One bad row must not fail its neighbours: retry the rows one by one
+            logging.warning(f"Micro-batch of {len(rows)} failed, scoring rows individually: {e}")
+            outcomes = []
+            for row in rows:
+                try:
+                    predictions, confidences = await self.executor.run(self._score, [row])
+                    outcomes.append((int(predictions[0]), float(confidences[0]) if confidences is not None else None))
+                except Exception as row_error:
+                    outcomes.append(row_error)
+
+        for (_, future, _), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+        self._record(len(batch), time.perf_counter() - start)
+
+    def _score(self, rows):
+        return self.pipeline.predict_rows(rows)
+
+    def _record(self, batch_size, seconds):
+        self.batches += 1
+        self.rows += batch_size
+        self.max_observed_batch = max(self.max_observed_batch, batch_size)
+        self.avg_batch_size = 0.9 * self.avg_batch_size + 0.1 * batch_size
+        self.last_batch_seconds = seconds
+
+    def stats(self):
+        return {
+            "enabled": self.config.enabled,
+            "window_ms": self.config.window_ms,
+            "max_batch_size": self.config.max_batch_size,
+            "max_queue_depth": self.config.max_queue_depth,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "avg_batch_size": round(self.avg_batch_size, 3),
+            "max_observed_batch": self.max_observed_batch,
+            "last_batch_seconds": round(self.last_batch_seconds, 6),
+        }
@@ -0,0 +1,148 @@
+# src/serving/model_router.py
+import os
+import random
+import time
+from dataclasses import dataclass
+
+from src.logger import logging
+from src.metrics import MODEL_REQUEST_SECONDS, MODEL_REQUESTS, MODEL_ROWS
+from src.pipeline.prediction_cache import PredictionCache
+from src.pipeline.predict_pipeline import ModelCache, PredictPipeline, PredictPipelineConfig, get_model_cache
+from src.serving.inference_executor import InferenceExecutor
+from src.serving.micro_batcher import MicroBatcher
+
+
+@dataclass
+class ModelRouterConfig:
+    # Comma separated name=path/to/model.pkl@weight entries, e.g. "rf=artifacts/model.pkl@0.9,lr=artifacts/lr/model.pkl@0.1".
+    # Each model's preprocessor.pkl and tree_engine.mmap are read from its directory. Weight 0 routes only by header.
+    # Empty serves artifacts/model.pkl alone.
+    routes: str = os.environ.get("MODEL_ROUTES", "")
+    # Request header naming the model to use, by route name or version
+    header: str = os.environ.get("MODEL_ROUTE_HEADER", "x-model-version")
+    default_name: str = os.environ.get("MODEL_DEFAULT_NAME", "default")
+
+
+class UnknownModel(KeyError):
+    """Raised when a request asks for a model that is not being served"""
+
+
+def parse_routes(spec):
+    """[(name, model_path, weight)] from a MODEL_ROUTES string"""
+    routes = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, sep, target = entry.partition("=")
+        if not sep or not name.strip() or not target.strip():
+            raise ValueError(f"Invalid model route {entry!r}, expected name=path/to/model.pkl[@weight]")
+        path, _, weight = target.rpartition("@") if "@" in target else (target, "", "1")
+        weight = float(weight)
+        if weight < 0:
+            raise ValueError(f"Model route {name!r} has a negative weight")
+        routes.append((name.strip(), path.strip(), weight))
+
+    names = [name for name, _, _ in routes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate model route names in {spec!r}")
+    return routes
+
+
+class ModelRoute:
+    """One served model version with its own cached artifacts, micro-batcher and prediction cache"""
+
+    def __init__(self, name: str, weight: float, model_cache: ModelCache, executor: InferenceExecutor = None):
+        self.name = name
+        self.weight = weight
+        self.model_cache = model_cache
+        self.pipeline = PredictPipeline(model_cache)
+        # Batches and cached results must never mix models, so each route has its own
+        self.batcher = MicroBatcher(pipeline=self.pipeline, executor=executor)
+        self.cache = PredictionCache(model_cache=model_cache)
+        self._requests = MODEL_REQUESTS.labels(name)
+        self._rows = MODEL_ROWS.labels(name)
+        self._seconds = MODEL_REQUEST_SECONDS.labels(name)
+
+    @property
+    def version(self):
+        """Content hash of the snapshot currently served by this route"""
+        return self.model_cache.get().version
+
+    def observe(self, rows, start):
+        """Record one request of `rows` rows that started at time.perf_counter() value `start`"""
+        self._seconds.observe(time.perf_counter() - start)
+        self._requests.inc()
+        self._rows.inc(rows)
+
+    def stats(self):
+        status = self.model_cache.status()
+        return {
+            "weight": self.weight,
+            "model_path": self.model_cache.config.model_path,
+            "version": status.get("version"),
+            "model_type": status.get("model_type"),
+            "loaded": status["loaded"],
+            "last_error": status["last_error"],
+        }
+
+
+class ModelRouter:
+    """
+    Serves several model versions side by side. Each request goes to the
+    route named (by name or version) in its MODEL_ROUTE_HEADER header, or
+    otherwise to one picked at random in proportion to the route weights.
+    """
+
+    def __init__(self, config: ModelRouterConfig = None, executor: InferenceExecutor = None):
+        self.config = config or ModelRouterConfig()
+        default_path = os.path.normpath(PredictPipelineConfig().model_path)
+        spec = parse_routes(self.config.routes) or [(self.config.default_name, default_path, 1.0)]
+
+        self.routes = {}
+        for name, model_path, weight in spec:
+            if os.path.normpath(model_path) == default_path:
+                # Shares the process-wide cache, so prefork preloading and hot reload keep working
+                model_cache = get_model_cache()
+            else:
+                directory = os.path.dirname(model_path)
+                model_cache = ModelCache(PredictPipelineConfig(
+                    model_path=model_path,
+                    preprocessor_path=os.path.join(directory, "preprocessor.pkl"),
+                    tree_engine_path=os.path.join(directory, "tree_engine.mmap"),
+                ))
+            self.routes[name] = ModelRoute(name, weight, model_cache, executor)
+
+        # The first listed route backs the single-model dependencies and component stats
+        self.default = next(iter(self.routes.values()))
+        self._weighted = [route for route in self.routes.values() if route.weight > 0] or [self.default]
+        self._weights = [route.weight for route in self._weighted]
+        if len(self.routes) > 1:
+            logging.info("Model routes: " + ", ".join(f"{r.name} ({r.model_cache.config.model_path}, weight {r.weight})" for r in self.routes.values()))
+
+    def select(self, requested: str = None) -> ModelRoute:
+        """The route a request names, or a weighted random one when it names none"""
+        if requested:
+            route = self.routes.get(requested)
+            if route is not None:
+                return route
+            for route in self.routes.values():
+                artifacts = route.model_cache._artifacts
+                # The 12-character version or the full hash; a shorter prefix could name any route
+                if artifacts is not None and requested in (artifacts.version, artifacts.content_hash):
+                    return route
+            raise UnknownModel(f"Unknown model {requested!r}; serving {', '.join(self.routes)}")
+
+        if len(self._weighted) == 1:
+            return self._weighted[0]
+        return random.choices(self._weighted, weights=self._weights)[0]
+
+    def load_all(self):
+        """Load and warm up every route's artifacts; blocking"""
+        return {name: route.model_cache.get() for name, route in self.routes.items()}
+
+    async def stop(self):
+        for route in self.routes.values():
+            await route.batcher.stop()
+            if route.model_cache is not get_model_cache():
+                route.model_cache.stop()
+
+    def stats(self):
+        return {name: route.stats() for name, route in self.routes.items()}
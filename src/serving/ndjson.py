@@ -0,0 +1,111 @@
+# src/serving/ndjson.py
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+
+from starlette.responses import StreamingResponse
+
+
+@dataclass
+class NDJSONStreamConfig:
+    # Rows parsed and scored together; bounds server memory per stream
+    chunk_rows: int = int(os.environ.get("NDJSON_CHUNK_ROWS", 5000))
+    # A partial chunk is scored once its oldest line has waited this long for more input; 0 flushes whenever the upload stalls
+    flush_ms: float = float(os.environ.get("NDJSON_FLUSH_MS", 50))
+    max_line_bytes: int = int(os.environ.get("NDJSON_MAX_LINE_BYTES", 64 * 1024))
+
+
+class NDJSONLineTooLong(Exception):
+    """Raised when an NDJSON line exceeds the configured size limit"""
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that does not listen for disconnects.
+
+    The stock StreamingResponse consumes `receive()` in a background task to
+    notice disconnects, which would steal request body chunks from an endpoint
+    that is still reading its upload while it streams results. Here the body
+    iterator owns `receive()`; a disconnect surfaces as ClientDisconnect from
+    request.stream().
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_line_chunks(byte_stream, config: NDJSONStreamConfig):
+    """
+    Group an async stream of bytes into lists of at most `chunk_rows` non-empty
+    lines. A shorter list is yielded when no more data arrives within `flush_ms`
+    of its oldest line, so a slow producer gets results while it is still
+    uploading. The next read stays pending while a chunk is scored.
+    """
+    loop = asyncio.get_running_loop()
+    stream = byte_stream.__aiter__()
+    pending = None
+    buffer = b""
+    lines = []
+    oldest = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(stream.__anext__())
+            timeout = max(oldest + config.flush_ms / 1000 - loop.time(), 0) if lines else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield lines
+                lines = []
+                continue
+
+            try:
+                data = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                break
+            pending = None
+
+            buffer += data
+            *complete, buffer = buffer.split(b"\n")
+            # A single read can hold many complete lines; every one of them is checked, not just the tail
+            if len(buffer) > config.max_line_bytes or any(len(line) > config.max_line_bytes for line in complete):
+                raise NDJSONLineTooLong(f"NDJSON line longer than {config.max_line_bytes} bytes")
+
+            for line in complete:
+                if line.strip():
+                    if not lines:
+                        oldest = loop.time()
+                    lines.append(line)
+                    if len(lines) >= config.chunk_rows:
+                        yield lines
+                        lines = []
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+    if buffer.strip():
+        lines.append(buffer)
+    if lines:
+        yield lines
+
+
+def parse_lines(lines):
+    """Decode NDJSON lines; undecodable lines become None and are reported by the caller"""
+    readings = []
+    for line in lines:
+        try:
+            readings.append(json.loads(line))
+        except ValueError:
+            readings.append(None)
+    return readings
+
+
+def dump_lines(records):
+    """Serialize dicts as one NDJSON payload"""
+    return "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
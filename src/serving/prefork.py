@@ -0,0 +1,201 @@
+# src/serving/prefork.py
+import gc
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging, use_worker_log_files
+from src.serving.inference_executor import limit_inference_workers
+
+
+@dataclass
+class PreforkConfig:
+    host: str = os.environ.get("HOST", "0.0.0.0")
+    port: int = int(os.environ.get("PORT", 8080))
+    workers: int = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+    backlog: int = 2048
+    # Seconds a worker gets to finish in-flight requests on shutdown
+    graceful_timeout: float = 30.0
+
+
+# Set in forked workers only: (slot, shared warm flags)
+_worker_state = None
+
+
+def mark_worker_warm():
+    """Called by a worker once its model is loaded and warmed up; no-op outside prefork mode"""
+    if _worker_state is not None:
+        slot, warm_flags = _worker_state
+        warm_flags[slot] = 1
+
+
+def cluster_status():
+    """Readiness of the whole worker group, or None when not running under PreforkServer"""
+    if _worker_state is None:
+        return None
+    slot, warm_flags = _worker_state
+    warm = sum(warm_flags)
+    return {
+        "worker_slot": slot,
+        "pid": os.getpid(),
+        "workers": len(warm_flags),
+        "warm_workers": warm,
+        "ready": warm == len(warm_flags),
+    }
+
+
+class PreforkServer:
+    """
+    Pre-fork uvicorn server.
+
+    The parent imports the app and loads the model and preprocessor once,
+    without starting any threads, freezes the GC so collections do not write
+    to the shared objects, binds the listening socket and forks the workers.
+    Each worker then starts its own hot-reload watcher, and sizes its inference
+    pool to its share of the CPUs. The large model arrays stay shared
+    copy-on-write between workers, so resident memory grows very little per
+    worker. Workers flag themselves warm in shared memory after warm-up; the
+    group is reported ready only once every flag is set. Workers that exit are
+    respawned.
+    """
+
+    def __init__(self, config: PreforkConfig = None):
+        self.config = config or PreforkConfig()
+        self.app = None
+        self.sock = None
+        self.warm_flags = None
+        self.children = {}
+        self.running = False
+
+    def preload(self):
+        """Import the app and load the model in the parent so workers inherit them"""
+        try:
+            from app import app
+            from src.pipeline.predict_pipeline import get_model_cache
+
+            self.app = app
+            # No watcher thread yet: forking with live threads can leave their locks held in the children
+            artifacts = get_model_cache().get(watch=False)
+            logging.info(
+                f"Preloaded model version {artifacts.version} in {artifacts.load_seconds:.3f}s "
+                f"(warm-up {artifacts.warmup['seconds']:.3f}s)"
+            )
+
+            # Move everything allocated so far out of the collector's reach
+            gc.collect()
+            gc.freeze()
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.config.host, self.config.port))
+        sock.listen(self.config.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, slot):
+        self.warm_flags[slot] = 0
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(slot)
+        self.children[pid] = slot
+        logging.info(f"Started worker {slot} (pid {pid})")
+
+    def _run_worker(self, slot):
+        global _worker_state
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            use_worker_log_files()
+            _worker_state = (slot, self.warm_flags)
+
+            from src.pipeline.predict_pipeline import get_model_cache
+            get_model_cache().start_watcher()
+            # The workers share the cores; one pool per CPU in each of them would oversubscribe them
+            limit_inference_workers((os.cpu_count() or 1) // self.config.workers)
+
+            import uvicorn
+            config = uvicorn.Config(
+                self.app,
+                lifespan="on",
+                timeout_graceful_shutdown=self.config.graceful_timeout,
+            )
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except Exception as e:
+            logging.error(f"Worker {slot} crashed: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _handle_signal(self, signum, frame):
+        self.running = False
+
+    def serve(self):
+        if not hasattr(os, "fork"):
+            raise CustomException("Multi-worker serving requires fork(); use 'python app.py' on this platform", sys)
+
+        if self.app is None:
+            self.preload()
+
+        self.sock = self._bind()
+        self.warm_flags = multiprocessing.Array("b", self.config.workers, lock=False)
+        self.running = True
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        for slot in range(self.config.workers):
+            self._spawn(slot)
+        logging.info(f"Serving on {self.config.host}:{self.config.port} with {self.config.workers} workers")
+
+        announced_ready = False
+        while self.running:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid and pid in self.children:
+                slot = self.children.pop(pid)
+                logging.warning(f"Worker {slot} (pid {pid}) exited with status {status}; respawning")
+                announced_ready = False
+                time.sleep(1)
+                if self.running:
+                    self._spawn(slot)
+                continue
+
+            if not announced_ready and sum(self.warm_flags) == self.config.workers:
+                announced_ready = True
+                logging.info(f"All {self.config.workers} workers warm; ready")
+                print(f"✅ All {self.config.workers} workers warm and ready on port {self.config.port}")
+
+            time.sleep(0.2)
+
+        self.shutdown()
+
+    def shutdown(self):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+        deadline = time.time() + self.config.graceful_timeout
+        while self.children and time.time() < deadline:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                self.children.pop(pid, None)
+            else:
+                time.sleep(0.1)
+
+        for pid in list(self.children):
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children.clear()
+
+        if self.sock is not None:
+            self.sock.close()
+        logging.info("Prefork server stopped")
@@ -0,0 +1,241 @@
+# src/serving/shadow.py
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.logger import logging
+from src.metrics import SHADOW_PROBABILITY_DELTA, SHADOW_REQUESTS, SHADOW_ROWS, SHADOW_SECONDS
+from src.pipeline.predict_pipeline import ModelCache, PredictPipelineConfig, _score
+
+
+@dataclass
+class ShadowConfig:
+    # Candidate model scored alongside the served one; shadowing is off when unset
+    model_path: str = os.environ.get("SHADOW_MODEL_PATH", "")
+    # Defaults to the served preprocessor, for candidates retrained on the same features
+    preprocessor_path: str = os.environ.get("SHADOW_PREPROCESSOR_PATH", os.path.join("artifacts", "preprocessor.pkl"))
+    # Requests (or batches) waiting for the shadow; new ones are dropped once it is full
+    max_queue: int = int(os.environ.get("SHADOW_MAX_QUEUE", 1024))
+    # Fraction of requests copied to the shadow
+    sample_rate: float = float(os.environ.get("SHADOW_SAMPLE_RATE", 1.0))
+    # Single-row requests drained from the queue and scored in one call
+    max_batch_rows: int = int(os.environ.get("SHADOW_MAX_BATCH_ROWS", 256))
+    # Scheduling niceness of the shadow thread (Linux); the served model always gets the CPU first
+    nice: int = int(os.environ.get("SHADOW_NICE", 10))
+
+    @property
+    def enabled(self):
+        return bool(self.model_path)
+
+
+def failure_probability(predictions, confidences):
+    """Probability of class 1 from (label, max probability) pairs of a binary classifier"""
+    predictions = np.asarray(predictions)
+    confidences = np.asarray(confidences, dtype=float)
+    return np.where(predictions == 1, confidences, 1.0 - confidences)
+
+
+class ShadowScorer:
+    """
+    Scores a copy of live traffic with a candidate model, off the request path.
+
+    Request handlers call submit() with the features they scored and the served
+    model's answer. That is a non-blocking put on a bounded queue: when the
+    shadow falls behind, copies are dropped rather than queued, so the served
+    path never waits on it. A single low-priority daemon thread drains the
+    queue, coalescing single-row requests into one transform and predict_proba
+    call, and records agreement with the served model, the difference in
+    failure probability and its own latency.
+    """
+
+    def __init__(self, config: ShadowConfig = None):
+        self.config = config or ShadowConfig()
+        self.model_cache = ModelCache(PredictPipelineConfig(
+            model_path=self.config.model_path,
+            preprocessor_path=self.config.preprocessor_path,
+        ))
+        self._queue = queue.Queue(maxsize=self.config.max_queue)
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng()
+
+        self.submitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.rows = 0
+        self.agreed = 0
+        self.delta_sum = 0.0
+        self.delta_rows = 0
+        self.max_delta = 0.0
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+            self._thread.start()
+            logging.info(f"Shadow scoring enabled with {self.config.model_path}")
+
+    def stop(self, timeout=5.0):
+        self._stop_event.set()
+        self.model_cache.stop()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, features, predictions, confidences):
+        """
+        Queue a copy of a scored request for the shadow. `features` is a feature
+        DataFrame or a list of raw row tuples; predictions and confidences are
+        the served model's output for it. Never blocks.
+        """
+        if self.config.sample_rate < 1.0 and self._rng.random() >= self.config.sample_rate:
+            return
+        try:
+            self._queue.put_nowait((features, predictions, confidences))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            SHADOW_REQUESTS.labels("dropped").inc()
+            return
+        with self._lock:
+            self.submitted += 1
+
+    def _run(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.config.nice)
+        except (AttributeError, OSError):
+            pass
+
+        while not self._stop_event.is_set():
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # Coalesce queued single-row requests; batches are scored as they came
+            items = [item]
+            rows = len(item[0])
+            while rows < self.config.max_batch_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+                rows += len(item[0])
+
+            try:
+                self._score(items)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                with self._lock:
+                    self.errors += len(items)
+                    repeated, self.last_error = error == self.last_error, error
+                SHADOW_REQUESTS.labels("error").inc(len(items))
+                # A missing or broken candidate fails every batch; log it once, not per request
+                if not repeated:
+                    logging.warning(f"Shadow scoring failed, dropping request copies: {error}")
+            else:
+                with self._lock:
+                    self.last_error = None
+
+    def _score(self, items):
+        artifacts = self.model_cache.get()
+        rows = [item for item in items if isinstance(item[0], list)]
+        frames = [item for item in items if not isinstance(item[0], list)]
+
+        groups = []
+        if rows:
+            groups.append((
+                artifacts.transform_rows([row for features, _, _ in rows for row in features]),
+                np.concatenate([np.asarray(predictions).ravel() for _, predictions, _ in rows]),
+                self._confidences(rows),
+            ))
+        for features, predictions, confidences in frames:
+            groups.append((artifacts.transform(features), np.asarray(predictions).ravel(), self._confidences([(features, predictions, confidences)])))
+
+        for data_scaled, predictions, confidences in groups:
+            start = time.perf_counter()
+            shadow_predictions, shadow_confidences = _score(artifacts.estimator(len(data_scaled)), data_scaled)
+            SHADOW_SECONDS.observe(time.perf_counter() - start)
+            self._compare(predictions, confidences, shadow_predictions, shadow_confidences)
+
+        SHADOW_REQUESTS.labels("scored").inc(len(items))
+
+    @staticmethod
+    def _confidences(items):
+        """Served confidences for the items, or None if any of them has none"""
+        parts = []
+        for _, predictions, confidences in items:
+            if confidences is None:
+                return None
+            parts.append(np.asarray(confidences, dtype=float).ravel())
+        return np.concatenate(parts)
+
+    def _compare(self, predictions, confidences, shadow_predictions, shadow_confidences):
+        agree = int((predictions.astype(int) == np.asarray(shadow_predictions).astype(int)).sum())
+        SHADOW_ROWS.labels("agree").inc(agree)
+        SHADOW_ROWS.labels("disagree").inc(len(predictions) - agree)
+
+        deltas = None
+        if confidences is not None and shadow_confidences is not None:
+            deltas = np.abs(
+                failure_probability(shadow_predictions, shadow_confidences)
+                - failure_probability(predictions, confidences)
+            )
+            for delta in deltas.tolist():
+                SHADOW_PROBABILITY_DELTA.observe(delta)
+
+        with self._lock:
+            self.rows += len(predictions)
+            self.agreed += agree
+            if deltas is not None and len(deltas):
+                self.delta_sum += float(deltas.sum())
+                self.delta_rows += len(deltas)
+                self.max_delta = max(self.max_delta, float(deltas.max()))
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "enabled": True,
+                "model_path": self.config.model_path,
+                "version": self.model_cache.status().get("version"),
+                "queued": self._queue.qsize(),
+                "max_queue": self.config.max_queue,
+                "sample_rate": self.config.sample_rate,
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "rows_compared": self.rows,
+                "agreement_rate": round(self.agreed / self.rows, 4) if self.rows else None,
+                "mean_probability_delta": round(self.delta_sum / self.delta_rows, 4) if self.delta_rows else None,
+                "max_probability_delta": round(self.max_delta, 4),
+                "last_error": self.last_error or self.model_cache.last_error,
+            }
+        return stats
+
+
+if __name__ == "__main__":
+    # Compare a candidate against the served model on the training data:
+    # SHADOW_MODEL_PATH=artifacts/candidate/model.pkl python -m src.serving.shadow
+    from src.pipeline.predict_pipeline import FEATURE_COLUMNS, PredictPipeline
+
+    config = ShadowConfig()
+    if not config.enabled:
+        raise SystemExit("Set SHADOW_MODEL_PATH to the candidate model")
+
+    frame = pd.read_csv(os.path.join("artifacts", "test.csv"))[FEATURE_COLUMNS]
+    predictions, confidences = PredictPipeline().predict_with_confidence(frame)
+
+    shadow = ShadowScorer(config)
+    shadow.start()
+    shadow.submit(frame, predictions, confidences)
+    while shadow.stats()["rows_compared"] + shadow.stats()["errors"] == 0:
+        time.sleep(0.1)
+    shadow.stop()
+    print(shadow.stats())
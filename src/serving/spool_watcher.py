@@ -0,0 +1,282 @@
+# src/serving/spool_watcher.py
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+
+from src.logger import logging
+from src.pipeline.batch_formats import DEFAULT_EXTENSIONS, FORMAT_EXTENSIONS
+from src.pipeline.batch_prediction import BatchPrediction
+from src.pipeline.predict_pipeline import PredictPipeline
+
+
+@dataclass
+class SpoolConfig:
+    # Root holding inbox/, processing/, output/, done/ and failed/
+    spool_dir: str = os.environ.get("SPOOL_DIR", "spool")
+    # Seconds between scans of the inbox
+    poll_interval: float = float(os.environ.get("SPOOL_POLL_SECONDS", 2.0))
+    # A file is claimed only once its size and mtime have not changed for this long, so half-copied exports are left alone
+    settle_seconds: float = float(os.environ.get("SPOOL_SETTLE_SECONDS", 5.0))
+    # Files scored at once; more stay in the inbox, where another daemon sharing the spool can take them
+    max_concurrent: int = int(os.environ.get("SPOOL_MAX_CONCURRENT", 2))
+    # Output format (csv, parquet or feather); empty keeps the input's
+    output_format: str = os.environ.get("SPOOL_OUTPUT_FORMAT", "")
+    # Seconds between throughput summaries in the log and in stats.json
+    stats_interval: float = float(os.environ.get("SPOOL_STATS_SECONDS", 60.0))
+
+
+class SpoolWatcher:
+    """
+    Long-running batch scorer for files dropped into a shared folder.
+
+    The model is loaded once and kept resident (with the usual hot reload),
+    so each file costs only its own read, score and write. Files in inbox/
+    are claimed by renaming them into this daemon's own processing/
+    sub-directory, which is atomic on one filesystem: when several daemons
+    share a spool, exactly one of them gets each file. A scored file moves to
+    done/ with its predictions in output/; a file that fails moves to
+    failed/ next to a .error.txt holding the reason. Files claimed by a
+    daemon on this host that has since died are put back in the inbox at
+    startup, and resume from their batch checkpoint.
+    """
+
+    def __init__(self, config: SpoolConfig = None, pipeline: PredictPipeline = None):
+        self.config = config or SpoolConfig()
+        self.pipeline = pipeline or PredictPipeline()
+        root = self.config.spool_dir
+        self.inbox = os.path.join(root, "inbox")
+        self.output_dir = os.path.join(root, "output")
+        self.done_dir = os.path.join(root, "done")
+        self.failed_dir = os.path.join(root, "failed")
+        self.processing_root = os.path.join(root, "processing")
+        self.owner = f"{socket.gethostname()}.{os.getpid()}"
+        self.processing = os.path.join(self.processing_root, self.owner)
+        for directory in (self.inbox, self.output_dir, self.done_dir, self.failed_dir, self.processing):
+            os.makedirs(directory, exist_ok=True)
+
+        self._pool = ThreadPoolExecutor(max_workers=self.config.max_concurrent, thread_name_prefix="spool")
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        # path -> (size, mtime_ns, first seen unchanged at)
+        self._seen = {}
+        self._active = set()
+
+        self.started_at = time.time()
+        self.files_done = 0
+        self.files_failed = 0
+        self.rows = 0
+        self.bytes = 0
+        self.busy_seconds = 0.0
+        self.last_file = None
+        self.last_error = None
+
+    def run(self):
+        """Watch the inbox until SIGTERM/SIGINT, then let in-flight files finish"""
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        self.pipeline.model_cache.get()
+        self.recover()
+        logging.info(f"Watching {self.inbox} ({self.config.max_concurrent} at a time) as {self.owner}")
+
+        last_stats = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except OSError as e:
+                # A shared folder can disappear for a moment; keep watching
+                logging.warning(f"Spool scan failed: {e}")
+            if time.monotonic() - last_stats >= self.config.stats_interval:
+                last_stats = time.monotonic()
+                self.write_stats()
+            self._stop_event.wait(self.config.poll_interval)
+
+        logging.info("Spool watcher stopping; waiting for files in progress")
+        self._pool.shutdown(wait=True)
+        self.write_stats()
+        try:
+            os.rmdir(self.processing)
+        except OSError:
+            pass
+
+    def _handle_signal(self, signum, frame):
+        self._stop_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def recover(self):
+        """Return files claimed by dead daemons on this host to the inbox"""
+        host = socket.gethostname()
+        for owner in os.listdir(self.processing_root):
+            owner_host, _, pid = owner.rpartition(".")
+            if owner == self.owner or owner_host != host or not pid.isdigit() or _pid_alive(int(pid)):
+                continue
+            directory = os.path.join(self.processing_root, owner)
+            for name in os.listdir(directory):
+                logging.warning(f"Requeueing {name}, claimed by {owner} which is no longer running")
+                os.replace(os.path.join(directory, name), os.path.join(self.inbox, name))
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+    def poll(self):
+        """Claim and start settled inbox files while below max_concurrent"""
+        now = time.monotonic()
+        entries = {}
+        with os.scandir(self.inbox) as scan:
+            for entry in scan:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in FORMAT_EXTENSIONS:
+                    continue
+                stat = entry.stat()
+                entries[entry.path] = (stat.st_size, stat.st_mtime_ns)
+
+        ready = []
+        for path, signature in entries.items():
+            previous = self._seen.get(path)
+            if previous is None or previous[:2] != signature:
+                self._seen[path] = signature + (now,)
+            elif now - previous[2] >= self.config.settle_seconds:
+                ready.append((previous[2], path))
+        # Forget files that left the inbox (claimed here, or by another daemon)
+        self._seen = {path: seen for path, seen in self._seen.items() if path in entries}
+
+        # Oldest first
+        for _, path in sorted(ready):
+            with self._lock:
+                if len(self._active) >= self.config.max_concurrent:
+                    return
+            claimed = self.claim(path)
+            if claimed is not None:
+                with self._lock:
+                    self._active.add(claimed)
+                self._pool.submit(self._process, claimed)
+
+    def claim(self, path):
+        """Atomically move an inbox file into this daemon's processing directory; None if another got it"""
+        claimed = os.path.join(self.processing, os.path.basename(path))
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        self._seen.pop(path, None)
+        return claimed
+
+    def output_path(self, name):
+        stem, extension = os.path.splitext(name)
+        if self.config.output_format:
+            extension = DEFAULT_EXTENSIONS[self.config.output_format]
+        return os.path.join(self.output_dir, f"{stem}.predictions{extension}")
+
+    def _process(self, claimed):
+        name = os.path.basename(claimed)
+        start = time.perf_counter()
+        try:
+            try:
+                size = os.path.getsize(claimed)
+                summary = BatchPrediction(self.pipeline).predict_batch(claimed, self.output_path(name))
+            except Exception as e:
+                self._fail(claimed, name, e, time.perf_counter() - start)
+                return
+
+            elapsed = time.perf_counter() - start
+            rows = summary["total_predictions"]
+            with self._lock:
+                self.files_done += 1
+                self.rows += rows
+                self.bytes += size
+                self.busy_seconds += elapsed
+                self.last_file = name
+            logging.info(
+                f"Spool file {name}: {rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):.0f} rows/s), "
+                f"{summary['high_risk_count']} high risk -> {summary['output_file']}"
+            )
+            try:
+                _move_unique(claimed, self.done_dir)
+            except OSError as e:
+                logging.error(f"Spool file {name} was scored but could not be moved to {self.done_dir}: {e}")
+        except Exception as e:
+            logging.error(f"Spool file {name}: unexpected error: {e}")
+        finally:
+            # Always free the slot, or poll() eventually stops claiming files
+            with self._lock:
+                self._active.discard(claimed)
+
+    def _fail(self, claimed, name, error, elapsed):
+        with self._lock:
+            self.files_failed += 1
+            self.busy_seconds += elapsed
+            self.last_error = f"{name}: {error}"
+        logging.error(f"Spool file {name} failed after {elapsed:.1f}s: {error}")
+        try:
+            failed = _move_unique(claimed, self.failed_dir)
+            with open(f"{failed}.error.txt", "w", encoding="utf-8") as file_obj:
+                file_obj.write(f"{datetime.now().isoformat()} {error}\n")
+        except OSError as e:
+            logging.error(f"Spool file {name} could not be moved to {self.failed_dir} with its error file: {e}")
+
+    def stats(self):
+        with self._lock:
+            uptime = time.time() - self.started_at
+            stats = {
+                "owner": self.owner,
+                "uptime_seconds": round(uptime, 1),
+                "in_progress": len(self._active),
+                "max_concurrent": self.config.max_concurrent,
+                "inbox_files": len(self._seen),
+                "files_done": self.files_done,
+                "files_failed": self.files_failed,
+                "rows": self.rows,
+                "megabytes": round(self.bytes / 1024 ** 2, 1),
+                # While scoring, and averaged over the whole uptime
+                "rows_per_busy_second": round(self.rows / self.busy_seconds, 1) if self.busy_seconds else None,
+                "rows_per_second": round(self.rows / uptime, 1) if uptime > 0 else None,
+                "files_per_hour": round(3600 * (self.files_done + self.files_failed) / uptime, 1) if uptime > 0 else None,
+                "last_file": self.last_file,
+                "last_error": self.last_error,
+            }
+        return stats
+
+    def write_stats(self):
+        """Log the throughput summary and write it to <spool>/stats.<owner>.json for operators and monitoring"""
+        stats = self.stats()
+        logging.info(f"Spool stats: {stats}")
+        path = os.path.join(self.config.spool_dir, f"stats.{self.owner}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file_obj:
+            json.dump(stats, file_obj, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _move_unique(path, directory):
+    """Move a file into directory, adding a timestamp to its name if one with that name is already there"""
+    name = os.path.basename(path)
+    target = os.path.join(directory, name)
+    if os.path.exists(target):
+        stem, extension = os.path.splitext(name)
+        target = os.path.join(directory, f"{stem}.{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{extension}")
+    os.replace(path, target)
+    return target
+
+
+if __name__ == "__main__":
+    # Score files dropped into ./spool/inbox until interrupted
+    SpoolWatcher().run()
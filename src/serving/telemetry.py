@@ -0,0 +1,155 @@
+# src/serving/telemetry.py
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from src.logger import logging
+from src.metrics import PARSE_SECONDS, SERIALIZE_SECONDS
+from src.pipeline.predict_pipeline import reading_to_row
+
+
+@dataclass
+class TelemetryConfig:
+    # Readings being scored per connection; the socket is not read while this is exhausted
+    max_in_flight: int = int(os.environ.get("WS_MAX_IN_FLIGHT", 32))
+    # Scored updates waiting to be sent to a slow client
+    send_queue_size: int = int(os.environ.get("WS_SEND_QUEUE_SIZE", 64))
+
+
+class TelemetryStats:
+    """Connection and message counters shared by all telemetry sessions (event loop only)"""
+
+    def __init__(self):
+        self.active_connections = 0
+        self.connections = 0
+        self.readings = 0
+        self.updates_sent = 0
+        self.errors = 0
+
+    def stats(self):
+        return dict(self.__dict__)
+
+
+class TelemetrySession:
+    """
+    One long-lived WebSocket connection streaming machine readings.
+
+    Each text or UTF-8 binary frame holds one reading or a list of readings
+    (API field names, plus optional `machine_id` and `seq` echoed back); any
+    other frame gets an error update and the socket is closed with 1003.
+    Readings are scored with `predict_row`, which goes through the shared
+    micro-batcher, so readings from all connections are batched together. Memory per connection is
+    bounded: at most `max_in_flight` readings are scored at once and at most
+    `send_queue_size` updates wait for the client. When either bound is
+    reached the session stops reading the socket, and TCP flow control pushes
+    back on the sender.
+    """
+
+    def __init__(self, websocket: WebSocket, predict_row, stats: TelemetryStats, config: TelemetryConfig = None):
+        self.websocket = websocket
+        self.predict_row = predict_row
+        self.stats = stats
+        self.config = config or TelemetryConfig()
+        self._slots = asyncio.Semaphore(self.config.max_in_flight)
+        self._outbox = asyncio.Queue(maxsize=self.config.send_queue_size)
+        self._tasks = set()
+
+    async def run(self):
+        await self.websocket.accept()
+        self.stats.connections += 1
+        self.stats.active_connections += 1
+        sender = asyncio.create_task(self._send_loop())
+
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                message = message.get("text") if message.get("text") is not None else message.get("bytes")
+                if isinstance(message, bytes):
+                    # Binary frames are accepted when they hold UTF-8 JSON, like text frames
+                    try:
+                        message = message.decode("utf-8")
+                    except UnicodeDecodeError:
+                        message = None
+                if message is None:
+                    await self._close_unsupported(sender, "frames must hold UTF-8 encoded JSON")
+                    break
+                start = time.perf_counter()
+                try:
+                    payload = json.loads(message)
+                except ValueError:
+                    await self._outbox.put({"error": "invalid JSON"})
+                    continue
+                PARSE_SECONDS.observe(time.perf_counter() - start)
+
+                for reading in payload if isinstance(payload, list) else [payload]:
+                    # Backpressure: wait for a free slot before reading further
+                    await self._slots.acquire()
+                    task = asyncio.create_task(self._score(reading))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logging.error(f"Telemetry session failed: {str(e)}")
+        finally:
+            self.stats.active_connections -= 1
+            for task in list(self._tasks):
+                task.cancel()
+            sender.cancel()
+
+    async def _close_unsupported(self, sender, reason):
+        """Report a frame that cannot be read and close with 1003 (unsupported data)"""
+        self.stats.errors += 1
+        sender.cancel()
+        try:
+            await self.websocket.send_text(json.dumps({"error": reason}))
+            await self.websocket.close(code=1003)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+
+    async def _score(self, reading):
+        update = {}
+        if isinstance(reading, dict):
+            for field in ("machine_id", "seq"):
+                if field in reading:
+                    update[field] = reading[field]
+
+        try:
+            self.stats.readings += 1
+            prediction, confidence = await self.predict_row(reading_to_row(reading))
+            update.update({
+                "prediction": prediction,
+                "failure_risk": "High" if prediction == 1 else "Low",
+                "confidence": float(confidence) if confidence is not None else None,
+                "timestamp": datetime.now().isoformat(),
+            })
+        except Exception as e:
+            self.stats.errors += 1
+            update["error"] = str(e) or type(e).__name__
+
+        try:
+            # Blocks while a slow client has a full send queue
+            await self._outbox.put(update)
+        finally:
+            self._slots.release()
+
+    async def _send_loop(self):
+        try:
+            while True:
+                update = await self._outbox.get()
+                start = time.perf_counter()
+                text = json.dumps(update)
+                SERIALIZE_SECONDS.observe(time.perf_counter() - start)
+                await self.websocket.send_text(text)
+                self.stats.updates_sent += 1
+        except (WebSocketDisconnect, RuntimeError):
+            # The receive loop notices the disconnect and cleans up
+            pass
@@ -1,6 +1,8 @@
 # src/utils.py - NO FALLBACKS VERSION
 import os
 import sys
+import hashlib
+import threading
 import numpy as np 
 import pandas as pd
 import pickle
@@ -8,11 +10,22 @@ from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_sc
 from sklearn.model_selection import GridSearchCV
 from src.exception import CustomException
 from src.logger import logging
+from src import artifact_format as artifact_store
 
+# Files named *.mmap are written in the page-aligned, memory-mappable format (src/artifact_format.py);
+# everything else (model.pkl, preprocessor.pkl, ...) stays a plain pickle that pickle.load can read.
+# None, "zlib" or "lzma" for .mmap artifacts; compressed artifacts are smaller but cannot be memory-mapped
+ARTIFACT_COMPRESSION = os.environ.get("ARTIFACT_COMPRESSION") or None
+# Map artifacts read-only instead of reading them into process memory
+ARTIFACT_MMAP = os.environ.get("ARTIFACT_MMAP", "1") == "1"
 
-def save_object(file_path, obj):
-    """Save object to pickle file - NO FALLBACKS"""
+
+def save_object(file_path, obj, compress=None):
+    """Save object to a pickle file, or to a memory-mappable artifact when file_path ends in .mmap - NO FALLBACKS"""
     try:
+        artifact_format = "mmap" if file_path.endswith(artifact_store.EXTENSION) else "pickle"
+        compress = compress or ARTIFACT_COMPRESSION
+
         dir_path = os.path.dirname(file_path)
         
         # Check if directory creation fails
@@ -21,11 +34,20 @@ def save_object(file_path, obj):
         except Exception as e:
             raise CustomException(f"Cannot create directory {dir_path}: {str(e)}", sys)
 
-        # Check if we can actually write to the location
+        # Check if we can actually write to the location. Write to a temporary file and
+        # swap it in: truncating a file that another process has memory-mapped crashes that process.
+        # The name is unique per writer, so concurrent saves of the same artifact never share a temp file.
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
         try:
-            with open(file_path, "wb") as file_obj:
-                pickle.dump(obj, file_obj)
+            if artifact_format == "mmap":
+                artifact_store.dump(obj, tmp_path, compress=compress)
+            else:
+                with open(tmp_path, "wb") as file_obj:
+                    pickle.dump(obj, file_obj)
+            os.replace(tmp_path, file_path)
         except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             raise CustomException(f"Cannot write to file {file_path}: {str(e)}", sys)
             
         # Verify the file was actually created
@@ -36,7 +58,7 @@ def save_object(file_path, obj):
         if file_size == 0:
             raise CustomException(f"File created but is empty: {file_path}", sys)
             
-        logging.info(f"Object saved successfully: {file_path} ({file_size:,} bytes)")
+        logging.info(f"Object saved successfully: {file_path} ({file_size:,} bytes, {artifact_format} format)")
 
     except Exception as e:
         raise CustomException(f"save_object failed: {str(e)}", sys)
@@ -54,20 +76,35 @@ def load_object(file_path):
         if file_size == 0:
             raise ValueError(f"File exists but is empty: {file_path}")
             
-        # Try to load
+        # Try to load; the format is detected from the file itself, so older pickle artifacts still load
         try:
-            with open(file_path, "rb") as file_obj:
-                obj = pickle.load(file_obj)
+            if artifact_store.is_mmap_artifact(file_path):
+                obj, header = artifact_store.load(file_path, use_mmap=ARTIFACT_MMAP)
+                mapped = ARTIFACT_MMAP and not header["compress"]
+                detail = f"{len(header['buffers'])} buffers {'memory-mapped' if mapped else 'in memory'}"
+            else:
+                with open(file_path, "rb") as file_obj:
+                    obj = pickle.load(file_obj)
+                detail = "pickle"
         except Exception as e:
-            raise ValueError(f"Cannot load pickle file {file_path}: {str(e)}")
+            raise ValueError(f"Cannot load artifact file {file_path}: {str(e)}")
             
-        logging.info(f"Object loaded successfully: {file_path} ({file_size:,} bytes)")
+        logging.info(f"Object loaded successfully: {file_path} ({file_size:,} bytes, {detail})")
         return obj
 
     except Exception as e:
         raise CustomException(f"load_object failed: {str(e)}", sys)
 
 
+def file_sha256(file_path):
+    """Hex sha256 of a file's contents, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for block in iter(lambda: file_obj.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
 def evaluate_models(X_train, y_train, X_test, y_test, models, param):
     """Evaluate models - NO FALLBACKS, STRICT VALIDATION"""
     try:
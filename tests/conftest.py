@@ -0,0 +1,56 @@
+# tests/conftest.py
+import os
+
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.components.data_transformation import DataTransformation
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS, ModelCache, PredictPipeline, PredictPipelineConfig
+from src.utils import save_object
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "artifacts")
+
+
+@pytest.fixture(scope="session")
+def train_df():
+    return pd.read_csv(os.path.join(ARTIFACTS_DIR, "train.csv"))
+
+
+@pytest.fixture(scope="session")
+def test_df():
+    return pd.read_csv(os.path.join(ARTIFACTS_DIR, "test.csv"))
+
+
+@pytest.fixture(scope="session")
+def preprocessor(train_df):
+    """The training ColumnTransformer, fitted on artifacts/train.csv"""
+    return DataTransformation().get_data_transformer_object().fit(train_df[FEATURE_COLUMNS])
+
+
+@pytest.fixture(scope="session")
+def artifact_paths(tmp_path_factory, train_df, preprocessor):
+    """A small forest and its preprocessor saved as model.pkl / preprocessor.pkl in a temporary directory"""
+    directory = tmp_path_factory.mktemp("artifacts")
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=42)
+    model.fit(preprocessor.transform(train_df[FEATURE_COLUMNS]), train_df["Target"])
+    paths = {
+        "model_path": str(directory / "model.pkl"),
+        "preprocessor_path": str(directory / "preprocessor.pkl"),
+        "tree_engine_path": str(directory / "tree_engine.mmap"),
+    }
+    save_object(paths["model_path"], model)
+    save_object(paths["preprocessor_path"], preprocessor)
+    return paths
+
+
+@pytest.fixture
+def model_cache(artifact_paths):
+    cache = ModelCache(PredictPipelineConfig(reload_interval=0, **artifact_paths))
+    yield cache
+    cache.stop()
+
+
+@pytest.fixture
+def pipeline(model_cache):
+    return PredictPipeline(model_cache)
@@ -0,0 +1,170 @@
+# tests/test_admission.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.pipeline.predict_pipeline import WARMUP_ROWS
+from src.serving.admission import (
+    AdmissionConfig,
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejected,
+    DeadlineExceeded,
+    current_deadline,
+)
+from src.serving.inference_executor import InferenceExecutor, InferenceExecutorConfig
+from src.serving.micro_batcher import MicroBatcher, MicroBatcherConfig
+
+
+def controller(max_concurrency=1, max_queue=1):
+    return AdmissionController(AdmissionConfig(
+        name="test", max_concurrency=max_concurrency, max_queue=max_queue, default_deadline_ms=0,
+    ))
+
+
+def test_queue_full_is_rejected():
+    async def scenario():
+        admission = controller(max_concurrency=1, max_queue=1)
+        await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire()
+        admission.release()
+        await waiter
+        assert admission.stats()["rejected"] == 1
+        assert admission.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_waiter_is_shed_when_its_deadline_passes():
+    async def scenario():
+        admission = controller(max_concurrency=1, max_queue=4)
+        await admission.acquire()
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await admission.acquire(admission.deadline_for(20))
+        assert time.monotonic() - start < 1.0
+        assert admission.stats()["shed"] == 1
+        assert admission.stats()["queued"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_release_hands_the_slot_to_the_oldest_live_waiter():
+    async def scenario():
+        admission = controller(max_concurrency=1, max_queue=4)
+        await admission.acquire()
+        expired = asyncio.ensure_future(admission.acquire(time.monotonic() + 0.01))
+        live = asyncio.ensure_future(admission.acquire(time.monotonic() + 10))
+        await asyncio.sleep(0)
+        # The first waiter's deadline passes before the slot is freed
+        time.sleep(0.02)
+        admission.release()
+        with pytest.raises(DeadlineExceeded):
+            await expired
+        await live
+        assert admission.in_flight == 1
+        admission.release()
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+async def call_middleware(middleware, headers=()):
+    scope = {"type": "http", "method": "POST", "path": "/predict", "headers": list(headers)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return messages
+
+
+def test_middleware_answers_429_and_503_with_retry_after():
+    async def scenario():
+        release = asyncio.Event()
+        seen_deadlines = []
+
+        async def app(scope, receive, send):
+            seen_deadlines.append(current_deadline())
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        admission = controller(max_concurrency=1, max_queue=1)
+        middleware = AdmissionMiddleware(app, {"/predict": admission})
+
+        first = asyncio.ensure_future(call_middleware(middleware, [(b"x-request-deadline-ms", b"5000")]))
+        await asyncio.sleep(0)
+        shed = asyncio.ensure_future(call_middleware(middleware, [(b"x-request-deadline-ms", b"20")]))
+        await asyncio.sleep(0)
+        rejected = await call_middleware(middleware)
+        shed = await shed
+        release.set()
+        first = await first
+
+        assert first[0]["status"] == 200
+        assert seen_deadlines[0] is not None
+        for messages, status in ((rejected, 429), (shed, 503)):
+            assert messages[0]["status"] == status
+            assert (b"retry-after", b"1") in messages[0]["headers"]
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_executor_drops_expired_calls_without_running_them():
+    async def scenario():
+        executor = InferenceExecutor(InferenceExecutorConfig(max_workers=1, max_pending=8, timeout_seconds=5))
+        calls = []
+        try:
+            with pytest.raises(DeadlineExceeded):
+                await executor.run(calls.append, "expired", deadline=time.monotonic() - 1)
+
+            # One worker busy; the queued call's deadline passes before it is picked up
+            started = threading.Event()
+
+            def slow():
+                started.set()
+                time.sleep(0.2)
+                return "slow"
+
+            busy = asyncio.ensure_future(executor.run(slow))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            with pytest.raises(DeadlineExceeded):
+                await executor.run(calls.append, "queued", deadline=time.monotonic() + 0.05)
+            assert await busy == "slow"
+            assert calls == []
+            assert executor.stats()["shed"] == 2
+            assert await executor.run(calls.append, "live", deadline=time.monotonic() + 5) is None
+            assert calls == ["live"]
+        finally:
+            executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_micro_batcher_sheds_expired_rows_and_scores_live_ones(pipeline):
+    async def scenario():
+        executor = InferenceExecutor(InferenceExecutorConfig(max_workers=1, max_pending=8, timeout_seconds=5))
+        batcher = MicroBatcher(pipeline, MicroBatcherConfig(window_ms=0), executor)
+        try:
+            with pytest.raises(DeadlineExceeded):
+                await batcher.predict(WARMUP_ROWS[0], deadline=time.monotonic() - 1)
+            prediction, confidence = await batcher.predict(WARMUP_ROWS[0], deadline=time.monotonic() + 5)
+            assert prediction in (0, 1)
+            assert 0.0 <= confidence <= 1.0
+            assert batcher.shed == 1
+        finally:
+            await batcher.stop()
+            executor.shutdown()
+
+    asyncio.run(scenario())
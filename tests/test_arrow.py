@@ -0,0 +1,109 @@
+# tests/test_arrow.py
+import asyncio
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from starlette.requests import Request
+
+from app import read_body, score_arrow
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+from src.serving.arrow_io import (
+    ArrowFormatError,
+    ArrowUploadConfig,
+    ArrowUploadTooLarge,
+    read_table,
+    write_table,
+)
+
+
+@pytest.fixture
+def upload(test_df):
+    """The first rows of artifacts/test.csv with an ID column, as a pyarrow Table"""
+    frame = test_df[FEATURE_COLUMNS].head(200).reset_index(drop=True)
+    frame.insert(0, "Machine_ID", [f"m{index}" for index in range(len(frame))])
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def score(pipeline, table, fmt="arrow", out_fmt=None, **config):
+    body = bytearray(write_table(table, fmt).to_pybytes())
+    payload, rows, failed = score_arrow(pipeline, body, fmt, out_fmt or fmt, ArrowUploadConfig(**config))
+    return read_table(payload, out_fmt or fmt), rows, failed
+
+
+@pytest.mark.parametrize("fmt, out_fmt", [("arrow", "arrow"), ("parquet", "parquet"), ("parquet", "arrow")])
+def test_upload_is_scored_and_echoed(pipeline, upload, fmt, out_fmt):
+    result, rows, failed = score(pipeline, upload, fmt, out_fmt)
+
+    assert (rows, failed) == (upload.num_rows, 0)
+    assert result.column("Machine_ID").to_pylist() == upload.column("Machine_ID").to_pylist()
+    predictions, confidences = pipeline.predict_with_confidence(upload.to_pandas()[FEATURE_COLUMNS])
+    np.testing.assert_array_equal(result.column("Prediction").to_numpy(), predictions)
+    np.testing.assert_allclose(result.column("Confidence").to_numpy(), confidences)
+    assert result.column("Error").null_count == upload.num_rows
+
+
+def test_invalid_rows_are_reported_and_the_rest_scored(pipeline, upload):
+    types = upload.column("Type").to_pylist()
+    types[1] = "Z"
+    wear_column = FEATURE_COLUMNS[-1]
+    wear = upload.column(wear_column).to_pylist()
+    wear[3] = None
+    table = upload.set_column(upload.schema.get_field_index("Type"), "Type", pa.array(types))
+    table = table.set_column(table.schema.get_field_index(wear_column), wear_column, pa.array(wear, pa.float64()))
+
+    result, rows, failed = score(pipeline, table)
+
+    assert (rows, failed) == (upload.num_rows, 2)
+    errors = result.column("Error").to_pylist()
+    assert errors[1] == "Unknown or missing machine Type"
+    assert errors[3] == "Missing or non-finite feature value"
+    assert result.column("Prediction").to_pylist()[1] is None
+    valid = [index for index in range(upload.num_rows) if index not in (1, 3)]
+    predictions, _ = pipeline.predict_with_confidence(upload.to_pandas()[FEATURE_COLUMNS].iloc[valid])
+    np.testing.assert_array_equal(np.asarray(result.column("Prediction").to_pylist())[valid], predictions)
+
+
+def test_missing_columns_and_too_many_rows_are_refused(pipeline, upload):
+    with pytest.raises(ArrowFormatError, match="Missing required columns"):
+        score(pipeline, upload.drop([FEATURE_COLUMNS[4]]))
+    with pytest.raises(ArrowUploadTooLarge):
+        score(pipeline, upload, max_rows=upload.num_rows - 1)
+    with pytest.raises(ArrowFormatError):
+        score_arrow(pipeline, bytearray(b"not arrow"), "arrow", "arrow", ArrowUploadConfig())
+
+
+def test_parquet_output_is_a_parquet_file(pipeline, upload):
+    body = bytearray(write_table(upload, "arrow").to_pybytes())
+    payload, _, _ = score_arrow(pipeline, body, "arrow", "parquet", ArrowUploadConfig())
+    assert payload[:4] == b"PAR1"
+    assert pq.read_table(pa.BufferReader(payload)).num_rows == upload.num_rows
+
+
+def make_request(chunks, content_length=None):
+    headers = [] if content_length is None else [(b"content-length", str(content_length).encode())]
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    return Request({"type": "http", "method": "POST", "path": "/api/predict/arrow", "headers": headers}, receive)
+
+
+def test_read_body_buffers_uploads_up_to_the_limit():
+    body = asyncio.run(read_body(make_request([b"abc", b"def"]), max_bytes=6))
+    assert body == bytearray(b"abcdef")
+
+
+def test_read_body_refuses_a_declared_length_over_the_limit():
+    request = make_request([b"abc"], content_length=100)
+    with pytest.raises(ArrowUploadTooLarge):
+        asyncio.run(read_body(request, max_bytes=10))
+
+
+def test_read_body_refuses_a_stream_over_the_limit_without_a_length():
+    # Chunked uploads carry no Content-Length; the limit is enforced while reading
+    with pytest.raises(ArrowUploadTooLarge):
+        asyncio.run(read_body(make_request([b"x" * 8, b"x" * 8, b"x" * 8]), max_bytes=10))
@@ -0,0 +1,46 @@
+# tests/test_artifacts.py
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src import artifact_format
+from src.pipeline.tree_engine import export_tree_engine
+from src.utils import load_object, save_object
+
+
+def test_pkl_artifacts_stay_plain_pickle(artifact_paths, tmp_path):
+    with open(artifact_paths["model_path"], "rb") as file_obj:
+        model = pickle.load(file_obj)
+    path = str(tmp_path / "model.pkl")
+    save_object(path, model)
+    with open(path, "rb") as file_obj:
+        assert type(pickle.load(file_obj)) is type(model)
+
+
+def test_tree_engine_arrays_are_mapped_from_the_mmap_artifact(artifact_paths, tmp_path, test_df, preprocessor, monkeypatch):
+    # The test forest is small; store every array out-of-band
+    monkeypatch.setattr(artifact_format, "MIN_OUT_OF_BAND_BYTES", 0)
+    model = load_object(artifact_paths["model_path"])
+    path = str(tmp_path / "tree_engine.mmap")
+    export_tree_engine(model, path)
+
+    engine = load_object(path)
+    # Read-only views of the file, not private copies
+    assert not engine.threshold.flags.writeable
+    assert not engine.threshold.flags.owndata
+    X = preprocessor.transform(test_df)
+    np.testing.assert_array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+
+def test_concurrent_saves_of_one_artifact_do_not_collide(tmp_path):
+    path = str(tmp_path / "engine.mmap")
+    payloads = [np.full(50_000, value, dtype=np.float64) for value in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda payload: save_object(path, payload), payloads))
+
+    # The last writer wins whole; no torn file and no temp files left behind
+    loaded = load_object(path)
+    assert any(np.array_equal(loaded, payload) for payload in payloads)
+    assert sorted(os.listdir(tmp_path)) == ["engine.mmap"]
@@ -0,0 +1,68 @@
+# tests/test_batch_formats.py
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+
+from src.pipeline import batch_formats
+from src.pipeline.batch_formats import ColumnarReader, read_columns
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+
+COLUMNS = ["UDI"] + FEATURE_COLUMNS
+
+
+@pytest.fixture(params=["parquet", "feather"])
+def columnar_file(request, tmp_path, test_df):
+    """artifacts/test.csv as a Parquet file or Feather file split into many row groups / record batches"""
+    table = pa.Table.from_pandas(test_df, preserve_index=False)
+    path = str(tmp_path / f"input.{request.param}")
+    if request.param == "parquet":
+        pq.write_table(table, path, row_group_size=128)
+    else:
+        feather.write_feather(table, path, chunksize=128)
+    return path, request.param
+
+
+def read_all(reader, rows):
+    chunks = []
+    while True:
+        try:
+            chunks.append(reader.get_chunk(rows))
+        except StopIteration:
+            return chunks
+
+
+def test_only_the_requested_columns_are_read(columnar_file, test_df):
+    path, fmt = columnar_file
+    assert read_columns(path, fmt) == list(test_df.columns)
+
+    reader = ColumnarReader(path, fmt, COLUMNS)
+    chunks = read_all(reader, 1000)
+
+    assert reader.total_rows == len(test_df)
+    assert [len(chunk) for chunk in chunks[:-1]] == [1000] * (len(chunks) - 1)
+    frame = pd.concat(chunks, ignore_index=True)
+    assert list(frame.columns) == COLUMNS
+    assert isinstance(frame["Type"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(frame.astype({"Type": object}), test_df[COLUMNS])
+
+
+@pytest.mark.parametrize("skip_rows", [0, 1, 300, 1999])
+def test_skip_rows_resumes_after_the_skipped_rows(columnar_file, test_df, monkeypatch, skip_rows):
+    path, fmt = columnar_file
+    # Small scan batches, so the skipped rows span several of them
+    monkeypatch.setattr(batch_formats, "SCAN_BATCH_ROWS", 100)
+
+    chunks = read_all(ColumnarReader(path, fmt, COLUMNS, skip_rows=skip_rows), 256)
+
+    frame = pd.concat(chunks, ignore_index=True).astype({"Type": object})
+    expected = test_df[COLUMNS].iloc[skip_rows:].reset_index(drop=True)
+    pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_skipping_every_row_yields_no_chunks(columnar_file, test_df):
+    path, fmt = columnar_file
+    reader = ColumnarReader(path, fmt, COLUMNS, skip_rows=len(test_df))
+    with pytest.raises(StopIteration):
+        reader.get_chunk(100)
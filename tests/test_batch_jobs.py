@@ -0,0 +1,71 @@
+# tests/test_batch_jobs.py
+import os
+import threading
+import time
+
+import pytest
+
+from src.serving.batch_jobs import BatchJobConfig, BatchJobManager, BatchJobsFull
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    manager = BatchJobManager(BatchJobConfig(job_dir=str(tmp_path / "jobs"), max_workers=1, max_queued=1))
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture
+def input_csv_bytes(test_df):
+    return test_df.head(100).drop(columns=["Target", "Failure Type"]).to_csv(index=False).encode("utf-8")
+
+
+def test_concurrent_creates_cannot_exceed_capacity(jobs):
+    created, refused = [], []
+    barrier = threading.Barrier(8)
+
+    def submit():
+        barrier.wait()
+        try:
+            created.append(jobs.create("upload.csv"))
+        except BatchJobsFull:
+            refused.append(True)
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 2
+    assert len(refused) == 6
+    assert jobs.stats()["uploading"] == 2
+
+
+def test_discarded_upload_frees_its_slot(jobs):
+    first = jobs.create("a.csv")
+    jobs.create("b.csv")
+    with pytest.raises(BatchJobsFull):
+        jobs.create("c.csv")
+    jobs.discard(first)
+    assert not os.path.exists(jobs._path(first))
+    jobs.create("c.csv")
+
+
+def test_finished_job_frees_its_slot(jobs, pipeline, input_csv_bytes):
+    job_id = jobs.create("a.csv")
+    with open(jobs.input_path(job_id), "wb") as file_obj:
+        file_obj.write(input_csv_bytes)
+    jobs.start(job_id, pipeline)
+    jobs.create("b.csv")
+    jobs._futures[job_id].result(timeout=30)
+    assert jobs.get(job_id)["status"] == "succeeded"
+    jobs.create("c.csv")
+
+
+def test_abandoned_upload_is_expired_by_cleanup(jobs):
+    job_id = jobs.create("a.csv")
+    jobs.config.upload_timeout_seconds = 0
+    time.sleep(0.01)
+    jobs.cleanup()
+    assert not os.path.exists(jobs._path(job_id))
+    assert jobs.stats()["uploading"] == 0
@@ -0,0 +1,180 @@
+# tests/test_batch_prediction.py
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from src.exception import CustomException
+from src.pipeline import batch_prediction
+from src.pipeline.batch_prediction import BatchPrediction, BatchPredictionConfig, _score_shard, shard_ranges
+
+
+@pytest.fixture
+def input_csv(tmp_path, test_df):
+    path = tmp_path / "input.csv"
+    pd.concat([test_df] * 2, ignore_index=True).drop(columns=["Target", "Failure Type"]).to_csv(path, index=False)
+    return str(path)
+
+
+def small_chunks(**overrides):
+    """Chunks of a few hundred rows and a checkpoint after every one"""
+    config = dict(chunk_rows=300, min_chunk_rows=300, max_chunk_rows=300, checkpoint_seconds=1e-9)
+    config.update(overrides)
+    return BatchPredictionConfig(**config)
+
+
+def fail_after(rows):
+    def progress(done, total):
+        if rows <= done < total:
+            raise RuntimeError("simulated crash")
+    return progress
+
+
+def read_output(path):
+    frame = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    return frame.drop(columns=["Prediction_Timestamp"])
+
+
+def test_chunked_output_matches_vectorized_scoring(pipeline, input_csv, tmp_path):
+    output = str(tmp_path / "out.csv")
+    summary = BatchPrediction(pipeline, small_chunks(checkpoint_seconds=0)).predict_batch(input_csv, output)
+
+    frame = pd.read_csv(input_csv)
+    predictions, confidences = pipeline.predict_with_confidence(frame[BatchPrediction.required_columns])
+    result = pd.read_csv(output)
+    assert summary["total_predictions"] == len(frame)
+    assert summary["chunks"] > 1
+    assert (result["Prediction"].to_numpy() == predictions).all()
+    assert result["Confidence"].to_numpy() == pytest.approx(confidences)
+    assert result["UDI"].tolist() == frame["UDI"].tolist()
+
+
+@pytest.mark.parametrize("output_name", ["out.csv", "out.parquet"])
+def test_failed_run_resumes_from_its_checkpoint(pipeline, input_csv, tmp_path, output_name):
+    expected = str(tmp_path / f"expected_{output_name}")
+    BatchPrediction(pipeline, small_chunks(checkpoint_seconds=0)).predict_batch(input_csv, expected)
+
+    output = str(tmp_path / output_name)
+    with pytest.raises(CustomException):
+        BatchPrediction(pipeline, small_chunks()).predict_batch(input_csv, output, progress=fail_after(1000))
+    assert not os.path.exists(output)
+    with open(f"{output}.ckpt", encoding="utf-8") as file_obj:
+        state = json.load(file_obj)
+    assert state["rows"] >= 1000
+    if output_name.endswith(".csv"):
+        # Resumes by seeking, not by re-parsing the rows already scored
+        assert state["input_offset"] > 0
+
+    summary = BatchPrediction(pipeline, small_chunks()).predict_batch(input_csv, output)
+    assert summary["resumed_from_row"] == state["rows"]
+    pd.testing.assert_frame_equal(read_output(output), read_output(expected))
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(output_name + ".")]
+
+
+def test_csv_resume_does_not_reread_scored_rows(pipeline, input_csv, tmp_path, monkeypatch):
+    output = str(tmp_path / "out.csv")
+    with pytest.raises(CustomException):
+        BatchPrediction(pipeline, small_chunks()).predict_batch(input_csv, output, progress=fail_after(1000))
+    with open(f"{output}.ckpt", encoding="utf-8") as file_obj:
+        state = json.load(file_obj)
+
+    parsed_rows = []
+    read_csv = pd.read_csv
+
+    def counting_read_csv(*args, **kwargs):
+        frame = read_csv(*args, **kwargs)
+        if kwargs.get("header", "infer") is None:
+            parsed_rows.append(len(frame))
+        return frame
+
+    monkeypatch.setattr(pd, "read_csv", counting_read_csv)
+    summary = BatchPrediction(pipeline, small_chunks()).predict_batch(input_csv, output)
+    assert sum(parsed_rows) == summary["total_predictions"] - state["rows"]
+
+
+def test_checkpoint_for_a_different_input_is_ignored(pipeline, input_csv, tmp_path):
+    output = str(tmp_path / "out.csv")
+    with pytest.raises(CustomException):
+        BatchPrediction(pipeline, small_chunks()).predict_batch(input_csv, output, progress=fail_after(1000))
+
+    # The input changes between the runs: the stale checkpoint must not be applied
+    frame = pd.read_csv(input_csv)
+    frame.head(500).to_csv(input_csv, index=False)
+    summary = BatchPrediction(pipeline, small_chunks()).predict_batch(input_csv, output)
+    assert summary["resumed_from_row"] == 0
+    assert summary["total_predictions"] == 500
+
+
+def test_incremental_run_scores_only_new_or_changed_rows(pipeline, input_csv, tmp_path):
+    config = small_chunks(checkpoint_seconds=0, incremental=True, index_path=str(tmp_path / "index.parquet"))
+    first = BatchPrediction(pipeline, config).predict_batch(input_csv, str(tmp_path / "first.csv"))
+    assert first["reused_predictions"] == 0
+
+    # Keys are unique per row so every row gets its own index entry
+    frame = pd.read_csv(input_csv)
+    frame["UDI"] = range(len(frame))
+    frame.to_csv(input_csv, index=False)
+    BatchPrediction(pipeline, config).predict_batch(input_csv, str(tmp_path / "second.csv"))
+
+    frame.loc[:9, "Torque [Nm]"] += 5.0
+    frame.to_csv(input_csv, index=False)
+    third = BatchPrediction(pipeline, config).predict_batch(input_csv, str(tmp_path / "third.csv"))
+    assert third["new_predictions"] == 10
+    assert third["reused_predictions"] == len(frame) - 10
+
+    full = str(tmp_path / "full.csv")
+    BatchPrediction(pipeline, small_chunks(checkpoint_seconds=0)).predict_batch(input_csv, full)
+    assert (pd.read_csv(str(tmp_path / "third.csv"))["Prediction"] == pd.read_csv(full)["Prediction"]).all()
+
+
+def test_resume_of_csv_with_quoted_newlines_falls_back_to_pandas(pipeline, input_csv, tmp_path):
+    frame = pd.read_csv(input_csv)
+    frame["Product ID"] = frame["Product ID"].astype(str) + "\nline two"
+    frame.to_csv(input_csv, index=False)
+
+    expected = str(tmp_path / "expected.csv")
+    BatchPrediction(pipeline, small_chunks(checkpoint_seconds=0)).predict_batch(input_csv, expected, workers=2)
+    output = str(tmp_path / "out.csv")
+
+    def crash(done, total):
+        # pandas buffers this small file whole, so the row total is not known before the end
+        if done >= 1000:
+            raise RuntimeError("simulated crash")
+
+    with pytest.raises(CustomException):
+        BatchPrediction(pipeline, small_chunks()).predict_batch(input_csv, output, progress=crash)
+    with open(f"{output}.ckpt", encoding="utf-8") as file_obj:
+        assert "input_offset" not in json.load(file_obj)
+
+    summary = BatchPrediction(pipeline, small_chunks()).predict_batch(input_csv, output)
+    assert summary["resumed_from_row"] >= 1000
+    pd.testing.assert_frame_equal(read_output(output), read_output(expected))
+    assert read_output(output)["Product ID"].tolist() == frame["Product ID"].tolist()
+
+
+def reversed_completion_shard(input_file_path, start, end, *args):
+    """_score_shard that finishes later the earlier its shard starts, so shards complete out of order"""
+    time.sleep(0.5 * (1 - start / os.path.getsize(input_file_path)))
+    return _score_shard(input_file_path, start, end, *args)
+
+
+def test_sharded_output_is_merged_in_input_order(pipeline, input_csv, tmp_path, monkeypatch):
+    # Forked workers see the patched module attribute the pool submits
+    monkeypatch.setattr(batch_prediction, "_score_shard", reversed_completion_shard)
+    config = small_chunks(checkpoint_seconds=0, start_method="fork", shards_per_worker=2)
+    sharded = str(tmp_path / "sharded.csv")
+    sequential = str(tmp_path / "sequential.csv")
+
+    summary = BatchPrediction(pipeline, config).predict_batch(input_csv, sharded, workers=3)
+    BatchPrediction(pipeline, config).predict_batch(input_csv, sequential, workers=1)
+
+    assert summary["workers"] == 3
+    assert len(shard_ranges(input_csv, 6)) == 6
+    frame = pd.read_csv(input_csv)
+    result = read_output(sharded)
+    assert summary["total_predictions"] == len(result) == len(frame)
+    assert result["UDI"].tolist() == frame["UDI"].tolist()
+    pd.testing.assert_frame_equal(result, read_output(sequential))
+    assert not [name for name in os.listdir(tmp_path) if ".part" in name]
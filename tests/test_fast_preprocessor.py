@@ -0,0 +1,83 @@
+# tests/test_fast_preprocessor.py
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+
+from src.pipeline.fast_preprocessor import FastPreprocessor
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+
+
+@pytest.fixture
+def fast(preprocessor):
+    return FastPreprocessor.compile(preprocessor)
+
+
+def test_matches_column_transformer_on_test_rows(fast, preprocessor, test_df):
+    features = test_df[FEATURE_COLUMNS]
+    np.testing.assert_array_equal(fast.transform(features), preprocessor.transform(features))
+
+
+def test_row_and_array_entry_points_match_transform(fast, test_df):
+    features = test_df[FEATURE_COLUMNS].head(200)
+    expected = fast.transform(features)
+    rows = list(features.itertuples(index=False, name=None))
+    np.testing.assert_array_equal(fast.transform_rows(rows), expected)
+    np.testing.assert_array_equal(
+        fast.transform_arrays(features["Type"].to_numpy(dtype=object), features[FEATURE_COLUMNS[1:]].to_numpy()),
+        expected,
+    )
+
+
+def test_categorical_type_column(fast, preprocessor, test_df):
+    features = test_df[FEATURE_COLUMNS].head(100).astype({"Type": "category"})
+    np.testing.assert_array_equal(fast.transform(features), preprocessor.transform(features))
+
+
+@pytest.mark.parametrize("machine_type", ["X", "", None, np.nan])
+def test_unknown_type_is_rejected_like_the_encoder(fast, preprocessor, test_df, machine_type):
+    features = test_df[FEATURE_COLUMNS].head(3).copy()
+    features["Type"] = features["Type"].astype(object)
+    features.loc[features.index[1], "Type"] = machine_type
+    with pytest.raises(ValueError):
+        preprocessor.transform(features)
+    with pytest.raises(ValueError):
+        fast.transform(features)
+
+
+def test_nan_numeric_inputs_propagate_like_the_scaler(fast, preprocessor, test_df):
+    features = test_df[FEATURE_COLUMNS].head(20).copy()
+    features.iloc[3, 1] = np.nan
+    features.iloc[7, 4] = np.nan
+    features.iloc[11, 1:] = np.nan
+    expected = preprocessor.transform(features)
+    actual = fast.transform(features)
+    assert np.isnan(expected).any()
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_check_parity_detects_a_mismatch(fast, preprocessor, test_df):
+    features = test_df[FEATURE_COLUMNS].head(50)
+    assert fast.check_parity(preprocessor, features)
+    fast.num_mean = fast.num_mean + 1e-3
+    with pytest.raises(ValueError):
+        fast.check_parity(preprocessor, features)
+
+
+def test_unsupported_layout_is_refused(preprocessor):
+    with pytest.raises(ValueError):
+        FastPreprocessor.compile(object())
+    with pytest.raises(ValueError):
+        FastPreprocessor.compile(pd.DataFrame())
+
+
+@pytest.mark.parametrize("params", [
+    {"handle_unknown": "ignore"},
+    {"drop": "first"},
+    {"categories": [["M", "L", "H"]]},
+])
+def test_encoder_options_it_cannot_reproduce_are_refused(preprocessor, train_df, params):
+    variant = clone(preprocessor).set_params(**{f"cat_pipeline__one_hot_encoder__{name}": value for name, value in params.items()})
+    variant.fit(train_df[FEATURE_COLUMNS])
+    with pytest.raises(ValueError):
+        FastPreprocessor.compile(variant)
@@ -0,0 +1,18 @@
+# tests/test_http_metrics.py
+import pytest
+
+from src.serving.http_metrics import MetricsMiddleware
+
+PATHS = ["/api/predict", "/api/jobs", "/api/jobs/*"]
+
+
+@pytest.mark.parametrize("path, label", [
+    ("/api/predict", "/api/predict"),
+    ("/api/jobs", "/api/jobs"),
+    ("/api/jobs/0123abcd", "/api/jobs/*"),
+    ("/api/jobs/0123abcd/result", "/api/jobs/*"),
+    ("/api/predict/other", "other"),
+    ("/static/app.js", "other"),
+])
+def test_paths_are_labelled_by_route(path, label):
+    assert MetricsMiddleware(None, PATHS).label(path) == label
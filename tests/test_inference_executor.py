@@ -0,0 +1,115 @@
+# tests/test_inference_executor.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.serving.inference_executor import (
+    InferenceExecutor,
+    InferenceExecutorConfig,
+    InferenceOverloaded,
+    InferenceTimeout,
+)
+
+
+def make_executor(**config):
+    return InferenceExecutor(InferenceExecutorConfig(**{"max_workers": 1, "max_pending": 8, "timeout_seconds": 5, **config}))
+
+
+async def wait_for(predicate, timeout=2.0):
+    start = time.monotonic()
+    while not predicate():
+        assert time.monotonic() - start < timeout, "condition not reached"
+        await asyncio.sleep(0.005)
+
+
+def test_pending_and_active_follow_calls_through_the_pool():
+    async def scenario():
+        executor = make_executor()
+        release = threading.Event()
+        try:
+            busy = asyncio.ensure_future(executor.run(release.wait))
+            await wait_for(lambda: executor.stats()["active"] == 1)
+            queued = [asyncio.ensure_future(executor.run(lambda value=value: value)) for value in range(2)]
+            await asyncio.sleep(0)
+            stats = executor.stats()
+            assert (stats["active"], stats["pending"]) == (1, 2)
+            assert stats["saturation"] == 3.0
+
+            release.set()
+            assert await busy is True
+            assert await asyncio.gather(*queued) == [0, 1]
+            stats = executor.stats()
+            assert (stats["active"], stats["pending"], stats["completed"], stats["failed"]) == (0, 0, 3, 0)
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_calls_beyond_max_pending_are_rejected():
+    async def scenario():
+        executor = make_executor(max_pending=1)
+        release = threading.Event()
+        try:
+            busy = asyncio.ensure_future(executor.run(release.wait))
+            await wait_for(lambda: executor.stats()["active"] == 1)
+            queued = asyncio.ensure_future(executor.run(lambda: "queued"))
+            await asyncio.sleep(0)
+            with pytest.raises(InferenceOverloaded):
+                await executor.run(lambda: "rejected")
+
+            release.set()
+            await busy
+            assert await queued == "queued"
+            stats = executor.stats()
+            assert (stats["rejected"], stats["pending"], stats["completed"]) == (1, 0, 2)
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_counted_and_release_their_worker():
+    def fail():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        executor = make_executor()
+        try:
+            with pytest.raises(RuntimeError):
+                await executor.run(fail)
+            assert await executor.run(lambda: "next") == "next"
+            stats = executor.stats()
+            assert (stats["active"], stats["pending"], stats["failed"], stats["completed"]) == (0, 0, 1, 1)
+        finally:
+            executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_queued_call_that_times_out_never_runs_and_leaves_pending():
+    async def scenario():
+        executor = make_executor()
+        release = threading.Event()
+        calls = []
+        try:
+            busy = asyncio.ensure_future(executor.run(release.wait))
+            await wait_for(lambda: executor.stats()["active"] == 1)
+            with pytest.raises(InferenceTimeout):
+                await executor.run(calls.append, "late", timeout=0.05)
+            assert executor.stats()["pending"] == 0
+
+            release.set()
+            await busy
+            assert calls == []
+            stats = executor.stats()
+            assert (stats["active"], stats["pending"], stats["timeouts"], stats["completed"]) == (0, 0, 1, 1)
+        finally:
+            release.set()
+            executor.shutdown()
+
+    asyncio.run(scenario())
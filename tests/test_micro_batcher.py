@@ -0,0 +1,78 @@
+# tests/test_micro_batcher.py
+import asyncio
+
+from src.pipeline.predict_pipeline import WARMUP_ROWS
+from src.serving.inference_executor import InferenceExecutor, InferenceExecutorConfig
+from src.serving.micro_batcher import MicroBatcher, MicroBatcherConfig
+
+
+class RecordingPipeline:
+    """Scores through the real pipeline and records the size of every predict_rows call"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.calls = []
+
+    def predict_rows(self, rows):
+        self.calls.append(len(rows))
+        return self.pipeline.predict_rows(rows)
+
+
+def run_batcher(pipeline, rows, **config):
+    async def scenario():
+        executor = InferenceExecutor(InferenceExecutorConfig(max_workers=1, max_pending=64, timeout_seconds=5))
+        batcher = MicroBatcher(pipeline, MicroBatcherConfig(**config), executor)
+        try:
+            outcomes = await asyncio.gather(*(batcher.predict(row) for row in rows), return_exceptions=True)
+            return outcomes, batcher.stats()
+        finally:
+            await batcher.stop()
+            executor.shutdown()
+
+    return asyncio.run(scenario())
+
+
+def expected_outcomes(pipeline, rows):
+    predictions, confidences = pipeline.predict_rows(rows)
+    return [(int(prediction), float(confidence)) for prediction, confidence in zip(predictions, confidences)]
+
+
+def test_concurrent_rows_are_scored_in_one_call(pipeline):
+    recording = RecordingPipeline(pipeline)
+    rows = WARMUP_ROWS * 4
+
+    outcomes, stats = run_batcher(recording, rows, window_ms=0, max_batch_size=64)
+
+    assert recording.calls == [len(rows)]
+    assert outcomes == expected_outcomes(pipeline, rows)
+    assert stats["batches"] == 1
+    assert stats["rows"] == len(rows)
+    assert stats["max_observed_batch"] == len(rows)
+
+
+def test_batches_are_capped_at_max_batch_size(pipeline):
+    recording = RecordingPipeline(pipeline)
+    rows = WARMUP_ROWS * 3
+
+    outcomes, stats = run_batcher(recording, rows, window_ms=0, max_batch_size=4)
+
+    assert recording.calls == [4, 4, 1]
+    assert outcomes == expected_outcomes(pipeline, rows)
+    assert stats["batches"] == 3
+
+
+def test_failed_batch_falls_back_to_scoring_rows_one_by_one(pipeline):
+    recording = RecordingPipeline(pipeline)
+    # The fitted encoder rejects an unknown machine type, which fails the whole batch
+    bad_row = ("Z",) + WARMUP_ROWS[0][1:]
+    rows = [WARMUP_ROWS[0], bad_row, WARMUP_ROWS[1], WARMUP_ROWS[2]]
+
+    outcomes, stats = run_batcher(recording, rows, window_ms=0, max_batch_size=64)
+
+    assert recording.calls == [4, 1, 1, 1, 1]
+    assert isinstance(outcomes[1], Exception)
+    good = [WARMUP_ROWS[0], WARMUP_ROWS[1], WARMUP_ROWS[2]]
+    assert [outcomes[0], outcomes[2], outcomes[3]] == expected_outcomes(pipeline, good)
+    assert stats["batches"] == 1
+    assert stats["rows"] == len(rows)
+
@@ -0,0 +1,58 @@
+# tests/test_model_cache.py
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from src.pipeline import predict_pipeline
+from src.pipeline.predict_pipeline import ModelCache, PredictPipelineConfig
+from src.pipeline.tree_engine import export_tree_engine
+from src.utils import file_sha256, load_object
+
+
+@pytest.fixture
+def cache_config(artifact_paths, tmp_path):
+    """A private copy of the artifacts, so tests can touch the files"""
+    paths = {}
+    for key, path in artifact_paths.items():
+        paths[key] = str(tmp_path / os.path.basename(path))
+        if os.path.exists(path):
+            shutil.copy(path, paths[key])
+    return PredictPipelineConfig(reload_interval=0, **paths)
+
+
+def test_exported_tree_engine_is_reused_for_its_model_file(cache_config, monkeypatch):
+    model = load_object(cache_config.model_path)
+    export_tree_engine(model, cache_config.tree_engine_path, file_sha256(cache_config.model_path))
+
+    def compile_again(*args, **kwargs):
+        raise AssertionError("the exported engine should have been used")
+
+    monkeypatch.setattr(predict_pipeline, "compile_tree_engine", compile_again)
+    assert ModelCache(cache_config).get().tree_engine is not None
+
+
+def test_concurrent_reload_triggers_load_once(cache_config):
+    cache = ModelCache(cache_config)
+    cache.get()
+    loads = []
+    real_load = cache._load
+
+    def slow_load():
+        loads.append(1)
+        time.sleep(0.2)
+        return real_load()
+
+    cache._load = slow_load
+    os.utime(cache_config.model_path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.reload_if_changed())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert sorted(results) == [False, False, False, True]
@@ -0,0 +1,28 @@
+# tests/test_model_router.py
+import pytest
+
+from src.serving.model_router import ModelRouter, ModelRouterConfig, UnknownModel
+
+
+@pytest.fixture
+def router(artifact_paths):
+    router = ModelRouter(ModelRouterConfig(routes=f"candidate={artifact_paths['model_path']}@0"))
+    router.load_all()
+    yield router
+    for route in router.routes.values():
+        route.model_cache.stop()
+
+
+def test_routes_by_name_version_or_full_hash(router):
+    route = router.routes["candidate"]
+    artifacts = route.model_cache.get()
+    assert router.select("candidate") is route
+    assert router.select(artifacts.version) is route
+    assert router.select(artifacts.content_hash) is route
+
+
+@pytest.mark.parametrize("length", [1, 6, 13])
+def test_partial_hash_is_unknown(router, length):
+    content_hash = router.routes["candidate"].model_cache.get().content_hash
+    with pytest.raises(UnknownModel):
+        router.select(content_hash[:length])
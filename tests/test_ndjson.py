@@ -0,0 +1,58 @@
+# tests/test_ndjson.py
+import asyncio
+import time
+
+import pytest
+
+from src.serving.ndjson import NDJSONLineTooLong, NDJSONStreamConfig, iter_line_chunks
+
+
+async def collect(byte_stream, config):
+    """(seconds since start, lines) for every chunk"""
+    start = time.monotonic()
+    return [(time.monotonic() - start, lines) async for lines in iter_line_chunks(byte_stream, config)]
+
+
+async def body(*parts, pause=0.0):
+    for part in parts:
+        yield part
+        await asyncio.sleep(pause)
+
+
+def test_full_chunks_and_the_unterminated_last_line():
+    config = NDJSONStreamConfig(chunk_rows=2, flush_ms=1000)
+    chunks = asyncio.run(collect(body(b'{"a": 1}\n{"a"', b': 2}\n\n{"a": 3}\n{"a": 4}'), config))
+    assert [lines for _, lines in chunks] == [[b'{"a": 1}', b'{"a": 2}'], [b'{"a": 3}', b'{"a": 4}']]
+
+
+def test_partial_chunk_is_flushed_while_the_upload_stalls():
+    config = NDJSONStreamConfig(chunk_rows=5000, flush_ms=20)
+    chunks = asyncio.run(collect(body(b"1\n2\n", b"3\n", pause=0.3), config))
+    assert [lines for _, lines in chunks] == [[b"1", b"2"], [b"3"]]
+    # The first rows did not wait for the rest of the upload
+    assert chunks[0][0] < 0.2
+
+
+def test_long_line_is_rejected():
+    config = NDJSONStreamConfig(max_line_bytes=8)
+
+    async def scenario():
+        return await collect(body(b"0123456789"), config)
+
+    with pytest.raises(NDJSONLineTooLong):
+        asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("parts", [
+    # The oversized line arrives complete, between short ones, in a single read
+    (b"1\n" + b"9" * 20 + b"\n2\n",),
+    (b"1\n", b"9" * 20 + b"\n"),
+])
+def test_long_complete_line_is_rejected(parts):
+    config = NDJSONStreamConfig(chunk_rows=1, max_line_bytes=8)
+
+    async def scenario():
+        return await collect(body(*parts), config)
+
+    with pytest.raises(NDJSONLineTooLong):
+        asyncio.run(scenario())
@@ -0,0 +1,44 @@
+# tests/test_predict_row.py
+import asyncio
+
+import pytest
+
+import app as app_module
+from src.pipeline.predict_pipeline import WARMUP_ROWS
+from src.pipeline.prediction_cache import PredictionCache, PredictionCacheConfig
+from src.serving.inference_executor import InferenceExecutor, InferenceExecutorConfig
+from src.serving.micro_batcher import MicroBatcher, MicroBatcherConfig
+
+
+class RecordingShadow:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, features, predictions, confidences):
+        self.submitted.append((features, predictions, confidences))
+
+
+@pytest.fixture
+def shadow(monkeypatch):
+    shadow = RecordingShadow()
+    monkeypatch.setattr(app_module, "get_shadow_scorer", lambda: shadow)
+    return shadow
+
+
+def test_cache_hits_are_copied_to_the_shadow_model(pipeline, model_cache, shadow):
+    async def scenario():
+        executor = InferenceExecutor(InferenceExecutorConfig(max_workers=1))
+        batcher = MicroBatcher(pipeline, MicroBatcherConfig(window_ms=0), executor)
+        cache = PredictionCache(PredictionCacheConfig(enabled=True), model_cache=model_cache)
+        try:
+            miss = await app_module.predict_row(WARMUP_ROWS[0], pipeline, batcher, executor, cache)
+            hit = await app_module.predict_row(WARMUP_ROWS[0], pipeline, batcher, executor, cache)
+        finally:
+            await batcher.stop()
+            executor.shutdown()
+        return miss, hit, cache.stats()
+
+    miss, hit, stats = asyncio.run(scenario())
+    assert hit == miss
+    assert stats["hits"] == 1
+    assert [predictions for _, predictions, _ in shadow.submitted] == [[miss[0]], [hit[0]]]
@@ -0,0 +1,34 @@
+# tests/test_readings.py
+import pytest
+
+from src.pipeline.predict_pipeline import BatchCustomData, reading_to_row
+
+VALID = {
+    "Type": "M", "Air_temperature": 300.0, "Process_temperature": 310.5,
+    "Rotational_speed": 1500, "Torque": 40.0, "Tool_wear": 100,
+}
+
+
+def accepted_by_reading_to_row(reading):
+    try:
+        reading_to_row(reading)
+        return True
+    except ValueError:
+        return False
+
+
+@pytest.mark.parametrize("value", [300, 300.5, "300", "1.5", True, False, None, float("nan"), float("inf"), [300]])
+def test_bulk_and_single_row_validation_agree(value):
+    reading = dict(VALID, Air_temperature=value)
+    features, valid_index, errors = BatchCustomData([reading]).get_data_as_data_frame()
+    assert (len(valid_index) == 1) == accepted_by_reading_to_row(reading)
+    if errors:
+        assert errors[0]["error"] == "Air_temperature: missing or not a finite number"
+
+
+def test_valid_rows_keep_their_values_and_positions():
+    readings = [VALID, dict(VALID, Torque="40"), "not an object", dict(VALID, Tool_wear=7)]
+    features, valid_index, errors = BatchCustomData(readings).get_data_as_data_frame()
+    assert valid_index.tolist() == [0, 3]
+    assert features["Tool wear [min]"].tolist() == [100.0, 7.0]
+    assert [error["index"] for error in errors] == [1, 2]
@@ -0,0 +1,49 @@
+# tests/test_spool_watcher.py
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from src.serving.spool_watcher import SpoolConfig, SpoolWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path, pipeline):
+    watcher = SpoolWatcher(SpoolConfig(spool_dir=str(tmp_path / "spool"), settle_seconds=0, max_concurrent=1), pipeline)
+    yield watcher
+    watcher._pool.shutdown(wait=True)
+
+
+def drop(watcher, name, frame):
+    path = os.path.join(watcher.inbox, name)
+    frame.to_csv(path, index=False)
+    claimed = watcher.claim(path)
+    watcher._active.add(claimed)
+    return claimed
+
+
+def test_scored_file_moves_to_done_and_frees_its_slot(watcher, test_df):
+    claimed = drop(watcher, "readings.csv", test_df.head(50))
+    watcher._process(claimed)
+    assert os.listdir(watcher.done_dir) == ["readings.csv"]
+    assert os.listdir(watcher.output_dir) == ["readings.predictions.csv"]
+    assert watcher.stats()["files_done"] == 1
+    assert not watcher._active
+
+
+def test_failed_file_moves_to_failed_with_its_reason(watcher, test_df):
+    claimed = drop(watcher, "bad.csv", test_df.head(5).drop(columns=["Torque [Nm]"]))
+    watcher._process(claimed)
+    assert sorted(os.listdir(watcher.failed_dir)) == ["bad.csv", "bad.csv.error.txt"]
+    assert watcher.stats()["files_failed"] == 1
+    assert not watcher._active
+
+
+def test_slot_is_freed_even_when_the_failed_file_cannot_be_moved(watcher, test_df, caplog):
+    claimed = drop(watcher, "bad.csv", test_df.head(5).drop(columns=["Torque [Nm]"]))
+    shutil.rmtree(watcher.failed_dir)
+    watcher._process(claimed)
+    assert not watcher._active
+    assert watcher.stats()["files_failed"] == 1
+    assert "could not be moved" in caplog.text
@@ -0,0 +1,51 @@
+# tests/test_telemetry.py
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import WebSocketRoute
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.serving.telemetry import TelemetrySession, TelemetryStats
+
+READING = {
+    "machine_id": "M1", "seq": 7, "Type": "M", "Air_temperature": 300.0, "Process_temperature": 310.0,
+    "Rotational_speed": 1500, "Torque": 40.0, "Tool_wear": 100,
+}
+
+
+@pytest.fixture
+def client():
+    stats = TelemetryStats()
+
+    async def predict_row(row):
+        return 0, 0.9
+
+    async def endpoint(websocket):
+        await TelemetrySession(websocket, predict_row, stats).run()
+
+    with TestClient(Starlette(routes=[WebSocketRoute("/ws", endpoint)])) as client:
+        client.stats = stats
+        yield client
+
+
+@pytest.mark.parametrize("send", ["send_text", "send_bytes"])
+def test_text_and_binary_json_frames_are_scored(client, send):
+    with client.websocket_connect("/ws") as websocket:
+        payload = json.dumps(READING)
+        getattr(websocket, send)(payload if send == "send_text" else payload.encode("utf-8"))
+        update = websocket.receive_json()
+    assert update["machine_id"] == "M1"
+    assert update["seq"] == 7
+    assert update["prediction"] == 0
+
+
+def test_undecodable_binary_frame_is_reported_and_closed_with_1003(client):
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_bytes(b"\xff\xfe\x00")
+        assert "error" in websocket.receive_json()
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_text()
+    assert closed.value.code == 1003
+    assert client.stats.errors == 1
@@ -0,0 +1,60 @@
+# tests/test_tree_engine.py
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+
+from src.pipeline import tree_engine
+from src.pipeline.predict_pipeline import FEATURE_COLUMNS
+from src.pipeline.tree_engine import TreeEnsembleEngine
+
+MODELS = {
+    "random_forest": lambda: RandomForestClassifier(n_estimators=25, max_depth=8, random_state=42),
+    "extra_trees": lambda: ExtraTreesClassifier(n_estimators=25, max_depth=8, random_state=42),
+    "gradient_boosting": lambda: GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=42),
+}
+
+
+@pytest.fixture(scope="module", params=sorted(MODELS))
+def fitted(request, train_df, test_df, preprocessor):
+    """(model, engine, transformed artifacts/test.csv) for each supported ensemble"""
+    model = MODELS[request.param]()
+    model.fit(preprocessor.transform(train_df[FEATURE_COLUMNS]), train_df["Target"])
+    return model, TreeEnsembleEngine.compile(model), preprocessor.transform(test_df[FEATURE_COLUMNS])
+
+
+def test_predict_proba_matches_sklearn_exactly(fitted):
+    model, engine, X = fitted
+    np.testing.assert_array_equal(engine.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(engine.predict(X), model.predict(X))
+    assert engine.check_parity(model, X, atol=0.0)
+
+
+def test_chunked_predict_proba_matches_sklearn_exactly(fitted, monkeypatch):
+    model, engine, X = fitted
+    # A few rows per chunk, with a ragged last chunk
+    monkeypatch.setattr(tree_engine, "MAX_CELLS_PER_CHUNK", engine.n_trees * 7)
+    assert len(X) * engine.n_trees > tree_engine.MAX_CELLS_PER_CHUNK and len(X) % 7
+
+    np.testing.assert_array_equal(engine.predict_proba(X), model.predict_proba(X))
+
+
+def test_calibrate_runs_once_per_model_hash(monkeypatch, train_df, preprocessor):
+    monkeypatch.setattr(tree_engine, "MAX_ROWS_OVERRIDE", None)
+    monkeypatch.setattr(tree_engine, "_calibrated_max_rows", {})
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0)
+    model.fit(preprocessor.transform(train_df[FEATURE_COLUMNS]), train_df["Target"])
+
+    first = TreeEnsembleEngine.compile(model, source_hash="a" * 64)
+    max_rows = first.calibrate(model, repeats=1)
+
+    # A hot reload of the same model file compiles a new engine but must not time it again
+    reloaded = TreeEnsembleEngine.compile(model, source_hash="a" * 64)
+    monkeypatch.setattr(reloaded, "probe_inputs", lambda *args, **kwargs: pytest.fail("calibrated twice"))
+    assert reloaded.calibrate(model) == max_rows
+    assert reloaded.max_rows == max_rows
+
+    other = TreeEnsembleEngine.compile(model, source_hash="b" * 64)
+    calls = []
+    monkeypatch.setattr(other, "probe_inputs", lambda *args, **kwargs: calls.append(1) or first.probe_inputs(*args, **kwargs))
+    other.calibrate(model, repeats=1)
+    assert calls == [1]